@@ -0,0 +1,38 @@
+import time
+import numpy
+from micromelon import Colour
+
+# Compares converting a 640x480 camera sized frame pixel by pixel
+# with the array conversion functions.  No robot connection required.
+
+WIDTH = 640
+HEIGHT = 480
+
+frame = numpy.random.default_rng(0).integers(0, 256, (HEIGHT, WIDTH, 3))
+pixels = frame.reshape(-1, 3).tolist()
+
+startTime = time.time()
+scalarHsv = [Colour.rgbToHsv(r, g, b) for r, g, b in pixels]
+scalarRgbToHsv = time.time() - startTime
+
+startTime = time.time()
+scalarRgb = [Colour.hsvToRgb(h, s, v) for h, s, v in scalarHsv]
+scalarHsvToRgb = time.time() - startTime
+
+startTime = time.time()
+hsv = Colour.rgbToHsvArray(frame)
+arrayRgbToHsv = time.time() - startTime
+
+startTime = time.time()
+rgb = Colour.hsvToRgbArray(hsv)
+arrayHsvToRgb = time.time() - startTime
+
+print("Frame size: {}x{}".format(WIDTH, HEIGHT))
+print("rgbToHsv      per pixel: {:.3f}s".format(scalarRgbToHsv))
+print("rgbToHsvArray whole frame: {:.3f}s ({:.0f}x)".format(
+  arrayRgbToHsv, scalarRgbToHsv / arrayRgbToHsv))
+print("hsvToRgb      per pixel: {:.3f}s".format(scalarHsvToRgb))
+print("hsvToRgbArray whole frame: {:.3f}s ({:.0f}x)".format(
+  arrayHsvToRgb, scalarHsvToRgb / arrayHsvToRgb))
+print("Results match:", numpy.array_equal(hsv.reshape(-1, 3), scalarHsv)
+  and numpy.array_equal(rgb.reshape(-1, 3), scalarRgb))
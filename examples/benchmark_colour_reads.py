@@ -0,0 +1,36 @@
+import sys
+import time
+from micromelon import *
+
+# Measures colour sensor reads per second for each read option
+# USAGE: python3 benchmark_colour_reads.py [port]
+#   Connects to a simulated robot on 127.0.0.1 (default port 9000)
+
+SECONDS_PER_OPTION = 2
+
+rc = RoverController()
+port = int(sys.argv[1]) if len(sys.argv) > 1 else 9000
+rc.connectIP("127.0.0.1", port)
+
+
+def readsPerSecond(f):
+  count = 0
+  startTime = time.time()
+  while time.time() - startTime < SECONDS_PER_OPTION:
+    f()
+    count += 1
+  return count / (time.time() - startTime)
+
+
+for spam in (False, True):
+  rc.startRover(overrideSensorSpamMode=spam)
+  time.sleep(0.5)
+  print("Sensor spam", "on" if spam else "off")
+  for option in CS:
+    perSecond = readsPerSecond(lambda: Colour.readSensor(option, 1))
+    print("  readSensor({}): {:.0f} reads/s".format(option.name, perSecond))
+  perSecond = readsPerSecond(Colour.readAllSensors)
+  print("  readAllSensors(): {:.0f} reads/s".format(perSecond))
+  rc.stopRover()
+
+rc.end()
@@ -0,0 +1,62 @@
+import sys
+import time
+import tracemalloc
+from micromelon import *
+from micromelon._robot_comms import MicromelonType as OPTYPE
+
+# Measures the cost of handing calls to the communication thread
+# Reports calls per second and the peak bytes allocated during one call
+# USAGE: python3 benchmark_command_bridge.py [port]
+#   Connects to a simulated robot on 127.0.0.1 (default port 9000)
+
+SECONDS_PER_OPTION = 2
+ALLOCATION_SAMPLES = 200
+
+rc = RoverController()
+port = int(sys.argv[1]) if len(sys.argv) > 1 else 9000
+rc.connectIP("127.0.0.1", port)
+
+
+def callsPerSecond(f):
+  count = 0
+  startTime = time.time()
+  while time.time() - startTime < SECONDS_PER_OPTION:
+    f()
+    count += 1
+  return count / (time.time() - startTime)
+
+
+def peakBytesPerCall(f):
+  f()
+  tracemalloc.start()
+  peaks = []
+  for i in range(ALLOCATION_SAMPLES):
+    tracemalloc.reset_peak()
+    current = tracemalloc.get_traced_memory()[0]
+    f()
+    peaks.append(tracemalloc.get_traced_memory()[1] - current)
+  tracemalloc.stop()
+  peaks.sort()
+  return peaks[len(peaks) // 2]
+
+
+def report(name, f):
+  perSecond = callsPerSecond(f)
+  print("  {}: {:.0f} calls/s, {} bytes/call".format(name, perSecond, peakBytesPerCall(f)))
+
+
+communicator = rc._robotCommunicator
+print("Bridge only")
+report("no-op round trip", lambda: communicator.runCommand(None, lambda: None))
+
+print("Sensor spam off")
+report("uncached read", lambda: rc.readAttribute(OPTYPE.ULTRASONIC))
+report("write", lambda: rc.writeAttribute(OPTYPE.SERVO_MOTORS, [0xFF, 0xFF]))
+
+rc.startRover(overrideSensorSpamMode=True)
+time.sleep(0.5)
+print("Sensor spam on")
+report("cached read", lambda: rc.readAttribute(OPTYPE.ULTRASONIC))
+rc.stopRover()
+
+rc.end()
@@ -0,0 +1,38 @@
+import subprocess
+import sys
+
+# Measures how long a fresh Python process takes to import the library
+# in a few common ways.  No robot connection required.
+# Each case runs in a new interpreter so nothing is already imported.
+
+RUNS = 5
+
+CASES = [
+    ("import micromelon", "import micromelon"),
+    ("from micromelon import Motors", "from micromelon import Motors"),
+    ("from micromelon import *", "from micromelon import *"),
+    ("RoverController()", "from micromelon import RoverController; RoverController()"),
+]
+
+TIMER = """
+import time
+startTime = time.perf_counter()
+{}
+print(time.perf_counter() - startTime)
+"""
+
+
+def timeStatement(statement):
+    output = subprocess.run(
+        [sys.executable, "-c", TIMER.format(statement)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+for label, statement in CASES:
+    times = sorted(timeStatement(statement) for _ in range(RUNS))
+    print("{:<32} best {:7.1f}ms  median {:7.1f}ms".format(
+      label, times[0] * 1000, times[len(times) // 2] * 1000))
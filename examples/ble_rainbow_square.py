@@ -14,8 +14,8 @@ rc.connectBLE(sys.argv[1])
 rc.startRover()
 
 print("Rainbow")
-for i in range(0, 360, 5):
-  LEDs.writeAll(Colour.hue(i))
+# 72 frames of hue 0 to 355 in steps of 5 sent from the comms thread at a fixed rate
+LEDs.animate(LEDs.hueSweep(72), fps=24)
 print("Square")
 for i in range(4):
   Motors.moveDistance(20)
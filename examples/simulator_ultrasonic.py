@@ -6,11 +6,9 @@ rc.connectIP("127.0.0.1", 9000)
 rc.startRover()
 
 Motors.write(20)
-while True:
-    u = Ultrasonic.read()
-    print(u)
-    if u < 20:
-        break
+# Checked against every sensor reading as it arrives instead of polling in a loop
+u = Ultrasonic.waitUntil(lambda cm: cm < 20)
+print(u)
 
 rc.stopRover()
 rc.end()
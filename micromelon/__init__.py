@@ -5,25 +5,46 @@ and simulated rovers in the Micromelon Robot Simulator.
 Submodules can be accessed with either lower-case or upper case notation.
 """
 
-from ._robot_comms import RoverController
-from . import battery as Battery
-from . import colour as Colour
-from . import i2c as I2C
-from . import imu as IMU
-from . import ir as IR
-from . import leds as LEDs
-from . import motors as Motors
-from . import robot as Robot
-from . import servos as Servos
-from . import sounds as Sounds
-from . import ultrasonic as Ultrasonic
-from .helper_math import _math as Math
-from ._utils import delay
-
-CS = Colour.CS
-COLOURS = Colour.COLOURS
-NOTES = Sounds.NOTES
-TUNES = Sounds.TUNES
+import importlib
+
+# Everything is imported on first access so scripts only pay for the parts they use
+# name: (module relative to this package, attribute of that module or None for the module)
+_LAZY_ATTRIBUTES = {
+    "RoverController": ("._robot_comms", "RoverController"),
+    "Battery": (".battery", None),
+    "Colour": (".colour", None),
+    "I2C": (".i2c", None),
+    "IMU": (".imu", None),
+    "IR": (".ir", None),
+    "LEDs": (".leds", None),
+    "Motors": (".motors", None),
+    "Robot": (".robot", None),
+    "Servos": (".servos", None),
+    "Sounds": (".sounds", None),
+    "Ultrasonic": (".ultrasonic", None),
+    "Math": (".helper_math._math", None),
+    "delay": ("._utils", "delay"),
+    "CS": (".colour", "CS"),
+    "COLOURS": (".colour", "COLOURS"),
+    "NOTES": (".sounds", "NOTES"),
+    "TUNES": (".sounds", "TUNES"),
+}
+
+# Lower case submodule names are also available on first access
+_SUBMODULES = (
+    "battery",
+    "colour",
+    "i2c",
+    "imu",
+    "ir",
+    "leds",
+    "motors",
+    "robot",
+    "servos",
+    "sounds",
+    "ultrasonic",
+    "helper_math",
+)
 
 __all__ = [
     "RoverController",
@@ -45,3 +66,22 @@ __all__ = [
     "I2C",
     "delay",
 ]
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        # Importing a submodule also sets it as an attribute of this package
+        return importlib.import_module("." + name, __name__)
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    moduleName, attribute = _LAZY_ATTRIBUTES[name]
+    value = importlib.import_module(moduleName, __name__)
+    if attribute:
+        value = getattr(value, attribute)
+    # Cache so later accesses skip this function
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
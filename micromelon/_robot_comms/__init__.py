@@ -1,15 +1,29 @@
 from ._rover_controller import RoverController
 from ._comms_constants import MicromelonOpCode, MicromelonType
-from .ble import BleControllerThread, BleController
-from .uart import UartController
+from ._rover_read_cache import readSensorFrame
+from ._filtered_sensor import FilteredSensor
+from ._timeline import TimelineEvent
+from .uart import UartController, AttributeNotImplementedError
 from .transports import RobotTransportBLE
 
 __all__ = [
     "RoverController",
     "MicromelonOpCode",
     "MicromelonType",
+    "readSensorFrame",
+    "FilteredSensor",
+    "TimelineEvent",
     "BleController",
-    "BleControllerThread",
     "UartController",
+    "AttributeNotImplementedError",
     "RobotTransportBLE",
 ]
+
+
+def __getattr__(name):
+    # The BLE controller imports bleak which is slow so it is loaded on first use
+    if name == "BleController":
+        from . import ble
+
+        return getattr(ble, name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
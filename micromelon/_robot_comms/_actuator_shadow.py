@@ -0,0 +1,58 @@
+from ._comms_constants import MicromelonType as OPTYPE
+
+
+class ActuatorShadow:
+    """
+    Keeps the last state written to each actuator so it can be written again after a reconnect
+    Partial writes (LED masks and servos left as is) are merged into the full state
+    """
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self):
+        self._motors = None
+        self._servos = [0xFF, 0xFF]
+        self._leds = None
+        self._ledMask = 0
+        self._buzzer = None
+
+    def noteWrite(self, opType, data):
+        if opType == OPTYPE.MOTOR_SET.value:
+            # Only continuous speeds are restored - a move with distances would be driven again
+            if len(data) >= 6 and any(data[2:6]):
+                self._motors = None
+            else:
+                self._motors = list(data)
+        elif opType == OPTYPE.TURN_DEGREES.value:
+            self._motors = None
+        elif opType == OPTYPE.SERVO_MOTORS.value and len(data) >= 2:
+            for i in (0, 1):
+                # 0xFF leaves the servo as it is
+                if data[i] != 0xFF:
+                    self._servos[i] = data[i]
+        elif opType == OPTYPE.RGBS.value and len(data) >= 13:
+            if self._leds is None:
+                self._leds = [0] * 12
+            for led in range(4):
+                if data[0] & (1 << led):
+                    self._leds[led * 3 : led * 3 + 3] = data[1 + led * 3 : 4 + led * 3]
+            self._ledMask |= data[0] & 0x0F
+        elif opType == OPTYPE.BUZZER_FREQ.value:
+            self._buzzer = list(data)
+
+    def getRestoreWrites(self):
+        """
+        Returns:
+          List of (opType, data) writes that put the actuators back in their last known state
+        """
+        writes = []
+        if self._motors is not None:
+            writes.append((OPTYPE.MOTOR_SET.value, list(self._motors)))
+        if self._servos != [0xFF, 0xFF]:
+            writes.append((OPTYPE.SERVO_MOTORS.value, list(self._servos)))
+        if self._leds is not None:
+            writes.append((OPTYPE.RGBS.value, [self._ledMask] + list(self._leds)))
+        if self._buzzer is not None:
+            writes.append((OPTYPE.BUZZER_FREQ.value, list(self._buzzer)))
+        return writes
@@ -2,6 +2,9 @@ from enum import Enum
 
 DEFAULT_SPAM_INTERVAL_MS = 150
 MIN_SPAM_INTERVAL_MS = 5
+# Sensor spam is treated as stopped after a gap of this long or this many intervals
+SENSOR_FRAME_GAP = 1.0  # s
+SENSOR_FRAME_GAP_INTERVALS = 10
 
 
 class CONNECTION_STATUS(Enum):
@@ -20,6 +23,15 @@ class RUNNING_STATES(Enum):
     CLOSED = 0
 
 
+class COMMAND_PRIORITY(Enum):
+    # Lower values are run first
+    EMERGENCY_STOP = 0
+    MOTION = 1
+    ACTUATOR = 2
+    SENSOR_READ = 3
+    BULK = 4
+
+
 class BUTTON_NOTIFICATION_CODES(Enum):
     START_STOP = 0
     COLOUR_CAL_COMPLETE = 8
@@ -0,0 +1,61 @@
+import threading
+
+
+class CompletionSlot:
+    """
+    Reusable place for the communication thread to hand a result to a waiting thread
+    Each thread keeps one slot so a call allocates no events or command objects
+
+    Every use of the slot gets a new generation. A result for an older generation
+    (a call that already timed out) is dropped instead of being returned to the next call.
+    """
+
+    __slots__ = ("_guard", "_done", "_generation", "_result")
+
+    def __init__(self) -> None:
+        self._guard = threading.Lock()
+        # Held while a result is pending - released by complete
+        self._done = threading.Lock()
+        self._done.acquire()
+        self._generation = 0
+        self._result = None
+
+    def prepare(self):
+        """
+        Returns:
+          The generation to complete this use of the slot with
+        """
+        with self._guard:
+            self._generation += 1
+            self._result = None
+            # A call that timed out may have been completed since - take the lock back
+            self._done.acquire(False)
+            return self._generation
+
+    def complete(self, generation, result):
+        with self._guard:
+            if generation != self._generation:
+                return
+            # Stop a repeated completion releasing the lock twice
+            self._generation += 1
+            self._result = result
+            self._done.release()
+
+    def wait(self, timeout=None):
+        """
+        Blocks until the slot is completed
+
+        Raises:
+          TimeoutError if not completed within timeout seconds
+          The result if it is an Exception
+
+        Returns:
+          The result the slot was completed with
+        """
+        if not self._done.acquire(True, -1 if timeout is None else timeout):
+            raise TimeoutError("Command Timed out")
+        result = self._result
+        self._result = None
+        if isinstance(result, Exception):
+            raise result
+        return result
@@ -0,0 +1,77 @@
+import threading
+import time
+from ._moving_average import ExponentialMovingAverage
+from ._running_median import RunningMedian
+
+# Filtered values not updated by sensor spam for this long are updated with a direct read
+STALE_AFTER = 0.5  # s
+
+
+class FilteredSensor:
+    """
+    Running median (optionally followed by exponential smoothing) of a sensor
+    that can hold several values eg. left and right IR sensors
+
+    Register recordFrame as a sensor frame listener to update it from every
+    sensor spam packet.  The filtered value is calculated as values arrive
+    so reading it is constant time.
+    """
+
+    def __init__(self, decode, window, smoothing=None) -> None:
+        self._decode = decode
+        self._window = None
+        self._smoothing = None
+        self._lock = threading.Lock()
+        self.configure(window, smoothing)
+
+    def configure(self, window, smoothing=None):
+        """
+        Changes the filter settings. Values recorded with different settings are discarded
+
+        Raises:
+          Exception on invalid settings
+        """
+        if not isinstance(window, int) or window < 1:
+            raise Exception("Filter window must be a positive integer")
+        if smoothing is not None and (
+            not isinstance(smoothing, (int, float)) or smoothing <= 0 or smoothing > 1
+        ):
+            raise Exception("Smoothing must be a number between 0 and 1 (or None)")
+        with self._lock:
+            if (window, smoothing) == (self._window, self._smoothing):
+                return
+            self._window = window
+            self._smoothing = smoothing
+            self._medians = None
+            self._averages = None
+            self._filtered = None
+            self._lastUpdatedTime = 0
+
+    def recordFrame(self, data, timestamp):
+        self.recordValues(self._decode(data), timestamp)
+
+    def recordValues(self, values, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            if self._medians is None:
+                self._medians = [RunningMedian(self._window) for _ in values]
+                self._averages = [
+                    ExponentialMovingAverage(self._smoothing) for _ in values
+                ]
+            filtered = []
+            for value, median, average in zip(values, self._medians, self._averages):
+                median.recordValue(value)
+                value = median.getMedian()
+                if self._smoothing is not None:
+                    average.recordValue(value)
+                    value = average.getAverage()
+                filtered.append(value)
+            self._filtered = filtered
+            self._lastUpdatedTime = timestamp
+
+    def isStale(self):
+        return time.time() - self._lastUpdatedTime > STALE_AFTER
+
+    def read(self):
+        return self._filtered
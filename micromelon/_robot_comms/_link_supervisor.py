@@ -0,0 +1,133 @@
+import threading
+import time
+from ._comms_constants import MicromelonType as OPTYPE
+from ._moving_average import MovingAverage
+from .._mm_logging import getLogger
+
+logger = getLogger()
+
+# How often the link is checked
+CHECK_INTERVAL = 0.25  # s
+# Without sensor spam the robot is read this often to check the link
+HEARTBEAT_INTERVAL = 2.0  # s
+HEARTBEAT_TIMEOUT = 1.0  # s
+# Consecutive failed heartbeats before the link is treated as lost
+HEARTBEAT_FAILURES = 2
+# Sensor spam gaps longer than this many spam intervals mean the link is lost
+SPAM_GAP_INTERVALS = 10
+INITIAL_BACKOFF = 0.5  # s
+MAX_BACKOFF = 8.0  # s
+
+
+class LinkSupervisor(threading.Thread):
+    """
+    Watches the connection to the robot and reconnects when it is lost
+
+    The link is treated as lost when the transport reports an unexpected disconnect,
+    when sensor spam packets stop arriving, or when heartbeat reads fail while spam is off.
+    Reconnecting uses the last connection method and arguments with exponential backoff,
+    then the session state captured when the link was lost is written again.
+    """
+
+    def __init__(self, controller, notificationGap=1.0) -> None:
+        super().__init__()
+        self.daemon = True
+        self._rc = controller
+        self._notificationGap = notificationGap
+        self._lossDetected = threading.Event()
+        self._stopped = threading.Event()
+        self._lossReason = None
+        self._lastFrameTime = None
+        self._lastHeartbeatTime = 0
+        self._heartbeatFailures = 0
+        self._heartbeatTimings = MovingAverage(10)
+        self._reconnectCount = 0
+        self._lastOutageSeconds = None
+
+    def recordFrame(self, data, timestamp):
+        self._lastFrameTime = timestamp
+
+    def linkLost(self, reason):
+        if self._lossDetected.is_set() or self._stopped.is_set():
+            return
+        self._lossReason = reason
+        self._lossDetected.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._lossDetected.set()
+
+    def getStats(self):
+        return {
+            "reconnectCount": self._reconnectCount,
+            "lastOutageSeconds": self._lastOutageSeconds,
+            "heartbeatAverageMS": self._heartbeatTimings.getAverage(),
+            "recovering": self._lossDetected.is_set() and not self._stopped.is_set(),
+        }
+
+    def run(self):
+        while not self._stopped.is_set():
+            if self._lossDetected.wait(CHECK_INTERVAL):
+                if self._stopped.is_set():
+                    return
+                self._recover()
+            else:
+                self._checkHealth()
+
+    def _checkHealth(self):
+        if not self._rc.isConnected():
+            self._lastFrameTime = None
+            return
+        now = time.time()
+        if self._rc.isSensorSpamActive():
+            if self._lastFrameTime is None:
+                # Spam has just started - time the gap from now
+                self._lastFrameTime = now
+            interval = (self._rc.getSensorSpamIntervalMS() or 0) / 1000.0
+            gap = max(self._notificationGap, interval * SPAM_GAP_INTERVALS)
+            if now - self._lastFrameTime > gap:
+                self.linkLost("No sensor data for {:.1f}s".format(now - self._lastFrameTime))
+            return
+        self._lastFrameTime = None
+        if now - self._lastHeartbeatTime < HEARTBEAT_INTERVAL:
+            return
+        self._lastHeartbeatTime = now
+        try:
+            self._rc.readAttribute(OPTYPE.STATE_OF_CHARGE, timeout=HEARTBEAT_TIMEOUT)
+            self._heartbeatTimings.recordValue((time.time() - now) * 1000.0)
+            self._heartbeatFailures = 0
+        except Exception as e:
+            if not self._rc.isConnected():
+                return
+            self._heartbeatFailures += 1
+            logger.debug("Heartbeat read failed")
+            logger.debug(e)
+            if self._heartbeatFailures >= HEARTBEAT_FAILURES:
+                self.linkLost("Heartbeat reads failed")
+
+    def _recover(self):
+        logger.warning("Robot connection lost (" + str(self._lossReason) + ") - reconnecting")
+        state = self._rc.captureSessionState()
+        outageStart = time.time()
+        backoff = INITIAL_BACKOFF
+        restored = False
+        while not self._stopped.is_set():
+            try:
+                restored = self._rc.restoreSession(state)
+                break
+            except Exception as e:
+                logger.info("Reconnect failed - trying again in {}s".format(backoff))
+                logger.info(e)
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+        if self._stopped.is_set():
+            return
+        self._lastFrameTime = None
+        self._heartbeatFailures = 0
+        self._lossDetected.clear()
+        if not restored:
+            logger.info("Connection changed while reconnecting - leaving it as is")
+            return
+        self._lastOutageSeconds = time.time() - outageStart
+        self._reconnectCount += 1
+        logger.warning("Robot reconnected after {:.1f}s".format(self._lastOutageSeconds))
@@ -22,3 +22,18 @@ class MovingAverage:
         for i in range(endIndex):
             total += self._historyWindow[i]
         return total / endIndex
+
+
+class ExponentialMovingAverage:
+    def __init__(self, alpha) -> None:
+        self._alpha = alpha
+        self._average = None
+
+    def recordValue(self, value):
+        if self._average is None:
+            self._average = value
+        else:
+            self._average += self._alpha * (value - self._average)
+
+    def getAverage(self):
+        return self._average
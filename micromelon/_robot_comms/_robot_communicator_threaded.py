@@ -2,21 +2,28 @@ import threading
 import queue
 from enum import Enum
 import asyncio
+import itertools
 import time
 from .._mm_logging import getLogger
 
-from ._thread_command import ThreadCommand
+from ._completion_slot import CompletionSlot
 from .uart import UartController
 from ._comms_constants import (
     MicromelonOpCode as OPCODE,
     MicromelonType as OPTYPE,
     CONNECTION_STATUS,
+    COMMAND_PRIORITY,
     DEFAULT_SPAM_INTERVAL_MS,
     MIN_SPAM_INTERVAL_MS,
+    SENSOR_FRAME_GAP,
+    SENSOR_FRAME_GAP_INTERVALS,
 )
 from ._rover_read_cache import RoverReadCache
 from .._binary import intArrayToBytes
 from ._moving_average import MovingAverage
+from ._safety_guard import SafetyGuard
+from ._actuator_shadow import ActuatorShadow
+from ._timeline import playTimeline
 from .transports import (
     RobotTransportBase,
     RobotTransportBLE,
@@ -26,6 +33,31 @@ from .transports import (
 
 logger = getLogger()
 
+# How often a wait for a sensor frame checks that frames are still arriving
+FRAME_CHECK_INTERVAL = 0.5  # s
+# Reads that can hold up the command queue for a long time
+_BULK_READ_TYPES = (OPTYPE.RPI_IMAGE.value, OPTYPE.I2C_HEADER.value)
+# Writes that move the robot - the only commands a stop cancels
+_MOTION_TYPES = (OPTYPE.MOTOR_SET.value, OPTYPE.TURN_DEGREES.value)
+# Queued after every priority so the executor finishes what is queued before stopping
+_STOP_EXECUTOR_PRIORITY = len(COMMAND_PRIORITY)
+
+
+def _commandPriority(opCode, opType, data):
+    """
+    Stops are never inferred from a payload - they are queued with an explicit priority
+
+    Returns:
+      The COMMAND_PRIORITY value to queue a transaction with
+    """
+    if opCode != OPCODE.WRITE.value:
+        if opType in _BULK_READ_TYPES:
+            return COMMAND_PRIORITY.BULK.value
+        return COMMAND_PRIORITY.SENSOR_READ.value
+    if opType in _MOTION_TYPES:
+        return COMMAND_PRIORITY.MOTION.value
+    return COMMAND_PRIORITY.ACTUATOR.value
+
 
 class RobotCommunicatorThread(threading.Thread):
     def __init__(self) -> None:
@@ -33,6 +65,7 @@ class RobotCommunicatorThread(threading.Thread):
 
         self.daemon = True
         self._commandQueue = None
+        self._stopQueue = None
         self._eventQueue = None
         self._loop = None
         self._uart = None
@@ -40,21 +73,73 @@ class RobotCommunicatorThread(threading.Thread):
         self._readCache = RoverReadCache()
         self._currentRequestedUpdateInterval = None
         self._sensorSpamActive = False
+        self._sensorSpamStartTime = 0
+        self._lastSensorFrameTime = 0
         self._threadReady = threading.Event()
+        # One reusable completion slot per calling thread
+        self._threadSlots = threading.local()
 
         self._TIMING_WINDOW_SIZE = 20
         self._transactionTimings = MovingAverage(self._TIMING_WINDOW_SIZE)
+        self._connectStartTime = None
+        self._connectToReadyMS = None
+        self._commandSequence = itertools.count()
+        # Time from a command being queued to it starting, keyed by priority
+        self._queueWaitTimings = {
+            p.value: MovingAverage(self._TIMING_WINDOW_SIZE) for p in COMMAND_PRIORITY
+        }
 
         self._motorsNotificationWatchers = queue.Queue()
+        # Replaced rather than mutated so the comms thread can iterate without a lock
+        self._sensorFrameListeners = ()
+        self._safetyGuard: SafetyGuard = None
+        # Futures of running timelines - timelines also stop with the rover
+        # while other background tasks only stop with the thread
+        self._timelineFutures = set()
+        self._bleThroughputMode = False
+        self._actuatorShadow = ActuatorShadow()
+        # Set by disconnect so the transport reporting DISCONNECTED isn't treated as a lost link
+        self._expectingDisconnect = False
+        self._linkLostCallback = None
 
         self._connection: RobotTransportBase = None
         self._connectionStatus = CONNECTION_STATUS.NOT_CONNECTED
 
     def _connectionStatusCallback(self, newStatus):
+        previousStatus = self._connectionStatus
         self._connectionStatus = newStatus
+        if newStatus == CONNECTION_STATUS.CONNECTED:
+            self._expectingDisconnect = False
+        elif (
+            newStatus == CONNECTION_STATUS.DISCONNECTED
+            and previousStatus == CONNECTION_STATUS.CONNECTED
+            and not self._expectingDisconnect
+            and self._linkLostCallback
+        ):
+            self._linkLostCallback("Connection reported disconnected")
+
+    def setLinkLostCallback(self, callback):
+        self._linkLostCallback = callback
+
+    def getActuatorRestoreWrites(self):
+        return self._actuatorShadow.getRestoreWrites()
+
+    def clearActuatorShadow(self):
+        self._actuatorShadow.clear()
+
+    def getSensorSpamInterval(self):
+        return self._currentRequestedUpdateInterval
 
     def _processIncomingPacket(self, packet):
-        self.queueEvent(self._uart.processIncomingPacket, packet)
+        if threading.get_ident() != self.ident:
+            self.queueEvent(self._uart.processIncomingPacket, packet)
+            return
+        # Already on the communication loop (eg. BLE notifications) so skip the event queue
+        try:
+            self._uart.processIncomingPacket(packet)
+        except Exception as e:
+            logger.error("Failed to process packet")
+            logger.error(e)
 
     def _buttonPressCallback(self, buttonCode):
         logger.info("Button pressed - code: " + str(buttonCode))
@@ -71,6 +156,106 @@ class RobotCommunicatorThread(threading.Thread):
                 return
             temp.set()
 
+    def _sensorFrameCallback(self, data):
+        self._readCache.updateAllSensors(data)
+        timestamp = time.time()
+        self._lastSensorFrameTime = timestamp
+        for listener in self._sensorFrameListeners:
+            try:
+                listener(data, timestamp)
+            except Exception as e:
+                logger.error("Sensor frame listener failed")
+                logger.error(e)
+
+    def addSensorFrameListener(self, callback):
+        self._sensorFrameListeners = self._sensorFrameListeners + (callback,)
+
+    def removeSensorFrameListener(self, callback):
+        self._sensorFrameListeners = tuple(
+            x for x in self._sensorFrameListeners if x != callback
+        )
+
+    def waitForSensorFrame(self, decode, predicate, timeout=None, onStalled=None):
+        matched = []
+        matchedEvent = threading.Event()
+
+        def checkFrame(data, timestamp):
+            if matchedEvent.is_set():
+                return
+            try:
+                value = decode(data)
+                if not predicate(value):
+                    return
+                matched.append(value)
+            except Exception as e:
+                matched.append(e)
+            matchedEvent.set()
+
+        deadline = None if timeout is None else time.time() + timeout
+        self.addSensorFrameListener(checkFrame)
+        try:
+            while True:
+                wait = FRAME_CHECK_INTERVAL
+                if deadline is not None:
+                    wait = min(wait, deadline - time.time())
+                if wait > 0 and matchedEvent.wait(wait):
+                    break
+                if deadline is not None and time.time() >= deadline:
+                    raise TimeoutError("Sensor condition not met before timeout")
+                # Frames may stop without the flag changing eg. spam stopped elsewhere
+                if onStalled and not self.isReceivingSensorFrames():
+                    onStalled()
+        finally:
+            self.removeSensorFrameListener(checkFrame)
+        if isinstance(matched[0], Exception):
+            raise matched[0]
+        return matched[0]
+
+    def enableSafetyGuard(self, ultrasonicBelow=None, irBelow=None, stopWhenFlipped=False):
+        self.disableSafetyGuard()
+        self._safetyGuard = SafetyGuard(
+            self._writeGuardStopPacket, ultrasonicBelow, irBelow, stopWhenFlipped
+        )
+        self.addSensorFrameListener(self._safetyGuard.recordFrame)
+
+    def disableSafetyGuard(self):
+        if self._safetyGuard:
+            self.removeSensorFrameListener(self._safetyGuard.recordFrame)
+        self._safetyGuard = None
+
+    def isSafetyGuardEnabled(self):
+        return self._safetyGuard is not None
+
+    def getSafetyGuardStats(self):
+        if not self._safetyGuard:
+            return None
+        return self._safetyGuard.getStats()
+
+    def _writeGuardStopPacket(self, packet):
+        # Runs on the comms thread - sent as an emergency stop so it jumps the queue
+        # and the uart controller expects its ack instead of matching it to another write
+        # Noted before sending like other stops (see writePacket)
+        self._actuatorShadow.noteWrite(packet[1], packet[3:])
+        if self._connection and self.isConnected():
+            self._enqueueCommand(
+                (
+                    COMMAND_PRIORITY.EMERGENCY_STOP.value,
+                    next(self._commandSequence),
+                    time.perf_counter(),
+                    None,
+                    0,
+                    self._uart.doUartTransaction,
+                    (packet[0], packet[1], packet[3:]),
+                )
+            )
+        # Anything waiting on a motor operation would otherwise wait for the full timeout
+        self._motorNotificationCallback()
+
+    def _noteMotorCommand(self, opType, data):
+        # Before sending so the guard can stop a move that is already under way
+        if self._safetyGuard and opType in _MOTION_TYPES:
+            self._safetyGuard.noteMotorCommand(data)
+
     def _batteryPercentageCallback(self, percentage):
         logger.info("Battery percentage update: " + str(percentage) + "%")
 
@@ -102,30 +287,53 @@ class RobotCommunicatorThread(threading.Thread):
     def connectBLE(self, botID):
         self.disconnect()
         self._connection = RobotTransportBLE(
-            self._processIncomingPacket, self._connectionStatusCallback
+            self._processIncomingPacket, self._connectionStatusCallback, self._loop
         )
+        self._connection.setThroughputMode(self._bleThroughputMode)
         self._transactionTimings = MovingAverage(self._TIMING_WINDOW_SIZE)
         self._uart.transport = self._connection
         return self._connection.connect(botID)
 
+    def setBleThroughputMode(self, enabled):
+        self._bleThroughputMode = enabled
+        if self.isInBluetoothMode():
+            self._connection.setThroughputMode(enabled)
+
     def disconnect(self):
+        self._expectingDisconnect = True
         if self._connection:
             self._connection.disconnect()
+        self._sensorSpamActive = False
         self.resetCommunications()
 
     def stop(self):
         self.disconnect()
         if self._connection:
             self._connection.stop()
-        command1 = ThreadCommand(None)
-        command1.setAsStopCommand()
-        self._loop.call_soon_threadsafe(self._commandQueue.put_nowait, command1)
-        command2 = ThreadCommand(None)
-        command2.setAsStopCommand()
-        self._loop.call_soon_threadsafe(self._eventQueue.put_nowait, command2)
-
-        command1.waitForResult()
-        command2.waitForResult()
+        # A command with no function stops the executor reading that queue
+        executorSlots = []
+        for commandQueue in (self._commandQueue, self._stopQueue):
+            slot = CompletionSlot()
+            self._loop.call_soon_threadsafe(
+                commandQueue.put_nowait,
+                (
+                    _STOP_EXECUTOR_PRIORITY,
+                    next(self._commandSequence),
+                    time.perf_counter(),
+                    slot,
+                    slot.prepare(),
+                    None,
+                    (),
+                ),
+            )
+            executorSlots.append(slot)
+        eventSlot = CompletionSlot()
+        self._loop.call_soon_threadsafe(
+            self._eventQueue.put_nowait, (eventSlot, eventSlot.prepare(), None, ())
+        )
+        for slot in executorSlots:
+            slot.wait()
+        eventSlot.wait()
 
     def clearMotorNotificationWatchers(self):
         self._motorNotificationCallback()
@@ -139,22 +347,59 @@ class RobotCommunicatorThread(threading.Thread):
         averageWriteTime = self._connection.getAverageWriteTimeMS()
         recommendedSpamInterval = self._calcNewSpamInterval()
         averageTransactionTime = self._transactionTimings.getAverage()
-        return (averageWriteTime, recommendedSpamInterval, averageTransactionTime)
+        return (
+            averageWriteTime,
+            recommendedSpamInterval,
+            averageTransactionTime,
+            self._connectToReadyMS,
+        )
+
+    def noteConnectStarted(self):
+        self._connectStartTime = time.time()
+        self._connectToReadyMS = None
+
+    def noteConnectReady(self):
+        # Returns the ms from starting to connect or None if no connection was started
+        if self._connectStartTime is None:
+            return None
+        self._connectToReadyMS = (time.time() - self._connectStartTime) * 1000.0
+        self._connectStartTime = None
+        return self._connectToReadyMS
 
-    def startSensorSpam(self, intervalOverride=None):
+    def getConnectToReadyMS(self):
+        return self._connectToReadyMS
+
+    def getQueueWaitStatsMS(self):
+        return {
+            p.name: self._queueWaitTimings[p.value].getAverage() for p in COMMAND_PRIORITY
+        }
+
+    def startSensorSpam(self, intervalOverride=None, extraWrites=None, timeout=None):
         requestedInterval = self._calcNewSpamInterval()
         if intervalOverride:
             requestedInterval = intervalOverride
         self._currentRequestedUpdateInterval = requestedInterval
         # Read directly if more than 1.5 spam intervals old
         self._readCache.setUseByInterval(requestedInterval * 1.8)
-        self.writeAttribute(
-            OPTYPE.SPAM_RATE.value,
-            intArrayToBytes([requestedInterval], 2, signed=False),
+        writes = [
+            (
+                OPTYPE.SPAM_RATE.value,
+                intArrayToBytes([requestedInterval], 2, signed=False),
+            ),
+            (OPTYPE.SPAM_MODE.value, [1]),
+        ]
+        if extraWrites:
+            writes += extraWrites
+        # Sent back to back rather than waiting for each ack in turn
+        results = self.doBatchTransaction(
+            [(OPCODE.WRITE.value, opType, data) for opType, data in writes], timeout
         )
-        self.writeAttribute(OPTYPE.SPAM_MODE.value, [1])
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
         logger.debug("Sensor spam activated")
         logger.debug("Requested interval: " + str(requestedInterval))
+        self._sensorSpamStartTime = time.time()
         self._sensorSpamActive = True
 
     def _calcNewSpamInterval(self):
@@ -172,23 +417,47 @@ class RobotCommunicatorThread(threading.Thread):
             return MIN_SPAM_INTERVAL_MS
         return round(calculatedInterval)
 
-    def stopSensorSpam(self):
-        self.writeAttribute(OPTYPE.SPAM_MODE.value, [0])
+    def stopSensorSpam(self, waitForAck=True, timeout=None, priority=None):
+        # Cleared first so it is off even if the write fails
         self._sensorSpamActive = False
+        self.writePacket(
+            OPCODE.WRITE.value, OPTYPE.SPAM_MODE.value, [0], waitForAck, timeout, priority
+        )
+
+    def isSensorSpamActive(self):
+        return self._sensorSpamActive
+
+    def isReceivingSensorFrames(self):
+        if not self._sensorSpamActive:
+            return False
+        interval = (self._currentRequestedUpdateInterval or DEFAULT_SPAM_INTERVAL_MS) / 1000.0
+        lastHeard = max(self._lastSensorFrameTime, self._sensorSpamStartTime)
+        gap = max(SENSOR_FRAME_GAP, interval * SENSOR_FRAME_GAP_INTERVALS)
+        return time.time() - lastHeard < gap
 
     def writeAttribute(self, opType, data, timeout=None):
         if not self.isConnected():
             raise Exception("No robot connected")
         if isinstance(opType, Enum):
             opType = opType.value
+        self._noteMotorCommand(opType, data)
         startTime = time.time()
-        result = self.queueCommand(
-            self._uart.doUartTransaction, OPCODE.WRITE.value, opType, data, timeout
-        ).waitForResult(timeout)
+        result = self.runCommand(
+            timeout,
+            self._uart.doUartTransaction,
+            OPCODE.WRITE.value,
+            opType,
+            data,
+            timeout,
+            priority=_commandPriority(OPCODE.WRITE.value, opType, data),
+        )
         self._transactionTimings.recordValue((time.time() - startTime) * 1000.0)
+        self._actuatorShadow.noteWrite(opType, data)
         return result
 
-    def writePacket(self, opCode, opType, data=None, waitForAck=True, timeout=None):
+    def writePacket(
+        self, opCode, opType, data=None, waitForAck=True, timeout=None, priority=None
+    ):
         if not self.isConnected():
             raise Exception("No robot connected")
         if data is None:
@@ -197,17 +466,40 @@ class RobotCommunicatorThread(threading.Thread):
             opCode = opCode.value
         if isinstance(opType, Enum):
             opType = opType.value
+        if isinstance(priority, Enum):
+            priority = priority.value
+        if priority is None:
+            priority = _commandPriority(opCode, opType, data)
+        isWrite = opCode == OPCODE.WRITE.value
+        if isWrite:
+            self._noteMotorCommand(opType, data)
+        # Only written writes are restored after a reconnect - except stops,
+        # since restoring the state from before a stop that failed would start the robot again
+        noteFirst = isWrite and priority == COMMAND_PRIORITY.EMERGENCY_STOP.value
+        if noteFirst:
+            self._actuatorShadow.noteWrite(opType, data)
         if waitForAck:
             startTime = time.time()
-            result = self.queueCommand(
-                self._uart.doUartTransaction, opCode, opType, data, timeout
-            ).waitForResult(timeout)
+            result = self.runCommand(
+                timeout,
+                self._uart.doUartTransaction,
+                opCode,
+                opType,
+                data,
+                timeout,
+                priority=priority,
+            )
             self._transactionTimings.recordValue((time.time() - startTime) * 1000.0)
-            return result
         else:
-            return self.queueCommand(
-                self._connection.writePacketTimed, [opCode, opType, len(data)] + data
-            ).waitForResult(timeout)
+            result = self.runCommand(
+                timeout,
+                self._connection.writePacketTimed,
+                [opCode, opType, len(data)] + data,
+                priority=priority,
+            )
+        if isWrite and not noteFirst:
+            self._actuatorShadow.noteWrite(opType, data)
+        return result
 
     def readAttribute(self, opType, data=None, timeout=None):
         if not self.isConnected():
@@ -220,12 +512,113 @@ class RobotCommunicatorThread(threading.Thread):
         if cachedResult:
             return cachedResult
         startTime = time.time()
-        result = self.queueCommand(
-            self._uart.doUartTransaction, OPCODE.READ.value, opType, data, timeout
-        ).waitForResult(timeout)
+        result = self.runCommand(
+            timeout,
+            self._uart.doUartTransaction,
+            OPCODE.READ.value,
+            opType,
+            data,
+            timeout,
+            priority=_commandPriority(OPCODE.READ.value, opType, data),
+        )
+        self._transactionTimings.recordValue((time.time() - startTime) * 1000.0)
+        return result
+
+    def doBatchTransaction(self, transactions, timeout=None):
+        if not self.isConnected():
+            raise Exception("No robot connected")
+        transactions = [
+            (
+                opCode.value if isinstance(opCode, Enum) else opCode,
+                opType.value if isinstance(opType, Enum) else opType,
+                [] if data is None else data,
+            )
+            for opCode, opType, data in transactions
+        ]
+        for opCode, opType, data in transactions:
+            if opCode == OPCODE.WRITE.value:
+                self._noteMotorCommand(opType, data)
+        startTime = time.time()
+        # A batch is as urgent as its most urgent transaction
+        priority = min(
+            (_commandPriority(*t) for t in transactions),
+            default=COMMAND_PRIORITY.ACTUATOR.value,
+        )
+        results = self.runCommand(
+            timeout, self._batchTransaction, transactions, timeout, priority=priority
+        )
+        if transactions:
+            self._transactionTimings.recordValue(
+                (time.time() - startTime) * 1000.0 / len(transactions)
+            )
+        for (opCode, opType, data), result in zip(transactions, results):
+            if opCode == OPCODE.WRITE.value and not isinstance(result, Exception):
+                self._actuatorShadow.noteWrite(opType, data)
+        return results
+
+    async def _batchTransaction(self, transactions, timeout):
+        # Every packet is written before awaiting any response
+        # Responses of the same type are matched in order by the uart controller
+        if timeout is None:
+            timeout = 3.0
+        return await asyncio.gather(
+            *[
+                self._uart.doUartTransaction(opCode, opType, data, timeout)
+                for opCode, opType, data in transactions
+            ],
+            return_exceptions=True,
+        )
+
+    def runTimeline(self, events, dropLate=True, cancelWrite=None):
+        if not self.isConnected():
+            raise Exception("No robot connected")
+        future = self.runBackgroundTask(
+            lambda transact: playTimeline(
+                lambda opType, data: transact(OPCODE.WRITE.value, opType, data),
+                events,
+                dropLate,
+                cancelWrite,
+            )
+        )
+        # Tracked before returning so a timeline that hasn't started yet is still cancelled
+        self._timelineFutures.add(future)
+        future.add_done_callback(self._timelineFutures.discard)
+        return future
+
+    def cancelTimelines(self):
+        for future in list(self._timelineFutures):
+            future.cancel()
+
+    def runBackgroundTask(self, taskFunction):
+        async def runTask():
+            return await taskFunction(self._backgroundTransaction)
+
+        # Tasks still running when the thread stops are cancelled with the loop's other tasks
+        return asyncio.run_coroutine_threadsafe(runTask(), self._loop)
+
+    async def _backgroundTransaction(self, opCode, opType, data=None, timeout=3.0):
+        if not self.isConnected():
+            raise Exception("No robot connected")
+        if data is None:
+            data = []
+        if isinstance(opCode, Enum):
+            opCode = opCode.value
+        if isinstance(opType, Enum):
+            opType = opType.value
+        if opCode == OPCODE.WRITE.value:
+            self._noteMotorCommand(opType, data)
+        startTime = time.time()
+        result = await self._uart.doUartTransaction(opCode, opType, data, timeout)
         self._transactionTimings.recordValue((time.time() - startTime) * 1000.0)
+        if opCode == OPCODE.WRITE.value:
+            self._actuatorShadow.noteWrite(opType, data)
         return result
 
+    def readCachedAttribute(self, opType):
+        if isinstance(opType, Enum):
+            opType = opType.value
+        return self._readCache.readCache(opType)
+
     def isInBluetoothMode(self):
         return type(self._connection) == RobotTransportBLE
 
@@ -235,15 +628,82 @@ class RobotCommunicatorThread(threading.Thread):
     def isInSerialMode(self):
         return type(self._connection) == RobotTransportSerial
 
-    def queueCommand(self, f, *args, **kwargs):
-        command = ThreadCommand(f, *args, **kwargs)
-        self._loop.call_soon_threadsafe(self._commandQueue.put_nowait, command)
-        return command
-
-    def queueEvent(self, f, *args, **kwargs):
-        command = ThreadCommand(f, *args, **kwargs)
-        self._loop.call_soon_threadsafe(self._eventQueue.put_nowait, command)
-        return command
+    def runCommand(
+        self, timeout, f, *args, priority=COMMAND_PRIORITY.SENSOR_READ.value
+    ):
+        """
+        Runs f(*args) on the communication thread and blocks for its result
+        Commands run in priority order then in the order they were queued
+        If f returns a coroutine it is awaited on the communication loop
+
+        Raises:
+          TimeoutError if there is no result within timeout seconds
+          Any exception raised by f
+          Exception if the command was cancelled by a stop command
+        """
+        slot = getattr(self._threadSlots, "slot", None)
+        if slot is None:
+            slot = self._threadSlots.slot = CompletionSlot()
+        command = (
+            priority,
+            next(self._commandSequence),
+            time.perf_counter(),
+            slot,
+            slot.prepare(),
+            f,
+            args,
+        )
+        self._loop.call_soon_threadsafe(self._enqueueCommand, command)
+        return slot.wait(timeout)
+
+    def _enqueueCommand(self, command):
+        # Runs on the communication loop
+        if command[0] != COMMAND_PRIORITY.EMERGENCY_STOP.value:
+            self._commandQueue.put_nowait(command)
+            return
+        # Queued moves would only undo the stop - other actuator writes still run
+        self._cancelQueuedCommands(
+            self._commandQueue, (COMMAND_PRIORITY.MOTION.value,), "Cancelled by stop command"
+        )
+        # Stops have their own executor so they are sent while the command in progress
+        # waits for its response rather than after it. Responses are matched by type
+        # so the two transactions can overlap.
+        self._stopQueue.put_nowait(command)
+
+    def _cancelQueuedCommands(self, commandQueue, priorities, reason):
+        kept = []
+        while not commandQueue.empty():
+            command = commandQueue.get_nowait()
+            if priorities is None or command[0] in priorities:
+                if command[3]:
+                    command[3].complete(command[4], Exception(reason))
+            else:
+                kept.append(command)
+        for command in kept:
+            commandQueue.put_nowait(command)
+
+    async def _executeCommand(self, command):
+        priority, sequence, queuedTime, slot, generation, f, args = command
+        self._queueWaitTimings[priority].recordValue(
+            (time.perf_counter() - queuedTime) * 1000.0
+        )
+        try:
+            result = f(*args)
+            # Everything run here returns a plain value or a coroutine
+            if asyncio.iscoroutine(result):
+                result = await result
+        except Exception as e:
+            result = e
+        if slot:
+            slot.complete(generation, result)
+        elif isinstance(result, Exception):
+            # Nothing is waiting for the result eg. a safety guard stop
+            logger.error("Command failed")
+            logger.error(result)
+
+    def queueEvent(self, f, *args):
+        # Nothing waits for events so they have no completion slot
+        self._loop.call_soon_threadsafe(self._eventQueue.put_nowait, (None, 0, f, args))
 
     def resetCommunications(self):
         self._readCache.invalidateCache()
@@ -251,28 +711,22 @@ class RobotCommunicatorThread(threading.Thread):
             self._loop.call_soon_threadsafe(self._unsafeReset)
 
     def _unsafeReset(self):
-        def emptyThreadCommandQueue(q):
-            while not q.empty():
-                command: ThreadCommand = q.get_nowait()
-                command.result = Exception("Cancelled")
-                command.completeEvent.set()
-                q.task_done()
-
-        emptyThreadCommandQueue(self._commandQueue)
-        emptyThreadCommandQueue(self._eventQueue)
+        self._cancelQueuedCommands(self._commandQueue, None, "Cancelled")
+        self._cancelQueuedCommands(self._stopQueue, None, "Cancelled")
+        while not self._eventQueue.empty():
+            self._eventQueue.get_nowait()
         self._uart.clearResponseQueues()
 
     def run(self) -> None:
         self._loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self._loop)
-        self._commandQueue = asyncio.Queue()
+        self._commandQueue = asyncio.PriorityQueue()
+        self._stopQueue = asyncio.Queue()
         self._eventQueue = asyncio.Queue()
         self._uart = UartController(self._connection)
         self._uart.clearResponseQueues()
 
-        self._uart.subscribeToSensor(
-            OPTYPE.ALL_SENSORS.value, self._readCache.updateAllSensors
-        )
+        self._uart.subscribeToSensor(OPTYPE.ALL_SENSORS.value, self._sensorFrameCallback)
         self._uart.subscribeToSensor(
             OPTYPE.MOTOR_SET.value, lambda data: self._motorNotificationCallback(data)
         )
@@ -291,21 +745,42 @@ class RobotCommunicatorThread(threading.Thread):
 
         self._threadReady.set()
 
-        async def commandExecuter(q: asyncio.Queue):
+        async def commandExecuter(commandQueue):
             while True:
-                command: ThreadCommand = await q.get()
-                if command.isStopCommand:
-                    command.result = True
-                    command.completeEvent.set()
+                command = await commandQueue.get()
+                if command[5] is None:
+                    command[3].complete(command[4], True)
                     return
-                await command.execute()
-                q.task_done()
+                await self._executeCommand(command)
+
+        async def eventExecuter():
+            while True:
+                slot, generation, f, args = await self._eventQueue.get()
+                if f is None:
+                    slot.complete(generation, True)
+                    return
+                try:
+                    f(*args)
+                except Exception as e:
+                    logger.error("Failed to process event")
+                    logger.error(e)
 
         self._loop.run_until_complete(
             asyncio.gather(
-                commandExecuter(self._commandQueue), commandExecuter(self._eventQueue)
+                commandExecuter(self._commandQueue),
+                commandExecuter(self._stopQueue),
+                eventExecuter(),
             )
         )
+        # Includes background tasks that were scheduled but had not started running
+        # Each one is left to unwind so the future returned for it is resolved
+        remainingTasks = asyncio.all_tasks(self._loop)
+        for task in remainingTasks:
+            task.cancel()
+        if remainingTasks:
+            self._loop.run_until_complete(
+                asyncio.gather(*remainingTasks, return_exceptions=True)
+            )
         if self._connection:
             self._connection.disconnect()
         self._connection = None
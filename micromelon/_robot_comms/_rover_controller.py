@@ -2,13 +2,16 @@ import logging
 import signal
 import sys
 import os
+import threading
 from .._singleton import Singleton
 from ._comms_constants import (
     MicromelonOpCode as OPCODE,
     MicromelonType as OPTYPE,
+    COMMAND_PRIORITY,
     RUNNING_STATES,
 )
 from ._robot_communicator_threaded import RobotCommunicatorThread
+from ._link_supervisor import LinkSupervisor
 from .._binary import bytesToIntArray
 from .._mm_logging import getLogger
 
@@ -30,13 +33,38 @@ class RoverController(metaclass=Singleton):
     """
 
     def __init__(self, defaultTimeout=3.0) -> None:
-        signal.signal(signal.SIGINT, _sigint_handler)
         self._roverSimInfo = 0
         self._roverCharge = None
         self._roverErrorMask = None
         self._defaultCommunicationTimeout = defaultTimeout
+        self._postConnectionCallbacks = []
+        self._robotInfo = None
+        # Facts that don't change for a robot keyed by connection address
+        self._robotInfoCache = {}
+        self._connectionKey = None
+        # (connect method, arguments) of the last connection for reconnecting
+        self._lastConnection = None
+        self._reconnecting = False
+        # Held while connecting or disconnecting so auto reconnect can't interleave with a user call
+        self._connectionLock = threading.RLock()
+        # Changed by each connect or disconnect you ask for - auto reconnect abandons an older session
+        self._session = 0
+        self._roverRunning = False
+        self._linkSupervisor: LinkSupervisor = None
+        # The thread is started on first use so importing the library stays fast
         self._robotCommunicator = RobotCommunicatorThread()
-        self._robotCommunicator.start()
+        self._startLock = threading.Lock()
+
+    def _startCommunicator(self) -> None:
+        """
+        Starts the communication thread and installs the SIGINT handler if not already done
+        """
+        with self._startLock:
+            if self._robotCommunicator.ident is not None:
+                return
+            if threading.current_thread() is threading.main_thread():
+                signal.signal(signal.SIGINT, _sigint_handler)
+            self._robotCommunicator.start()
 
     def setDefaultCommunicationTimeout(self, newDefaultTimeout: float) -> None:
         """
@@ -56,6 +84,14 @@ class RoverController(metaclass=Singleton):
     def isConnected(self) -> bool:
         return self._robotCommunicator.isConnected()
 
+    def isInSerialMode(self) -> bool:
+        """
+        Returns:
+          True if the connection is over serial UART. The expansion header is then used by the
+          UART so I2C is not available
+        """
+        return self._robotCommunicator.isInSerialMode()
+
     def connectedRobotIsSimulated(self) -> bool:
         return self.isConnected() and self._roverSimInfo != 0
 
@@ -75,18 +111,177 @@ class RoverController(metaclass=Singleton):
         Returns:
           None
         """
+        # Written in one batch so starting costs a single round trip
+        extraWrites = []
+        if not self._robotCommunicator.isInSerialMode():
+            extraWrites.append((OPTYPE.BUTTON_PRESS, [RUNNING_STATES.RUNNING.value]))
         if (
             self._robotCommunicator.isInBluetoothMode()
             and overrideSensorSpamMode is None
         ) or overrideSensorSpamMode:
-            self._robotCommunicator.startSensorSpam()
-        if not self._robotCommunicator.isInSerialMode():
-            self.writeAttribute(OPTYPE.BUTTON_PRESS, [RUNNING_STATES.RUNNING.value])
+            self._robotCommunicator.startSensorSpam(
+                extraWrites=extraWrites, timeout=self._defaultCommunicationTimeout
+            )
+        elif extraWrites:
+            self.writeAttribute(*extraWrites[0])
+        if extraWrites:
+            self._roverRunning = True
+
+    def startSensorSpam(self, intervalOverride: int = None) -> None:
+        """
+        Asks the robot to continuously send all of its sensor readings.
+        Sensor reads are then served from the latest readings without a round trip
+        and sensor frame listeners are called for every set of readings.
+
+        Args:
+          intervalOverride (int): milliseconds between readings.
+            Defaults to None - the interval is calculated from the connection speed
+
+        Raises:
+          TimeoutError on timeout.
+          Exception on comms failure.
+
+        Returns:
+          None
+        """
+        self._robotCommunicator.startSensorSpam(
+            intervalOverride, timeout=self._defaultCommunicationTimeout
+        )
+
+    def stopSensorSpam(self) -> None:
+        """
+        Stops the robot continuously sending its sensor readings.
+
+        Returns:
+          None
+        """
+        self._robotCommunicator.stopSensorSpam()
+
+    def isSensorSpamActive(self) -> bool:
+        return self._robotCommunicator.isSensorSpamActive()
+
+    def getSensorSpamIntervalMS(self):
+        """
+        Returns:
+          The interval in ms sensor spam was last requested at or None if it has never been started
+        """
+        return self._robotCommunicator.getSensorSpamInterval()
+
+    def ensureSensorFrames(self) -> None:
+        """
+        Starts sensor spam if it is off or if the robot has stopped sending sensor packets.
+
+        Raises:
+          TimeoutError on timeout.
+          Exception on comms failure.
+
+        Returns:
+          None
+        """
+        if not self._robotCommunicator.isReceivingSensorFrames():
+            self.startSensorSpam()
+
+    def addSensorFrameListener(self, callback) -> None:
+        """
+        Registers a function to be called with every set of sensor readings
+        received while sensor spam is active.
+        The callback runs on the communication thread so it must be quick and must not
+        make blocking calls to the robot.
+
+        Args:
+          callback (function): called as callback(data, timestamp) where data is the
+            list of bytes of the ALL_SENSORS packet and timestamp is from time.time()
+
+        Returns:
+          None
+        """
+        self._robotCommunicator.addSensorFrameListener(callback)
+
+    def removeSensorFrameListener(self, callback) -> None:
+        """
+        Stops calling a function registered with addSensorFrameListener.
+
+        Args:
+          callback (function): the registered function
+
+        Returns:
+          None
+        """
+        self._robotCommunicator.removeSensorFrameListener(callback)
+
+    def waitForSensorFrame(self, decode, predicate, timeout=None):
+        """
+        Blocks until a sensor spam packet satisfies a condition.
+        The condition is checked on the communication thread as each packet arrives
+        so the caller wakes up on the first matching packet without polling.
+        Sensor spam will be started if it is not already active, or restarted if
+        packets stop arriving while waiting.
+
+        Args:
+          decode (function): converts the ALL_SENSORS packet bytes into the value to check
+          predicate (function): called with the decoded value and returns True on a match
+          timeout (number): seconds to wait. Defaults to None (wait forever)
+
+        Raises:
+          TimeoutError on timeout.
+          Any exception raised by decode or predicate.
+
+        Returns:
+          The decoded value that matched.
+        """
+        self.ensureSensorFrames()
+        return self._robotCommunicator.waitForSensorFrame(
+            decode, predicate, timeout, self.ensureSensorFrames
+        )
+
+    def enableSafetyGuard(
+        self, ultrasonicBelow: float = None, irBelow: float = None, stopWhenFlipped: bool = False
+    ) -> None:
+        """
+        Stops the motors on the first sensor reading that meets any of the given conditions.
+        Readings are checked on the communication thread as they arrive and the stop packet
+        is sent immediately, ahead of any queued commands, so the robot stops even if
+        your program is busy.
+        The guard only triggers while the motors were last set to move.
+        Sensor spam will be started if it is not already active, or on connecting
+        if the guard is enabled before a robot is connected.
+        Replaces any previously enabled guard.
+
+        Args:
+          ultrasonicBelow (number): stop if the ultrasonic distance is below this many cm
+          irBelow (number): stop if either IR distance is below this many cm
+          stopWhenFlipped (bool): stop if the robot is upside down
+
+        Returns:
+          None
+        """
+        self._robotCommunicator.enableSafetyGuard(ultrasonicBelow, irBelow, stopWhenFlipped)
+        if self.isConnected():
+            self.ensureSensorFrames()
+
+    def disableSafetyGuard(self) -> None:
+        self._robotCommunicator.disableSafetyGuard()
+
+    def getSafetyGuardStats(self):
+        """
+        Returns:
+          None if no safety guard is enabled, otherwise a dictionary with keys
+            triggerCount - number of times the guard has stopped the motors
+            lastReason - description of the reading that last triggered it
+            lastLatencyMS - ms of processing on this computer from receiving the triggering
+              reading to queuing the stop packet. Transport and robot delays are not included
+            averageLatencyMS - moving average of lastLatencyMS
+        """
+        return self._robotCommunicator.getSafetyGuardStats()
 
     def _postConnectionSetup(self) -> None:
         """
-        Check whether the connected robot is simulated
+        Check whether the connected robot is simulated and read its versions and ID
         Read battery percentage and sensor error mask
+        All reads are sent in one batch and the static facts are cached
+        for the connection address so reconnecting skips them
+        The ID is read every time and the cache is only used if it was read and matches,
+        in case a different robot is now on the same port or address
 
         Returns:
           None
@@ -94,20 +289,38 @@ class RoverController(metaclass=Singleton):
         self._roverSimInfo = None
         self._roverCharge = None
         self._roverErrorMask = None
-        try:
-            self._roverSimInfo = self.readAttribute(OPTYPE.SIMULATOR_INFO)[0]
-            logger.debug("Rover siminfo: " + str(self._roverSimInfo))
-        except Exception as e:
-            # couldn't read simulator info - assume not simulated
-            logger.info("Rover siminfo read failed")
-            logger.info(e)
-            self._roverSimInfo = 0
+        cachedInfo = self._robotInfoCache.get(self._connectionKey)
+        staticReads = [OPTYPE.SIMULATOR_INFO, OPTYPE.HW_VERSION, OPTYPE.FW_VERSION]
+
+        reads = [OPTYPE.STATE_OF_CHARGE, OPTYPE.SENSOR_ERRORS, OPTYPE.BOTID]
+        if not cachedInfo:
+            reads += staticReads
+        results = self._readBatch(reads)
+
+        self._robotInfo = None
+        botID = self._parseBotID(results[OPTYPE.BOTID])
+        if cachedInfo and botID is not None and cachedInfo["botID"] == botID:
+            self._robotInfo = cachedInfo
+        elif cachedInfo:
+            logger.debug("Could not confirm it is the same robot - reading its info again")
+            results.update(self._readBatch(staticReads))
+        if not self._robotInfo:
+            self._robotInfo = self._parseRobotInfo(results)
+            # Only complete info is cached - a failed read would otherwise be remembered
+            infoReads = staticReads + [OPTYPE.BOTID]
+            if not any(isinstance(results[t], Exception) for t in infoReads):
+                self._robotInfoCache[self._connectionKey] = self._robotInfo
+        self._roverSimInfo = self._robotInfo["simulatorInfo"]
+        logger.debug("Rover siminfo: " + str(self._roverSimInfo))
 
         try:
-            self._roverCharge = self.readAttribute(OPTYPE.STATE_OF_CHARGE)[0]
+            for result in (results[OPTYPE.STATE_OF_CHARGE], results[OPTYPE.SENSOR_ERRORS]):
+                if isinstance(result, Exception):
+                    raise result
+            self._roverCharge = results[OPTYPE.STATE_OF_CHARGE][0]
             logger.info("Rover battery at " + str(self._roverCharge) + "%")
             self._roverErrorMask = bytesToIntArray(
-                self.readAttribute(OPTYPE.SENSOR_ERRORS), 2, False
+                results[OPTYPE.SENSOR_ERRORS], 2, False
             )[0]
             if self._roverErrorMask == 0:
                 logger.info("No sensor errors detected")
@@ -118,6 +331,108 @@ class RoverController(metaclass=Singleton):
             logger.error("Failed to read battery and error mask")
             logger.error(e)
 
+        if self._robotCommunicator.isSafetyGuardEnabled():
+            # The guard only sees readings while sensor spam is running
+            try:
+                self.ensureSensorFrames()
+            except Exception as e:
+                logger.error("Failed to start sensor spam for the safety guard")
+                logger.error(e)
+
+        for callback in self._postConnectionCallbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error("Post connection callback failed")
+                logger.error(e)
+
+        connectToReadyMS = self._robotCommunicator.noteConnectReady()
+        if connectToReadyMS is not None:
+            logger.debug("Connected and ready in {:.0f}ms".format(connectToReadyMS))
+
+    def _readBatch(self, reads):
+        try:
+            results = self.doBatchTransaction([(OPCODE.READ, t, []) for t in reads])
+        except Exception as e:
+            results = [e] * len(reads)
+        return dict(zip(reads, results))
+
+    def _parseBotID(self, result):
+        if isinstance(result, Exception):
+            return None
+        return bytesToIntArray(result, 2, signed=False)[0]
+
+    def _parseRobotInfo(self, results):
+        simInfo = results[OPTYPE.SIMULATOR_INFO]
+        if isinstance(simInfo, Exception):
+            # couldn't read simulator info - assume not simulated
+            logger.info("Rover siminfo read failed")
+            logger.info(simInfo)
+            simInfo = 0
+        else:
+            simInfo = simInfo[0]
+        info = {"simulatorInfo": simInfo}
+        for key, opType in (
+            ("hardwareVersion", OPTYPE.HW_VERSION),
+            ("firmwareVersion", OPTYPE.FW_VERSION),
+            ("botID", OPTYPE.BOTID),
+        ):
+            result = results[opType]
+            if isinstance(result, Exception):
+                logger.debug("Could not read " + opType.name)
+                info[key] = None
+            elif opType == OPTYPE.BOTID:
+                info[key] = self._parseBotID(result)
+            else:
+                info[key] = list(result)
+        return info
+
+    def getRobotInfo(self):
+        """
+        Returns:
+          None if no robot has connected, otherwise a dictionary of facts read when connecting
+            simulatorInfo - non-zero if the robot is simulated
+            hardwareVersion - array of bytes or None if it couldn't be read
+            firmwareVersion - array of bytes or None if it couldn't be read
+            botID - the integer id of the robot or None if it couldn't be read
+        """
+        if self._robotInfo is None:
+            return None
+        return dict(self._robotInfo)
+
+    def getConnectToReadyMS(self):
+        """
+        Returns:
+          The time in ms the last connection took from starting to connect until the robot
+          was checked and ready to use, or None if no robot has connected
+        """
+        return self._robotCommunicator.getConnectToReadyMS()
+
+    def addPostConnectionCallback(self, callback) -> None:
+        """
+        Registers a function to be called after every successful connection
+        once the robot has been checked (see _postConnectionSetup).
+        It runs on the thread that called the connect method so it can communicate with the robot.
+
+        Args:
+          callback (function): called with no arguments
+
+        Returns:
+          None
+        """
+        self._postConnectionCallbacks.append(callback)
+
+    def _startConnecting(self, connectionKey, connectMethod, connectArgs) -> None:
+        self._startCommunicator()
+        self._robotCommunicator.noteConnectStarted()
+        self._connectionKey = connectionKey
+        if not self._reconnecting:
+            # A new session so nothing from the last one should be restored
+            self._session += 1
+            self._lastConnection = (connectMethod, connectArgs)
+            self._roverRunning = False
+            self._robotCommunicator.clearActuatorShadow()
+
     def connectSerial(self, port="/dev/ttyS0"):
         """
         Connects to the desired port and attempts to set the rover to UART mode
@@ -131,9 +446,11 @@ class RoverController(metaclass=Singleton):
         Returns:
           None
         """
-        self._robotCommunicator.connectSerial(port)
-        self.setRoverToUART(True)
-        self._postConnectionSetup()
+        with self._connectionLock:
+            self._startConnecting("serial:" + str(port), self.connectSerial, (port,))
+            self._robotCommunicator.connectSerial(port)
+            self.setRoverToUART(True)
+            self._postConnectionSetup()
 
     def connectIP(self, address="127.0.0.1", port=9000):
         """
@@ -148,8 +465,12 @@ class RoverController(metaclass=Singleton):
         Returns:
           None
         """
-        self._robotCommunicator.connectIP(address, port)
-        self._postConnectionSetup()
+        with self._connectionLock:
+            self._startConnecting(
+                "ip:{}:{}".format(address, port), self.connectIP, (address, port)
+            )
+            self._robotCommunicator.connectIP(address, port)
+            self._postConnectionSetup()
 
     def connectBLE(self, botID):
         """
@@ -161,11 +482,142 @@ class RoverController(metaclass=Singleton):
         Returns:
           None
         """
-        self._robotCommunicator.connectBLE(botID)
-        self._postConnectionSetup()
+        with self._connectionLock:
+            self._startConnecting("ble:" + str(botID), self.connectBLE, (botID,))
+            self._robotCommunicator.connectBLE(botID)
+            self._postConnectionSetup()
+
+    def setBleThroughputMode(self, enabled: bool) -> None:
+        """
+        Turns Bluetooth throughput mode on or off (off by default).
+        In throughput mode packets are written without waiting for a Bluetooth response
+        and several small packets are packed into each write, so many quick commands
+        (eg. animations or I2C block reads) get through much faster.
+        Writes are acknowledged once the Bluetooth write containing them is sent, so a packet
+        the robot drops or rejects is not reported.
+        Not every robot firmware is confirmed to accept several packets in one write,
+        so check your robot behaves as expected before relying on this mode.
+        Applies to the current Bluetooth connection and any later ones.
+
+        Args:
+          enabled (bool): True to use throughput mode
+
+        Returns:
+          None
+        """
+        self._robotCommunicator.setBleThroughputMode(enabled)
+
+    def enableAutoReconnect(self, notificationGap: float = 1.0) -> None:
+        """
+        Watches the connection and automatically reconnects if it is lost.
+        Loss is detected when the connection reports a disconnect you didn't ask for,
+        when sensor spam packets stop for notificationGap seconds (or 10 spam intervals if longer),
+        or when periodic heartbeat reads fail while sensor spam is off.
+        Reconnecting retries with increasing delays (up to 8 seconds) using the last connect
+        method, then restores UART mode (serial), sensor spam mode and rate, the running state,
+        and the last LED, servo, buzzer, and motor speed settings.
+        Moves with a distance or angle are not restarted.
+        Commands sent while the connection is down raise an Exception as usual.
+
+        Args:
+          notificationGap (number): seconds without sensor spam packets before the link is treated as lost
+
+        Returns:
+          None
+        """
+        self.disableAutoReconnect()
+        self._linkSupervisor = LinkSupervisor(self, notificationGap)
+        self._robotCommunicator.setLinkLostCallback(self._linkSupervisor.linkLost)
+        self.addSensorFrameListener(self._linkSupervisor.recordFrame)
+        self._linkSupervisor.start()
+
+    def disableAutoReconnect(self) -> None:
+        if not self._linkSupervisor:
+            return
+        self._robotCommunicator.setLinkLostCallback(None)
+        self.removeSensorFrameListener(self._linkSupervisor.recordFrame)
+        self._linkSupervisor.stop()
+        self._linkSupervisor = None
+
+    def getLinkStats(self):
+        """
+        Returns:
+          None if auto reconnect is not enabled, otherwise a dictionary with keys
+            reconnectCount - number of times the connection has been restored
+            lastOutageSeconds - how long the last loss of connection lasted
+            heartbeatAverageMS - moving average round trip of heartbeat reads
+            recovering - True while reconnecting
+        """
+        if not self._linkSupervisor:
+            return None
+        return self._linkSupervisor.getStats()
+
+    def _reconnect(self) -> None:
+        if not self._lastConnection:
+            raise Exception("No previous connection to restore")
+        connectMethod, connectArgs = self._lastConnection
+        self._reconnecting = True
+        try:
+            connectMethod(*connectArgs)
+        finally:
+            self._reconnecting = False
+
+    def captureSessionState(self):
+        """
+        Used by auto reconnect when the connection is lost
+
+        Returns:
+          Dictionary of the state restoreSession writes again after reconnecting
+        """
+        return {
+            "session": self._session,
+            "sensorSpam": self.isSensorSpamActive(),
+            "spamInterval": self._robotCommunicator.getSensorSpamInterval(),
+            "running": self._roverRunning,
+            "actuatorWrites": self._robotCommunicator.getActuatorRestoreWrites(),
+        }
+
+    def _restoreSessionState(self, state) -> None:
+        writes = []
+        if state["running"] and not self._robotCommunicator.isInSerialMode():
+            writes.append((OPTYPE.BUTTON_PRESS.value, [RUNNING_STATES.RUNNING.value]))
+        writes += state["actuatorWrites"]
+        if state["sensorSpam"]:
+            self._robotCommunicator.startSensorSpam(
+                state["spamInterval"],
+                extraWrites=writes,
+                timeout=self._defaultCommunicationTimeout,
+            )
+        elif writes:
+            results = self.doBatchTransaction([(OPCODE.WRITE, t, d) for t, d in writes])
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        self._roverRunning = state["running"]
+
+    def restoreSession(self, state) -> bool:
+        """
+        Used by auto reconnect - connects again with the last connection method
+        then writes the state from captureSessionState
+
+        Raises:
+          Exception if reconnecting or restoring the state fails
+
+        Returns:
+          True once restored. False without doing anything if there has been a connect or
+          disconnect call since the state was captured
+        """
+        with self._connectionLock:
+            if state["session"] != self._session:
+                return False
+            self._reconnect()
+            self._restoreSessionState(state)
+            return True
 
     def disconnect(self) -> None:
-        self._robotCommunicator.disconnect()
+        with self._connectionLock:
+            self._session += 1
+            self._robotCommunicator.disconnect()
 
     def getTransmitAverageMS(self) -> int:
         """
@@ -184,31 +636,49 @@ class RoverController(metaclass=Singleton):
         stats = self._robotCommunicator.getCommsTimingStats()
         return stats[2]
 
+    def getQueueWaitStatsMS(self):
+        """
+        Commands are queued by priority: stops first, then motor moves, then other actuator
+        writes, then sensor reads, then bulk reads (camera images and I2C).
+        Stops (from stopRover and the safety guard) cancel any queued motor moves and run on
+        their own executor so they are sent without waiting for the command in progress.
+
+        Returns:
+          Dictionary of the approximate (moving average) time in ms commands wait in the queue
+          keyed by priority: EMERGENCY_STOP, MOTION, ACTUATOR, SENSOR_READ, and BULK
+        """
+        return self._robotCommunicator.getQueueWaitStatsMS()
+
     def stopRover(self):
         """
-        Attempts to stop the rover by setting motor speeds to 0, turning off the buzzer,
+        Attempts to stop the rover by cancelling any running timelines (note sequences,
+        LED animations and servo moves), setting motor speeds to 0, turning off the buzzer,
         turning sensor spam off, and taking it out of running mode.
 
         Returns:
           None
         """
+        self._roverRunning = False
         waitForAck = False
         timeout = 0.5
+        priority = COMMAND_PRIORITY.EMERGENCY_STOP
         try:
-            self.writePacket(OPCODE.WRITE, OPTYPE.SPAM_MODE, [0], waitForAck, timeout)
-            self.writePacket(
-                OPCODE.WRITE, OPTYPE.MOTOR_SET, [0] * 7, waitForAck, timeout
+            self._robotCommunicator.cancelTimelines()
+            self._robotCommunicator.stopSensorSpam(waitForAck, timeout, priority)
+            self._robotCommunicator.writePacket(
+                OPCODE.WRITE, OPTYPE.MOTOR_SET, [0] * 7, waitForAck, timeout, priority
             )
-            self.writePacket(
-                OPCODE.WRITE, OPTYPE.BUZZER_FREQ, [0, 0], waitForAck, timeout
+            self._robotCommunicator.writePacket(
+                OPCODE.WRITE, OPTYPE.BUZZER_FREQ, [0, 0], waitForAck, timeout, priority
             )
             if not self._robotCommunicator.isInSerialMode():
-                self.writePacket(
+                self._robotCommunicator.writePacket(
                     OPCODE.WRITE,
                     OPTYPE.BUTTON_PRESS,
                     [RUNNING_STATES.CLOSED.value],
                     waitForAck,
                     timeout,
+                    priority,
                 )
         except Exception as e:
             logger.debug("Not all robot stop commands completed")
@@ -218,8 +688,11 @@ class RoverController(metaclass=Singleton):
         """
         Stops all communication threads and ends the entire Python program.
         """
-        self._robotCommunicator.stop()
-        self._robotCommunicator.join()
+        self.disableAutoReconnect()
+        with self._startLock:
+            if self._robotCommunicator.is_alive():
+                self._robotCommunicator.stop()
+                self._robotCommunicator.join()
         try:
             sys.exit(0)
         except Exception:
@@ -271,6 +744,19 @@ class RoverController(metaclass=Singleton):
             timeout = self._defaultCommunicationTimeout
         return self._robotCommunicator.readAttribute(opType, data, timeout)
 
+    def readCachedAttribute(self, opType):
+        """
+        Non-blocking read - returns the attribute from the latest sensor spam packet
+        Never communicates with the robot
+
+        Args:
+          opType (int or MicromelonOpType): Attribute to read.
+
+        Returns:
+          List of bytes if a recent enough value is cached, None otherwise.
+        """
+        return self._robotCommunicator.readCachedAttribute(opType)
+
     def writePacket(self, opCode, opType, data=None, waitForAck=True, timeout=None):
         """
         Blocking write - Writes the packet over transport.
@@ -299,6 +785,69 @@ class RoverController(metaclass=Singleton):
             opCode, opType, data, waitForAck, timeout
         )
 
+    def doBatchTransaction(self, transactions, timeout=None):
+        """
+        Blocking - sends several packets back to back and waits for all of the responses
+        Avoids waiting a full round trip for each packet in turn
+
+        Args:
+          transactions (list): (opCode, opType, data) for each packet in the order to send them
+          timeout (number): time in seconds to wait for all responses.
+                          Uses the default timeout of this controller if not provided
+
+        Raises:
+          TimeoutError on timeout.
+          Exception on comms failure.
+
+        Returns:
+          List with the response data for each transaction in order.
+            A transaction that failed has its Exception in its place instead
+        """
+        if timeout is None:
+            timeout = self._defaultCommunicationTimeout
+        return self._robotCommunicator.doBatchTransaction(transactions, timeout)
+
+    def runTimeline(self, events, dropLate=True, cancelWrite=None):
+        """
+        Non-blocking - plays a sequence of timed writes on the communication thread.
+        Each write is sent at its offset from the start so the timing doesn't depend on your program
+        or accumulate delays from waiting for each acknowledgement.
+
+        Args:
+          events (list of TimelineEvent): writes to send in offset order
+          dropLate (bool): skip writes that are already overdue when the next one is due.
+                          The last write is always sent.
+          cancelWrite (tuple): optional (opType, data) to write if playback is cancelled
+
+        Raises:
+          Exception if no robot is connected
+
+        Returns:
+          concurrent.futures.Future that completes with a dictionary of
+            sent, dropped, and maxLatenessMS once the last write is acknowledged.
+            Cancel it to stop playback early. stopRover also cancels it.
+        """
+        return self._robotCommunicator.runTimeline(events, dropLate, cancelWrite)
+
+    def runBackgroundTask(self, taskFunction):
+        """
+        Non-blocking - runs a coroutine on the communication thread alongside normal traffic.
+        Intended for library modules that need to schedule their own communication.
+
+        Args:
+          taskFunction (function): called on the communication thread with an async function
+                                transact(opCode, opType, data=None, timeout=3.0)
+                                and returns the coroutine to run.
+                                transact raises an Exception while no robot is connected
+
+        Returns:
+          concurrent.futures.Future for the result of the coroutine.
+            Cancel it to stop the task.
+            Tasks still running are cancelled when the controller ends.
+        """
+        self._startCommunicator()
+        return self._robotCommunicator.runBackgroundTask(taskFunction)
+
     def doMotorOperation(self, opType, data, timeout=120):
         """
         Some motor operations that use encoders or IMU take an unknown amount of time to complete.
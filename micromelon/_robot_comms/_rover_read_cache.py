@@ -29,6 +29,53 @@ class BUFFER_SIZES(Enum):
     GYRO_ACCUM = 12
 
 
+_START_AND_SIZE_FOR_OPTYPE = {
+    OPTYPE.ULTRASONIC.value: (
+        BUFFER_POSITIONS.ULTRASONIC.value,
+        BUFFER_SIZES.ULTRASONIC.value,
+    ),
+    OPTYPE.ACCL.value: (BUFFER_POSITIONS.ACCL.value, BUFFER_SIZES.ACCL.value),
+    OPTYPE.GYRO.value: (BUFFER_POSITIONS.GYRO.value, BUFFER_SIZES.GYRO.value),
+    OPTYPE.COLOUR_ALL.value: (
+        BUFFER_POSITIONS.COLOUR_ALL.value,
+        BUFFER_SIZES.COLOUR_ALL.value,
+    ),
+    OPTYPE.TIME_OF_FLIGHT.value: (
+        BUFFER_POSITIONS.TIME_OF_FLIGHT.value,
+        BUFFER_SIZES.TIME_OF_FLIGHT.value,
+    ),
+    OPTYPE.BATTERY_VOLTAGE.value: (
+        BUFFER_POSITIONS.BATTERY_VOLTAGE.value,
+        BUFFER_SIZES.BATTERY_VOLTAGE.value,
+    ),
+    OPTYPE.STATE_OF_CHARGE.value: (
+        BUFFER_POSITIONS.BATTERY_PERCENTAGE.value,
+        BUFFER_SIZES.BATTERY_PERCENTAGE.value,
+    ),
+    OPTYPE.CURRENT_SENSOR.value: (
+        BUFFER_POSITIONS.BATTERY_CURRENT.value,
+        BUFFER_SIZES.BATTERY_CURRENT.value,
+    ),
+    OPTYPE.GYRO_ACCUM.value: (
+        BUFFER_POSITIONS.GYRO_ACCUM.value,
+        BUFFER_SIZES.GYRO_ACCUM.value,
+    ),
+}
+
+
+def readSensorFrame(frame, opType):
+    """
+    Returns the bytes for opType from an ALL_SENSORS packet
+    or None if the attribute isn't part of the packet
+    """
+    if isinstance(opType, Enum):
+        opType = opType.value
+    if opType in _START_AND_SIZE_FOR_OPTYPE:
+        start, size = _START_AND_SIZE_FOR_OPTYPE[opType]
+        return frame[start : start + size]
+    return None
+
+
 class RoverReadCache:
     def __init__(self) -> None:
         self._allSensors = None
@@ -36,38 +83,6 @@ class RoverReadCache:
         self._useByInterval = (
             0.25  # cached values older than 0.25 seconds will be ignored
         )
-        self._startAndSizeIndexForOpType = {
-            OPTYPE.ULTRASONIC.value: (
-                BUFFER_POSITIONS.ULTRASONIC.value,
-                BUFFER_SIZES.ULTRASONIC.value,
-            ),
-            OPTYPE.ACCL.value: (BUFFER_POSITIONS.ACCL.value, BUFFER_SIZES.ACCL.value),
-            OPTYPE.GYRO.value: (BUFFER_POSITIONS.GYRO.value, BUFFER_SIZES.GYRO.value),
-            OPTYPE.COLOUR_ALL.value: (
-                BUFFER_POSITIONS.COLOUR_ALL.value,
-                BUFFER_SIZES.COLOUR_ALL.value,
-            ),
-            OPTYPE.TIME_OF_FLIGHT.value: (
-                BUFFER_POSITIONS.TIME_OF_FLIGHT.value,
-                BUFFER_SIZES.TIME_OF_FLIGHT.value,
-            ),
-            OPTYPE.BATTERY_VOLTAGE.value: (
-                BUFFER_POSITIONS.BATTERY_VOLTAGE.value,
-                BUFFER_SIZES.BATTERY_VOLTAGE.value,
-            ),
-            OPTYPE.STATE_OF_CHARGE.value: (
-                BUFFER_POSITIONS.BATTERY_PERCENTAGE.value,
-                BUFFER_SIZES.BATTERY_PERCENTAGE.value,
-            ),
-            OPTYPE.CURRENT_SENSOR.value: (
-                BUFFER_POSITIONS.BATTERY_CURRENT.value,
-                BUFFER_SIZES.BATTERY_CURRENT.value,
-            ),
-            OPTYPE.GYRO_ACCUM.value: (
-                BUFFER_POSITIONS.GYRO_ACCUM.value,
-                BUFFER_SIZES.GYRO_ACCUM.value,
-            ),
-        }
 
     def updateAllSensors(self, data):
         self._allSensors = data
@@ -89,10 +104,4 @@ class RoverReadCache:
             or time.time() - self._lastUpdatedTime > self._useByInterval
         ):
             return None
-        if isinstance(opType, Enum):
-            opType = opType.value
-
-        if opType in self._startAndSizeIndexForOpType:
-            indices = self._startAndSizeIndexForOpType[opType]
-            return self._allSensors[indices[0] : indices[0] + indices[1]]
-        return None
+        return readSensorFrame(self._allSensors, opType)
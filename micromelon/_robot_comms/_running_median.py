@@ -0,0 +1,32 @@
+from bisect import bisect_left, insort
+from collections import deque
+
+
+class RunningMedian:
+    """
+    Median of the last windowSize values
+    Keeps a sorted copy of the window so the median is a lookup
+    Positions are found with a binary search but inserting into and removing from
+    the list is O(window) which is cheap for the small windows used for sensors
+    """
+
+    def __init__(self, windowSize) -> None:
+        self._windowSize = windowSize
+        self._history = deque()
+        self._sorted = []
+
+    def recordValue(self, value):
+        if len(self._history) >= self._windowSize:
+            oldest = self._history.popleft()
+            del self._sorted[bisect_left(self._sorted, oldest)]
+        self._history.append(value)
+        insort(self._sorted, value)
+
+    def getMedian(self):
+        count = len(self._sorted)
+        if count == 0:
+            return None
+        middle = count // 2
+        if count % 2:
+            return self._sorted[middle]
+        return (self._sorted[middle - 1] + self._sorted[middle]) / 2
@@ -0,0 +1,79 @@
+import struct
+import time
+from ._comms_constants import MicromelonOpCode as OPCODE, MicromelonType as OPTYPE
+from ._moving_average import MovingAverage
+from ._rover_read_cache import readSensorFrame
+from .._mm_logging import getLogger
+
+logger = getLogger()
+
+# Packet is built once so stopping costs nothing extra on the frame that triggers it
+_MOTOR_STOP_PACKET = [OPCODE.WRITE.value, OPTYPE.MOTOR_SET.value, 7] + [0] * 7
+
+
+class SafetyGuard:
+    """
+    Checks every sensor spam packet for unsafe conditions and stops the motors
+    on the same packet with an emergency stop that jumps the command queue.
+
+    Only triggers while the motors were last commanded to move so it doesn't
+    keep writing stop packets while the robot sits in front of an obstacle.
+    """
+
+    def __init__(
+        self, writeStopPacket, ultrasonicBelow=None, irBelow=None, stopWhenFlipped=False
+    ) -> None:
+        for limit in (ultrasonicBelow, irBelow):
+            if limit is not None and (not isinstance(limit, (int, float)) or limit <= 0):
+                raise Exception("Safety guard distances must be positive numbers or None")
+        self._writeStopPacket = writeStopPacket
+        self._ultrasonicBelow = ultrasonicBelow
+        self._irBelow = irBelow
+        self._stopWhenFlipped = stopWhenFlipped
+        self._motorsMoving = True  # motors may already be moving when the guard is set
+        self._latencies = MovingAverage(20)
+        self.triggerCount = 0
+        self.lastReason = None
+        self.lastLatencyMS = None
+
+    def noteMotorCommand(self, data):
+        # First two bytes are the left and right motor speeds
+        self._motorsMoving = bool(data) and (data[0] != 0 or data[1] != 0)
+
+    def _checkFrame(self, data):
+        if self._ultrasonicBelow is not None:
+            cm = struct.unpack("<H", bytes(readSensorFrame(data, OPTYPE.ULTRASONIC)))[0]
+            if cm < self._ultrasonicBelow:
+                return "ultrasonic reading " + str(cm) + "cm"
+        if self._irBelow is not None:
+            mm = struct.unpack("<2H", bytes(readSensorFrame(data, OPTYPE.TIME_OF_FLIGHT)))
+            if min(mm) / 10 < self._irBelow:
+                return "IR reading " + str(min(mm) / 10) + "cm"
+        if self._stopWhenFlipped:
+            z = struct.unpack("<3h", bytes(readSensorFrame(data, OPTYPE.ACCL)))[2]
+            if z < 0:
+                return "robot flipped"
+        return None
+
+    def recordFrame(self, data, timestamp):
+        if not self._motorsMoving:
+            return
+        reason = self._checkFrame(data)
+        if reason is None:
+            return
+        self._motorsMoving = False
+        self._writeStopPacket(list(_MOTOR_STOP_PACKET))
+        latency = (time.time() - timestamp) * 1000.0
+        self._latencies.recordValue(latency)
+        self.triggerCount += 1
+        self.lastReason = reason
+        self.lastLatencyMS = latency
+        logger.warning("Safety guard stopped motors - " + reason)
+
+    def getStats(self):
+        return {
+            "triggerCount": self.triggerCount,
+            "lastReason": self.lastReason,
+            "lastLatencyMS": self.lastLatencyMS,
+            "averageLatencyMS": self._latencies.getAverage(),
+        }
@@ -0,0 +1,85 @@
+import asyncio
+from .._mm_logging import getLogger
+
+logger = getLogger()
+
+
+class TimelineEvent:
+    """
+    A write to send to the robot at a fixed offset from the start of a timeline
+
+    Attributes:
+      offset (float): seconds after the timeline starts to send the write
+      opType (int): attribute to write
+      data (list of bytes): data to write
+      resyncData (list of bytes): data to write instead if an earlier event was dropped
+                    eg. a full update when data only holds the changes from the previous event
+    """
+
+    __slots__ = ("offset", "opType", "data", "resyncData")
+
+    def __init__(self, offset, opType, data, resyncData=None) -> None:
+        self.offset = offset
+        self.opType = opType
+        self.data = data
+        self.resyncData = resyncData
+
+
+async def playTimeline(transact, events, dropLate=True, cancelWrite=None):
+    """
+    Sends each event at its offset from when playback starts.
+    Deadlines are absolute so time spent waiting for acks doesn't accumulate.
+    An event is dropped if the next event is already due when it would be sent,
+    unless it is the last event which is always sent.
+    The first event sent after a drop sends its resyncData if it has any.
+    Cancelling playback stops any further writes but lets a write already in flight complete.
+    cancelWrite is then sent, eg. to turn off an actuator left on by the last event sent.
+
+    Args:
+      transact (coroutine function): called with (opType, data) to write an event
+      events (list of TimelineEvent): events in offset order
+      dropLate (bool): whether to skip events that are running behind
+      cancelWrite (tuple): optional (opType, data) to write if playback is cancelled
+
+    Returns:
+      Dictionary with keys sent, dropped, and maxLatenessMS
+    """
+    try:
+        return await _playEvents(transact, events, dropLate)
+    except asyncio.CancelledError:
+        if cancelWrite is not None:
+            try:
+                await asyncio.shield(transact(*cancelWrite))
+            except Exception as e:
+                logger.debug("Timeline cancel write failed")
+                logger.debug(e)
+        raise
+
+
+async def _playEvents(transact, events, dropLate):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    sent = 0
+    dropped = 0
+    maxLateness = 0.0
+    droppedSinceSent = False
+    lastIndex = len(events) - 1
+    for i, event in enumerate(events):
+        deadline = start + event.offset
+        now = loop.time()
+        if now < deadline:
+            await asyncio.sleep(deadline - now)
+            now = loop.time()
+        elif dropLate and i < lastIndex and now >= start + events[i + 1].offset:
+            dropped += 1
+            droppedSinceSent = True
+            continue
+        maxLateness = max(maxLateness, now - deadline)
+        data = event.data
+        if droppedSinceSent and event.resyncData is not None:
+            data = event.resyncData
+        droppedSinceSent = False
+        # Shielded so cancelling doesn't cancel the transaction waiting on the robot's ack
+        await asyncio.shield(transact(event.opType, data))
+        sent += 1
+    return {"sent": sent, "dropped": dropped, "maxLatenessMS": maxLateness * 1000.0}
@@ -1,4 +1,3 @@
 from ._ble_controller import BleController
-from ._ble_controller_threadwrapped import BleControllerThread
 
-__all__ = ["BleController", "BleControllerThread"]
+__all__ = ["BleController"]
@@ -1,8 +1,10 @@
 import asyncio
+import collections
 import time
 from bleak import BleakClient, BleakScanner
 from .._comms_constants import CONNECTION_STATUS
 from ..._mm_logging import getLogger
+from ..._user_cache import loadUserCache, saveUserCache
 import re
 
 logger = getLogger()
@@ -15,14 +17,25 @@ OTA_SERVICE_UUID = "1d14d6ee-fd63-4fa1-bfa4-8f47b42119f0"
 
 SCAN_TIMEOUT = 10  # s
 CONNECT_TIMEOUT = 10  # s
+# Connecting straight to a cached address gives up sooner and falls back to scanning
+DIRECT_CONNECT_TIMEOUT = 5  # s
 DISCOVER_CHARAC_TIMEOUT = 10  # s
 
 IO_TIMEOUT = 2  # s
 
+# Smallest GATT write payload (default ATT MTU of 23 minus 3 bytes of header)
+MIN_WRITE_PAYLOAD = 20
+# Writers wait once this many packets are queued to be written without response
+MAX_QUEUED_PACKETS = 32
+QUEUE_FULL_TIMEOUT = 3  # s
+
 HEARTBEAT_TIMEOUT = 1.6  # s
 HEARTBEAT_INTERVAL = 4.0  # s
 HEARTBEAT_TASK_NAME = "HEARTBEA_TASK"
 
+# Device name to BLE address of robots that have connected before
+ADDRESS_CACHE_NAME = "ble_addresses"
+
 
 def _format_bdaddr(a):
     return ":".join("{:02X}".format(x) for x in a.to_bytes(6, byteorder="big"))
@@ -34,6 +47,12 @@ def _long_to_short_uuid(u):
     return u
 
 
+def _failQueuedWrites(entries, error):
+    for packet, written in entries:
+        if not written.done():
+            written.set_exception(error)
+
+
 class BleController:
     def __init__(self, packetReceivedCallback, connectionStatusCallback):
         self.status = CONNECTION_STATUS.NOT_CONNECTED
@@ -53,7 +72,11 @@ class BleController:
         self.heartbeatRequired = True
         self.heartbeatTask = None
 
-        self.scanner = None
+        self._queuedPackets = collections.deque()
+        self._queueSpace: asyncio.Event = None
+        self._flushTask = None
+        # Called with the ms each packed write took
+        self.writeTimingCallback = None
 
     def packetReceivedCallbackWrapper(self, sender, data):
         self.lastReadWriteTime = time.time()
@@ -97,49 +120,146 @@ class BleController:
             UART_UUID, bytearray(packet), not withoutResponse
         )
 
+    async def writeUartPackets(self, packets):
+        # Packs as many whole packets as fit into each write without response
+        # Whether every robot firmware parses several packets from one write is unverified
+        # which is why this is only used in the opt-in throughput mode
+        maxPayload = max(MIN_WRITE_PAYLOAD, self.client.mtu_size - 3)
+        chunk = []
+        for packet in packets:
+            if chunk and len(chunk) + len(packet) > maxPayload:
+                await self.writeUartPacket(chunk, True)
+                chunk = []
+            chunk.extend(packet)
+        if chunk:
+            await self.writeUartPacket(chunk, True)
+
+    async def queueUartPacket(self, packet):
+        """
+        Queues a packet to be written without response along with any others queued
+        before the flush runs.  Returns once the write containing the packet is sent
+        and raises if that write fails or the robot disconnects first.
+        Written without response so a packet the robot drops or rejects is not detected
+        here - only a transaction still waiting for its response will time out
+        """
+        if self._queueSpace is None:
+            # Created here so it belongs to the running loop
+            self._queueSpace = asyncio.Event()
+        while (
+            len(self._queuedPackets) >= MAX_QUEUED_PACKETS
+            and self.status == CONNECTION_STATUS.CONNECTED
+        ):
+            self._queueSpace.clear()
+            await asyncio.wait_for(self._queueSpace.wait(), QUEUE_FULL_TIMEOUT)
+        if self.status != CONNECTION_STATUS.CONNECTED:
+            raise Exception("BLE robot not connected")
+        written = asyncio.get_running_loop().create_future()
+        self._queuedPackets.append((packet, written))
+        if self._flushTask is None or self._flushTask.done():
+            self._flushTask = asyncio.ensure_future(self._flushQueuedPackets())
+        await written
+
+    async def _flushQueuedPackets(self):
+        # Let packets queued in the same loop iteration join the first write
+        await asyncio.sleep(0)
+        while self._queuedPackets:
+            entries = list(self._queuedPackets)
+            self._queuedPackets.clear()
+            self._queueSpace.set()
+            startTime = time.time()
+            try:
+                await self.writeUartPackets([packet for packet, written in entries])
+            except asyncio.CancelledError:
+                _failQueuedWrites(entries, Exception("BLE write cancelled"))
+                raise
+            except Exception as e:
+                # Fail the transactions now rather than leaving them to time out
+                logger.error("BLE write failed")
+                logger.error(e)
+                _failQueuedWrites(entries, Exception("BLE write failed: " + str(e)))
+                continue
+            for packet, written in entries:
+                if not written.done():
+                    written.set_result(None)
+            if self.writeTimingCallback:
+                self.writeTimingCallback((time.time() - startTime) * 1000.0)
+
     # BLE Connection
-    async def _detectionCallback(self):
-        while 1:
-            await asyncio.sleep(0.1)
-            for dev in self.scanner.discovered_devices:
-                if self.deviceName == None or self.deviceName == dev.name:
-                    self.address = dev.address
-                    logger.debug("Found with address: ", dev.address)
-                    logger.debug("Found name: " + str(dev.name))
-                    # self.scanner.stop()
-                    return
+    def _matchesDeviceName(self, device, advertisementData):
+        if self.deviceName is None:
+            return True
+        return self.deviceName in (device.name, advertisementData.local_name)
 
-    async def connectBLE(self, reqServices=None, name=None):
-        if reqServices is None:
-            reqServices = []
-        # Discover all available devices
-        self.scanner = BleakScanner(timeout=SCAN_TIMEOUT)
-        self.deviceName = name
+    async def _scanForDevice(self):
+        # Returns as soon as a matching advertisement is seen
         self._updateConnectionStatus(CONNECTION_STATUS.SEARCHING)
-        await self.scanner.start()
-        try:
-            await asyncio.wait_for(self._detectionCallback(), timeout=SCAN_TIMEOUT)
-        except asyncio.TimeoutError as e:
-            # Add relevant message to exception
-            e.args = ("Robot not found - Scan timed out", *e.args)
-            raise
-        finally:
-            await self.scanner.stop()
-        if not self.address:
+        device = await BleakScanner.find_device_by_filter(
+            self._matchesDeviceName, timeout=SCAN_TIMEOUT
+        )
+        if device is None:
             self._updateConnectionStatus(CONNECTION_STATUS.NOT_CONNECTED)
-            raise Exception("Robot address not discovered")
+            raise asyncio.TimeoutError("Robot not found - Scan timed out")
+        self.address = device.address
+        logger.debug("Found with address: " + str(device.address))
+        logger.debug("Found name: " + str(device.name))
+        return device
 
+    async def _connectClient(self, addressOrDevice, timeout):
         # Create a client instance for the bot
-        self.client = BleakClient(self.address, disconnected_callback=self._onDisconnected)
+        self.client = BleakClient(
+            addressOrDevice, disconnected_callback=self._onDisconnected, timeout=timeout
+        )
         # Connect to the bot via the recorded address
+        self._updateConnectionStatus(CONNECTION_STATUS.CONNECTING)
+        await self.client.connect(timeout=timeout)
+        self._updateConnectionStatus(CONNECTION_STATUS.INTERROGATING)
+        # Record the available services
+        self.svcs = self.client.services
+        # Record the avaiable characteristics
+        self.discoveredCharacs = self.svcs.characteristics
+
+    def _hasServices(self, reqServices):
+        discoveredServiceUUIDs = [str(x.uuid) for x in self.svcs.services.values()]
+        for service in reqServices:
+            if (
+                service not in discoveredServiceUUIDs
+                and _long_to_short_uuid(service) not in discoveredServiceUUIDs
+            ):
+                logger.debug("Service not found: " + service)
+                return False
+        return True
+
+    async def _connectCachedAddress(self, address, reqServices):
         try:
-            self._updateConnectionStatus(CONNECTION_STATUS.CONNECTING)
-            await self.client.connect(timeout=CONNECT_TIMEOUT)
-            self._updateConnectionStatus(CONNECTION_STATUS.INTERROGATING)
-            # Record the available services
-            self.svcs = self.client.services
-            # Record the avaiable characteristics
-            self.discoveredCharacs = self.svcs.characteristics
+            await self._connectClient(address, DIRECT_CONNECT_TIMEOUT)
+            if self._hasServices(reqServices):
+                self.address = address
+                return True
+        except Exception as e:
+            logger.debug(e)
+        logger.info("Could not connect to saved robot address - scanning instead")
+        try:
+            if self.client:
+                await self.client.disconnect()
+        except Exception as e:
+            logger.debug(e)
+        return False
+
+    async def connectBLE(self, reqServices=None, name=None):
+        if reqServices is None:
+            reqServices = []
+        self.deviceName = name
+        self.address = None
+        addressCache = loadUserCache(ADDRESS_CACHE_NAME) if name else {}
+
+        # Try the address this robot had last time before spending time scanning
+        cachedAddress = addressCache.get(name)
+        if cachedAddress and await self._connectCachedAddress(cachedAddress, reqServices):
+            return True
+
+        device = await self._scanForDevice()
+        try:
+            await self._connectClient(device, CONNECT_TIMEOUT)
         except Exception as e:
             # Unable to connect so print the error
             logger.error("Bluetooth Error")
@@ -148,15 +268,13 @@ class BleController:
             await self.disconnect()
             raise
 
-        discoveredServiceUUIDs = [str(x.uuid) for x in self.svcs.services.values()]
-        for service in reqServices:
-            if (
-                service not in discoveredServiceUUIDs
-                and _long_to_short_uuid(service) not in discoveredServiceUUIDs
-            ):
-                logger.debug("Service not found: " + service)
-                await self.disconnect()
-                raise Exception("Required BLE services not discovered")
+        if not self._hasServices(reqServices):
+            await self.disconnect()
+            raise Exception("Required BLE services not discovered")
+
+        if name and addressCache.get(name) != self.address:
+            addressCache[name] = self.address
+            saveUserCache(ADDRESS_CACHE_NAME, addressCache)
         return True
 
     async def connectToRobot(self, botID):
@@ -225,10 +343,22 @@ class BleController:
 
     async def disconnect(self, calledByUser=True):
         self.userDisconnected = calledByUser
+        if self._flushTask and not self._flushTask.done():
+            # Give queued packets (eg. stop commands) a chance to go out first
+            try:
+                await asyncio.wait_for(asyncio.shield(self._flushTask), IO_TIMEOUT)
+            except Exception as e:
+                logger.debug(e)
+                self._flushTask.cancel()
+        _failQueuedWrites(self._queuedPackets, Exception("BLE robot disconnected"))
+        self._queuedPackets.clear()
         if self.heartbeatTask:
             self.heartbeatTask.cancel()
             self.heartbeatTask = None
         self._updateConnectionStatus(CONNECTION_STATUS.DISCONNECTED)
+        if self._queueSpace:
+            # Wake writers waiting for space so they fail now instead of timing out
+            self._queueSpace.set()
         if self.client:
             await self.client.disconnect()
 
@@ -1,3 +1,4 @@
+import inspect
 import time
 from .._moving_average import MovingAverage
 
@@ -7,6 +8,8 @@ class RobotTransportBase:
         self._packetReceivedCallback = packetReceivedCallback
         self._connectionStatusCallback = connectionStatusCallback
         self.SHOULD_FAKE_PACKET_ACK = False
+        # Limit on transactions awaiting a response from the robot (None for no limit)
+        self.MAX_IN_FLIGHT_TRANSACTIONS = None
         self._writeTimings = MovingAverage(20)
 
     def getAverageWriteTimeMS(self):
@@ -15,6 +18,14 @@ class RobotTransportBase:
     def writePacketTimed(self, data):
         startTime = time.time()
         result = self.writePacket(data)
+        if inspect.isawaitable(result):
+            # Transports running on the communication loop return an awaitable write
+            return self._recordWhenWritten(result, startTime)
+        self._writeTimings.recordValue((time.time() - startTime) * 1000.0)
+        return result
+
+    async def _recordWhenWritten(self, write, startTime):
+        result = await write
         self._writeTimings.recordValue((time.time() - startTime) * 1000.0)
         return result
 
@@ -1,30 +1,73 @@
+import asyncio
 from ._robot_transport_base import RobotTransportBase
-from ..ble import BleControllerThread
+
+# Transactions allowed in flight at once in throughput mode
+# Counts writes until they are sent as well as reads awaiting a response
+THROUGHPUT_IN_FLIGHT_TRANSACTIONS = 8
 
 
 class RobotTransportBLE(RobotTransportBase):
-    def __init__(self, packetReceivedCallback, connectionStatusCallback):
+    """
+    Runs the BLE controller on the given event loop (the communication thread's loop)
+    so writes are awaited there and notifications arrive on it directly
+    """
+
+    def __init__(self, packetReceivedCallback, connectionStatusCallback, loop):
         super().__init__(packetReceivedCallback, connectionStatusCallback)
-        self._bleThread = None
+        self._loop: asyncio.AbstractEventLoop = loop
+        self._bleController = None
         self.SHOULD_FAKE_PACKET_ACK = True
+        self._throughputMode = False
+
+    def setThroughputMode(self, enabled):
+        """
+        In throughput mode packets are written without response and packed together
+        into MTU sized writes, with the number of transactions in flight limited instead.
+        Writes are acked once the packed write containing them is sent, which does not
+        show whether the robot accepted the packet
+        """
+        self._throughputMode = enabled
+        self.MAX_IN_FLIGHT_TRANSACTIONS = (
+            THROUGHPUT_IN_FLIGHT_TRANSACTIONS if enabled else None
+        )
 
     def _packetReceivedCallbackWrapper(self, sender, data):
         self._packetReceivedCallback(list(data))
 
+    def _runOnLoop(self, coroutine):
+        # Blocks until the coroutine completes unless called from the loop itself
+        try:
+            runningLoop = asyncio.get_running_loop()
+        except RuntimeError:
+            runningLoop = None
+        if runningLoop is self._loop:
+            return asyncio.ensure_future(coroutine)
+        if self._loop.is_running():
+            return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+        return self._loop.run_until_complete(coroutine)
+
     def connect(self, botID):
-        self._bleThread = BleControllerThread(
+        # bleak is slow to import so only load it when BLE is used
+        from ..ble import BleController
+
+        self._bleController = BleController(
             self._packetReceivedCallbackWrapper, self._connectionStatusCallback
         )
-        self._bleThread.start()
-        return self._bleThread.connectToRobot(botID)
+        self._bleController.writeTimingCallback = self._writeTimings.recordValue
+        return self._runOnLoop(self._bleController.connectToRobot(botID))
+
+    def writePacketTimed(self, data):
+        if self._throughputMode:
+            # Timings are recorded by the BLE controller once the packed write is sent
+            return self.writePacket(data)
+        return super().writePacketTimed(data)
 
     def writePacket(self, data):
-        return self._bleThread.writeUartPacket(data, False)
+        # Returns a coroutine to be awaited on the loop
+        if self._throughputMode:
+            return self._bleController.queueUartPacket(data)
+        return self._bleController.writeUartPacket(data, False)
 
     def disconnect(self):
-        return self._bleThread.disconnect()
-
-    def stop(self):
-        if self._bleThread:
-            self._bleThread.stop()
-            self._bleThread.join()
+        if self._bleController:
+            return self._runOnLoop(self._bleController.disconnect())
@@ -6,7 +6,6 @@ from .._comms_constants import (
     CONNECTION_STATUS,
 )
 from ..._binary import bytesToIntArray
-import serial
 import threading
 from ..._mm_logging import getLogger
 
@@ -16,7 +15,7 @@ logger = getLogger()
 class RobotTransportSerial(RobotTransportBase):
     def __init__(self, packetReceivedCallback, connectionStatusCallback):
         super().__init__(packetReceivedCallback, connectionStatusCallback)
-        self._connection: serial.Serial = None
+        self._connection: "serial.Serial" = None
         self._readingThread: threading.Thread = None
 
     def connect(self, port, baudrate=115200):
@@ -25,6 +24,9 @@ class RobotTransportSerial(RobotTransportBase):
             self._connection.port = port
             self._connection.open()
         else:
+            # pyserial is only imported when a serial port is used
+            import serial
+
             self._connection = serial.Serial(port, baudrate=baudrate)
         self._connection.flushInput()
         self._connection.flushOutput()
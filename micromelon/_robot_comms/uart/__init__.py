@@ -2,4 +2,5 @@ from ._uart import *
 
 __all__ = [
     "UartController",
+    "AttributeNotImplementedError",
 ]
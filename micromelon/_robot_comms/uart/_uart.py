@@ -1,6 +1,7 @@
 from .._comms_constants import MicromelonOpCode as OPCODE, MicromelonType as OPTYPE
 import queue
 import asyncio
+import inspect
 from ..._mm_logging import getLogger
 
 logger = getLogger()
@@ -27,6 +28,22 @@ class _responseQueue:
         except Exception:
             return None
 
+    def discard(self, entry):
+        # Removes a specific entry eg. one whose packet was never sent
+        q = self.queue[entry.opType]
+        with q.mutex:
+            try:
+                q.queue.remove(entry)
+            except ValueError:
+                pass
+
+
+class AttributeNotImplementedError(Exception):
+    """
+    Raised when the robot responds that it doesn't implement the attribute
+    eg. an attribute added in newer firmware
+    """
+
 
 async def _timeout(time, future: asyncio.Future):
     await asyncio.sleep(time)
@@ -39,6 +56,8 @@ class UartController:
         self.notificationCallbacks = {}
         self.responseQueues = _responseQueue([x.value for x in OPTYPE])
         self.transport = transport
+        self._inFlightLimit = None
+        self._inFlightWindow: asyncio.Semaphore = None
 
     def subscribeToSensor(self, opType, callback):
         if opType in self.notificationCallbacks:
@@ -76,25 +95,48 @@ class UartController:
         dataStr += "]"
         return "Packet:" + printOp + " " + printType + " - " + dataStr
 
+    def _getInFlightWindow(self):
+        limit = getattr(self.transport, "MAX_IN_FLIGHT_TRANSACTIONS", None)
+        if limit != self._inFlightLimit:
+            self._inFlightLimit = limit
+            self._inFlightWindow = asyncio.Semaphore(limit) if limit else None
+        return self._inFlightWindow
+
     async def doUartTransaction(self, opCode, opType, data=None, timeout=3.0):
         if data is None:
             data = []
+        window = self._getInFlightWindow()
+        if window:
+            # Flow control - wait for an earlier transaction to be acknowledged
+            await window.acquire()
         fut = asyncio.get_running_loop().create_future()
+        if window:
+            fut.add_done_callback(lambda f: window.release())
         timeoutTask = asyncio.get_running_loop().create_task(_timeout(timeout, fut))
-        self.responseQueues.queue[opType].put(
-            _responseQueueEntry(opCode, opType, data, fut, timeoutTask)
-        )
+        entry = _responseQueueEntry(opCode, opType, data, fut, timeoutTask)
+        self.responseQueues.queue[opType].put(entry)
         p = self.buildPacket(opCode, opType, data)
 
         try:
-            self.transport.writePacketTimed(p)
+            write = self.transport.writePacketTimed(p)
+            if inspect.isawaitable(write):
+                await write
             # logger.debug('Sent: ' + self.prettyPrintPacket(opCode, opType, data))
             if self.transport.SHOULD_FAKE_PACKET_ACK and opCode == OPCODE.WRITE.value:
-                # Fake an ack because handled by writing with response (ble)
-                # others need to handle their own ack as could be forwarded over unreliable transports
-                self.processIncomingPacket(self.buildPacket(OPCODE.ACK.value, opType))
-        except Exception as e:
-            self.responseQueues.remove(opType)
+                # The completed write is the ack (ble) - others need to handle their own ack
+                # as could be forwarded over unreliable transports
+                # Resolved directly as the oldest entry of this type may be a read
+                # of the same attribute still waiting for its response
+                self.responseQueues.discard(entry)
+                timeoutTask.cancel()
+                if not fut.done():
+                    fut.set_result([])
+        except BaseException as e:
+            # The packet wasn't sent so no response will come for it
+            self.responseQueues.discard(entry)
+            timeoutTask.cancel()
+            # Completing the future releases the in flight window
+            fut.cancel()
             logger.debug(e)
             # TODO: process error to see if BLE should be disconnected
             raise
@@ -154,7 +196,9 @@ class UartController:
             )
             responseStr = self.prettyPrintPacket(opCode, opTypeD, payload)
             errorStr = "UART failed for " + packetStr + " with response: " + responseStr
+            errorType = Exception
             if OPCODE(opCode) == OPCODE.ERROR_NOT_IMPLEMENTED:
+                errorType = AttributeNotImplementedError
                 printType = "Unknown Type: " + str(opTypeD)
                 if opTypeD in OPTYPE.__members__.values():
                     printType = OPTYPE(opTypeD).name
@@ -164,7 +208,7 @@ class UartController:
                     + "\tCheck that firmware is updated."
                 )
             if responseCallbacks:
-                responseCallbacks.future.set_exception(Exception(errorStr))
+                responseCallbacks.future.set_exception(errorType(errorStr))
                 responseCallbacks.timeoutTask.cancel()
             logger.error(errorStr)
 
@@ -0,0 +1,45 @@
+import json
+import os
+from ._mm_logging import getLogger
+
+logger = getLogger()
+
+# Set this environment variable to keep cached robot data somewhere other than ~/.micromelon
+CACHE_DIR_ENVIRONMENT_VARIABLE = "MICROMELON_CACHE_DIR"
+
+
+def _cachePath(name):
+    directory = os.environ.get(CACHE_DIR_ENVIRONMENT_VARIABLE) or os.path.join(
+        os.path.expanduser("~"), ".micromelon"
+    )
+    return os.path.join(directory, name + ".json")
+
+
+def loadUserCache(name):
+    """
+    Returns the dictionary saved under name or an empty dictionary
+    if nothing has been saved or the file can't be read
+    """
+    try:
+        with open(_cachePath(name), "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def saveUserCache(name, data):
+    """
+    Saves a JSON serialisable dictionary under name
+    Failures are logged rather than raised as the cache is only an optimisation
+    """
+    path = _cachePath(name)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tempPath = path + ".tmp"
+        with open(tempPath, "w") as f:
+            json.dump(data, f)
+        os.replace(tempPath, path)
+    except OSError as e:
+        logger.warning("Could not save " + name + " cache")
+        logger.warning(e)
@@ -7,4 +7,9 @@ __all__ = [
     "readVoltage",
     "readPercentage",
     "readCurrent",
+    "readConsumedMAh",
+    "readPower",
+    "predictRuntime",
+    "setCapacity",
+    "resetTelemetry",
 ]
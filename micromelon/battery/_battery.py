@@ -1,5 +1,7 @@
 from .._robot_comms import RoverController, MicromelonType as OPTYPE
 from .._binary import bytesToIntArray
+from .._utils import isNumber
+from ._telemetry import BatteryTelemetry
 
 _rc = RoverController()
 
@@ -7,8 +9,17 @@ __all__ = [
     "readVoltage",
     "readPercentage",
     "readCurrent",
+    "readConsumedMAh",
+    "readPower",
+    "predictRuntime",
+    "setCapacity",
+    "resetTelemetry",
 ]
 
+# Updated on the communication thread from every sensor spam packet
+_telemetry = BatteryTelemetry()
+_rc.addSensorFrameListener(_telemetry.recordFrame)
+
 
 def readVoltage():
     """
@@ -41,3 +52,78 @@ def readCurrent():
     """
     milliAmps = _rc.readAttribute(OPTYPE.CURRENT_SENSOR)
     return bytesToIntArray(milliAmps, 2)[0]
+
+
+def _startTelemetry():
+    # Telemetry comes from sensor spam so make sure it is running
+    if _rc.isConnected():
+        _rc.ensureSensorFrames()
+
+
+def readConsumedMAh():
+    """
+    Reads the charge used from the battery since the telemetry started or was reset
+    Integrated in the background from every sensor spam reading so this doesn't communicate with the robot
+    Sensor spam will be started if it is not already active
+
+    Returns:
+      float value in milliamp hours
+    """
+    _startTelemetry()
+    return _telemetry.readConsumedMAh()
+
+
+def readPower():
+    """
+    Reads the smoothed power being drawn from the battery
+    Calculated in the background from every sensor spam reading so this doesn't communicate with the robot
+    Sensor spam will be started if it is not already active
+
+    Returns:
+      float value in watts or None if no readings have been received yet
+    """
+    _startTelemetry()
+    return _telemetry.readPower()
+
+
+def predictRuntime():
+    """
+    Predicts how long the battery will last at the current (smoothed) power draw
+    Uses the capacity given to Battery.setCapacity, otherwise the capacity is estimated
+    from the charge used while the battery percentage dropped by at least 2%
+    Sensor spam will be started if it is not already active
+
+    Returns:
+      float number of seconds or None if there isn't enough information yet
+    """
+    _startTelemetry()
+    return _telemetry.predictRuntime()
+
+
+def setCapacity(milliAmpHours):
+    """
+    Sets the full charge capacity of the battery used by Battery.predictRuntime
+
+    Args:
+      milliAmpHours (number): capacity in milliamp hours or None to estimate it from readings
+
+    Raises:
+      Exception if the capacity is not a positive number or None
+
+    Returns:
+      None
+    """
+    if milliAmpHours is not None and (not isNumber(milliAmpHours) or milliAmpHours <= 0):
+        raise Exception("Battery capacity must be a positive number of milliamp hours")
+    _telemetry.capacityOverride = milliAmpHours
+
+
+def resetTelemetry():
+    """
+    Restarts the consumed charge, smoothed power, and capacity estimate from zero
+    eg. after swapping or charging a robot
+
+    Returns:
+      None
+    """
+    _telemetry.reset()
@@ -0,0 +1,86 @@
+import struct
+from .._robot_comms import MicromelonType as OPTYPE, readSensorFrame
+
+# Weight of each new reading in the smoothed current and power
+_SMOOTHING = 0.05
+# Gaps between readings longer than this are not integrated (eg. spam stopped and restarted)
+_MAX_SAMPLE_GAP = 5.0  # s
+# Percentage drop needed before capacity is estimated from the charge used
+_MIN_PERCENTAGE_DROP = 2
+
+
+class BatteryTelemetry:
+    """
+    Integrates battery voltage, current, and charge from every sensor spam packet
+    Results are published as one tuple so reads are constant time and consistent
+    """
+
+    def __init__(self) -> None:
+        self.capacityOverride = None
+        self.reset()
+
+    def reset(self):
+        self._lastSample = None  # (timestamp, milliAmps)
+        self._consumedMAh = 0.0
+        self._current = None
+        self._power = None
+        self._startPercentage = None
+        # (consumed mAh, smoothed mA, smoothed W, percentage, estimated capacity mAh or None)
+        self._published = None
+
+    def recordFrame(self, data, timestamp):
+        milliVolts = struct.unpack("<H", bytes(readSensorFrame(data, OPTYPE.BATTERY_VOLTAGE)))[0]
+        percentage = readSensorFrame(data, OPTYPE.STATE_OF_CHARGE)[0]
+        milliAmps = struct.unpack("<h", bytes(readSensorFrame(data, OPTYPE.CURRENT_SENSOR)))[0]
+        self.update(milliVolts, milliAmps, percentage, timestamp)
+
+    def update(self, milliVolts, milliAmps, percentage, timestamp):
+        if self._lastSample is not None:
+            lastTimestamp, lastMilliAmps = self._lastSample
+            dt = timestamp - lastTimestamp
+            if 0 < dt <= _MAX_SAMPLE_GAP:
+                # Trapezoidal integration of current over time in hours
+                self._consumedMAh += (lastMilliAmps + milliAmps) / 2 * dt / 3600
+        self._lastSample = (timestamp, milliAmps)
+
+        watts = milliVolts * milliAmps / 1000000
+        if self._current is None:
+            self._current = milliAmps
+            self._power = watts
+        else:
+            self._current += _SMOOTHING * (milliAmps - self._current)
+            self._power += _SMOOTHING * (watts - self._power)
+
+        if self._startPercentage is None or percentage > self._startPercentage:
+            # First reading or the robot has been charged - start measuring again
+            self._startPercentage = percentage
+            self._consumedAtStart = self._consumedMAh
+        capacity = None
+        drop = self._startPercentage - percentage
+        if drop >= _MIN_PERCENTAGE_DROP:
+            capacity = (self._consumedMAh - self._consumedAtStart) / (drop / 100)
+
+        self._published = (
+            self._consumedMAh,
+            self._current,
+            self._power,
+            percentage,
+            capacity,
+        )
+
+    def readConsumedMAh(self):
+        return self._published[0] if self._published else 0.0
+
+    def readPower(self):
+        return self._published[2] if self._published else None
+
+    def predictRuntime(self):
+        if not self._published:
+            return None
+        consumed, current, power, percentage, capacity = self._published
+        if self.capacityOverride is not None:
+            capacity = self.capacityOverride
+        if not capacity or capacity <= 0 or current <= 0:
+            return None
+        remainingMAh = capacity * percentage / 100
+        return remainingMAh / current * 3600
@@ -3,6 +3,7 @@ Collection of functions for manipulating colour representations.
 Includes functions for reading from the robot's colour sensors.
 """
 from ._colour import *
+from ._nearest import *
 
 __all__ = [
     "CS",
@@ -17,8 +18,17 @@ __all__ = [
     "readAllSensors",
     "readSensor",
     "sensorSees",
+    "Matcher",
     "rgbToHsv",
     "hsvToRgb",
+    "rgbToHsvArray",
+    "hsvToRgbArray",
+    "registerColour",
+    "colourNames",
+    "nearestColour",
+    "nearestColourArray",
+    "readNearestColours",
     "hexToRgb",
     "rgbToHex",
+    "waitUntil",
 ]
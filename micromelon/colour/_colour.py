@@ -1,9 +1,14 @@
 import math
 import random as _rand
 from enum import Enum
-
-from .._robot_comms import RoverController, MicromelonType as OPTYPE
-from .._binary import bytesToIntArray
+# numpy is imported where it is used so importing this module stays fast
+
+from .._robot_comms import (
+    RoverController,
+    MicromelonType as OPTYPE,
+    readSensorFrame,
+    AttributeNotImplementedError,
+)
 from ..helper_math import constrain, scale
 from .._utils import mathModuloDistance, isNumber
 
@@ -22,10 +27,14 @@ __all__ = [
     "readAllSensors",
     "readSensor",
     "sensorSees",
+    "Matcher",
     "rgbToHsv",
     "hsvToRgb",
+    "rgbToHsvArray",
+    "hsvToRgbArray",
     "hexToRgb",
     "rgbToHex",
+    "waitUntil",
 ]
 
 
@@ -221,7 +230,7 @@ def readAllSensors(option=CS.ALL):
     if option < 0 or option > 5:
         raise Exception("Invalid Colour Sensor read option")
 
-    reading = _readRawColourFromRobot()
+    reading = _readRawColourFromRobot(option)
     if not reading:
         raise Exception("Colour sensor read failed")
 
@@ -253,9 +262,18 @@ def readSensor(option=CS.HUE, sensor=1):
     """
     if sensor < 0 or sensor > 2:
         raise Exception("Argument for sensor must be 0, 1, or 2")
+    if isinstance(option, CS):
+        option = option.value
+    if option < 0 or option > 5:
+        raise Exception("Invalid Colour Sensor read option")
 
-    reading = readAllSensors(option)
-    return reading[sensor]
+    reading = _readRawColourFromRobot(option, sensor)
+    if not reading:
+        raise Exception("Colour sensor read failed")
+
+    if option == CS.ALL.value:
+        return reading
+    return reading[option]
 
 
 def sensorSees(rgb, sensor=1, tolerance=20):
@@ -332,6 +350,113 @@ def sensorSees(rgb, sensor=1, tolerance=20):
     return colourDetected(reading[sensor], rgb, tolerance)
 
 
+class Matcher:
+    """
+    Checks colour sensor readings against several colours at once
+    The target colours are converted and their thresholds calculated once when the
+    matcher is created, then all three sensors are compared against all targets
+    from a single sensor read.
+    Matching follows the same rules as Colour.sensorSees
+
+    Usage:
+      matcher = Colour.Matcher([COLOURS.RED, COLOURS.GREEN, COLOURS.BLUE])
+      matcher.classify() # eg. [COLOURS.RED, None, COLOURS.BLUE]
+    """
+
+    def __init__(self, colours, tolerance=20):
+        """
+        Args:
+          colours (array): rgb colours in the form [r, g, b] or COLOURS enum elements
+          tolerance (int): How close each colour needs to be to what the sensor detects.
+                        See Colour.sensorSees. Must be between 0 and 255
+
+        Raises:
+          Exception for invalid arguments
+        """
+        import numpy
+
+        if not isNumber(tolerance) or tolerance < 0 or tolerance > 255:
+            raise Exception("Tolerance must be a number between 0 and 255")
+        if not colours:
+            raise Exception("Matcher needs at least one colour")
+        targets = []
+        for c in colours:
+            rgb = c.value if isinstance(c, COLOURS) else c
+            _checkRGB(rgb)
+            targets.append(rgb)
+
+        self.colours = list(colours)
+        self.tolerance = tolerance
+        hsvTargets = rgbToHsvArray(targets)
+        self._hue = hsvTargets[:, 0]
+        self._sat = hsvTargets[:, 1]
+        self._bright = hsvTargets[:, 2] * 255
+        # Need a bit more tolerance around white than black
+        self._brightRange = numpy.clip(
+            tolerance * (1.5 + numpy.clip(self._bright, 0, 255) / 255 * 1.5), 0, 255
+        )
+        # Looking for a shade or close enough
+        self._isShade = (self._bright < 25) | (self._sat < 0.04)
+
+    def match(self, reading=None):
+        """
+        Compares each colour sensor against every target colour
+
+        Args:
+          reading (array): optional result of Colour.readAllSensors() to use
+                        instead of reading the sensors
+
+        Raises:
+          Exception if the colour sensor read fails
+
+        Returns:
+          numpy boolean array of shape (3, number of colours)
+            Row is the sensor (left, middle, right) and column is the target colour
+        """
+        import numpy
+
+        if reading is None:
+            reading = readAllSensors()
+        reading = numpy.asarray(reading, dtype=float)
+        sh = reading[:, CS.HUE.value, None]
+        sw = reading[:, CS.BRIGHT.value, None]
+        sSat = rgbToHsvArray(reading[:, CS.RED.value : CS.BLUE.value + 1])[:, 1, None]
+
+        brightnessMatch = numpy.abs(sw - self._bright) < self._brightRange
+        shadeMatch = ((sSat < 0.3) | (sw < 32)) & brightnessMatch
+
+        hueDistance = numpy.minimum((self._hue - sh) % 360, (sh - self._hue) % 360)
+        colourMatch = (
+            (sw > 32)
+            & (sSat >= 0.04)
+            & (hueDistance < self.tolerance)
+            # Be very generous on saturation match
+            & (numpy.abs(sSat - self._sat) < 0.65)
+        )
+        return numpy.where(self._isShade, shadeMatch, colourMatch)
+
+    def classify(self, reading=None):
+        """
+        Finds the first target colour each colour sensor sees
+
+        Args:
+          reading (array): optional result of Colour.readAllSensors() to use
+                        instead of reading the sensors
+
+        Raises:
+          Exception if the colour sensor read fails
+
+        Returns:
+          Array [left, middle, right] of the matched colours as they were given to the
+          matcher, or None for a sensor that doesn't see any of them
+        """
+        matches = self.match(reading)
+        found = matches.argmax(axis=1)
+        return [
+            self.colours[found[i]] if matches[i, found[i]] else None for i in range(3)
+        ]
+
+
 def rgbToHsv(r, g, b):
     """
     Converts an RGB color value to HSV. Conversion formula
@@ -412,6 +537,86 @@ def hsvToRgb(h, s, v):
     return [r, g, b]
 
 
+def rgbToHsvArray(rgb):
+    """
+    Converts an array of RGB colours to HSV in one pass.
+    Gives the same results as Colour.rgbToHsv applied to each colour.
+    Useful for converting whole images eg. from Robot.getImageCapture
+    (reverse the last axis first if the image is in bgr order)
+
+    Args:
+      rgb (array): numpy array (or nested lists) of any shape with a last dimension of 3
+                  holding red, green, and blue values between 0 and 255 inclusive
+
+    Returns:
+      numpy float array of the same shape with the last dimension holding [hue, saturation, value]
+        hue between 0 and 360 inclusive, s and v between 0 and 1 inclusive
+    """
+    import numpy
+
+    rgb = numpy.asarray(rgb, dtype=float)
+    if rgb.shape[-1:] != (3,):
+        raise Exception("Last dimension of RGB array must have 3 values")
+    r = rgb[..., 0] / 255.0
+    g = rgb[..., 1] / 255.0
+    b = rgb[..., 2] / 255.0
+
+    mx = numpy.maximum(numpy.maximum(r, g), b)
+    mn = numpy.minimum(numpy.minimum(r, g), b)
+    d = mx - mn
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        s = numpy.where(mx == 0, 0, d / mx)
+        # Later channels win ties in the same order as rgbToHsv
+        h = numpy.where(
+            b == mx,
+            (60 * ((r - g) / d) + 240) % 360,
+            numpy.where(
+                g == mx,
+                (60 * ((b - r) / d) + 120) % 360,
+                (60 * ((g - b) / d) + 360) % 360,
+            ),
+        )
+    # achromatic
+    h = numpy.where(mx == mn, 0, numpy.round(h) % 360)
+    return numpy.stack((h, s, mx), axis=-1)
+
+
+def hsvToRgbArray(hsv):
+    """
+    Converts an array of HSV colours to RGB in one pass.
+    Gives the same results as Colour.hsvToRgb applied to each colour.
+
+    Args:
+      hsv (array): numpy array (or nested lists) of any shape with a last dimension of 3
+                  holding hue between 0 and 360, saturation and value between 0 and 1
+
+    Returns:
+      numpy integer array of the same shape with the last dimension holding [red, green, blue]
+        red, green, and blue values between 0 and 255 inclusive
+    """
+    import numpy
+
+    hsv = numpy.asarray(hsv, dtype=float)
+    if hsv.shape[-1:] != (3,):
+        raise Exception("Last dimension of HSV array must have 3 values")
+    h = hsv[..., 0]
+    s = hsv[..., 1]
+    v = hsv[..., 2]
+
+    h60 = h / 60.0
+    h60f = numpy.floor(h60)
+    hi = h60f.astype(numpy.int64) % 6
+    f = h60 - h60f
+    p = v * (1 - s)
+    q = v * (1 - f * s)
+    t = v * (1 - (1 - f) * s)
+    r = numpy.choose(hi, (v, q, p, p, t, v))
+    g = numpy.choose(hi, (t, v, v, q, p, p))
+    b = numpy.choose(hi, (p, p, t, v, v, q))
+    rgb = numpy.stack((r, g, b), axis=-1)
+    return numpy.round(rgb * 255).astype(numpy.int64)
+
+
 def hexToRgb(hex):
     """
     Converts hex colour codes eg. #FFF or #00FF0F to rgb array
@@ -444,6 +649,31 @@ def rgbToHex(r, g, b):
     return "#{0:02x}{1:02x}{2:02x}".format(r, g, b)
 
 
+def waitUntil(predicate, timeout=None):
+    """
+    Waits until the colour sensors reading satisfies a condition and returns the matching reading
+    The condition is checked against every reading the robot sends (sensor spam)
+    as it arrives, which reacts faster than a loop of reads and doesn't add traffic.
+    Sensor spam will be started if it is not already active
+
+    Usage:
+      Colour.waitUntil(lambda r: r[1][CS.BRIGHT.value] < 50) # wait for a dark middle sensor
+
+    Args:
+      predicate (function): called with an array of the three sensor readings
+                  in the same form as Colour.readAllSensors()
+                  Returns True when the condition is met
+      timeout (number): seconds to wait. Defaults to None (wait forever)
+
+    Raises:
+      TimeoutError if the condition isn't met within the timeout
+
+    Returns:
+      Array of sensor readings [left, middle, right] that met the condition
+    """
+    return _rc.waitForSensorFrame(_decodeFrame, predicate, timeout)
+
+
 ###############################################################################
 ###############################################################################
 # Helper functions
@@ -467,46 +697,97 @@ def _parseColourArg(c):
     return None
 
 
+# Smallest attribute that has the values for each read option
+# Colour sensor raw values are 2 bytes each
+_ATTRIBUTE_FOR_OPTION = {
+    CS.HUE.value: OPTYPE.COLOUR_HUE,  # 3 values
+    CS.RED.value: OPTYPE.COLOUR_RGBW,  # 12 values
+    CS.GREEN.value: OPTYPE.COLOUR_RGBW,
+    CS.BLUE.value: OPTYPE.COLOUR_RGBW,
+    CS.BRIGHT.value: OPTYPE.COLOUR_RGBW,
+    CS.ALL.value: OPTYPE.COLOUR_ALL,  # 15 values
+}
+# Attributes the connected robot responded to as not implemented
+# Cleared on every connection since it may be a different robot or firmware
+_unsupportedColourAttributes = set()
+_rc.addPostConnectionCallback(_unsupportedColourAttributes.clear)
+
+
+def _readColourAttribute(option):
+    # Sensor spam already has everything so there is nothing to gain from a smaller read
+    cached = _rc.readCachedAttribute(OPTYPE.COLOUR_ALL)
+    if cached:
+        return cached
+    opType = _ATTRIBUTE_FOR_OPTION[option]
+    if opType not in _unsupportedColourAttributes:
+        try:
+            return _rc.readAttribute(opType)
+        except AttributeNotImplementedError:
+            if opType == OPTYPE.COLOUR_ALL:
+                raise
+            # Older firmware - fall back to reading everything
+            _unsupportedColourAttributes.add(opType)
+    return _rc.readAttribute(OPTYPE.COLOUR_ALL)
+
+
 # Convert colour sensor reading into array of three [h, r, g, b, w] readings
-def _readRawColourFromRobot():
-    raw = _rc.readAttribute(OPTYPE.COLOUR_ALL)
-    raw = bytesToIntArray(raw, 2, signed=False)
-    if raw == None:
+# or the single [h, r, g, b, w] reading of the given sensor
+def _readRawColourFromRobot(option=CS.ALL.value, sensor=None):
+    raw = _readColourAttribute(option)
+    if not raw or len(raw) % 2 != 0:
         return None
-    parsed = []
+    return _parseRawColour(raw, sensor)
+
+
+def _parseRawColour(raw, sensor=None):
+    import numpy
+
+    raw = numpy.frombuffer(bytes(raw), dtype="<u2")
+    sensors = [0, 1, 2] if sensor is None else [sensor]
+
     if len(raw) == 3:
-        parsed.append([raw[0]] + hsvToRgb(raw[0], 1, 1) + [128])
-        parsed.append([raw[1]] + hsvToRgb(raw[1], 1, 1) + [128])
-        parsed.append([raw[2]] + hsvToRgb(raw[2], 1, 1) + [128])
-        return parsed
-
-    for i in range(len(raw)):
-        if len(raw) == 15 and (i == 4 or i == 9 or i == 14):
-            continue  # Hue comes back normal
-        # Scaling for sensor on 10 integration cycles and max count of 1024
-        raw[i] = (raw[i] / 10240) * 255
-        raw[i] = round(raw[i] * 100) / 100
+        parsed = [[int(raw[s])] + hsvToRgb(int(raw[s]), 1, 1) + [128] for s in sensors]
+        return parsed if sensor is None else parsed[0]
 
     if len(raw) == 12:
-        parsed.append([rgbToHsv(raw[8], raw[9], raw[10])[0]] + raw[8:])
-        parsed.append([rgbToHsv(raw[4], raw[5], raw[6])[0]] + raw[4:8])
-        parsed.append([rgbToHsv(raw[0], raw[1], raw[2])[0]] + raw[:4])
+        # Sensors are in reverse order as [r, g, b, w]
+        blocks = raw.reshape(3, 4)[::-1][sensors]
+        rgbw = _scaleRawColour(blocks)
+        hues = [rgbToHsv(v[0], v[1], v[2])[0] for v in rgbw.tolist()]
+        parsed = [[h] + v for h, v in zip(hues, _capRawColour(rgbw))]
     elif len(raw) == 15:
-        parsed.append([raw[14]] + raw[10:14])
-        parsed.append([raw[9]] + raw[5:9])
-        parsed.append([raw[4]] + raw[:4])
+        # Sensors are in reverse order as [r, g, b, w, hue]
+        blocks = raw.reshape(3, 5)[::-1][sensors]
+        # Hue comes back normal
+        parsed = [
+            [h] + v
+            for h, v in zip(
+                blocks[:, 4].tolist(),
+                _capRawColour(_scaleRawColour(blocks[:, :4])),
+            )
+        ]
     else:
         return None  # Unknown length
 
+    return parsed if sensor is None else parsed[0]
+
+
+def _decodeFrame(data):
+    return _parseRawColour(readSensorFrame(data, OPTYPE.COLOUR_ALL))
+
+
+def _scaleRawColour(raw):
+    import numpy
+
+    # Scaling for sensor on 10 integration cycles and max count of 1024
+    scaled = (raw / 10240) * 255
+    return numpy.round(scaled * 100) / 100
+
+
+def _capRawColour(scaled):
     # cap non-hue readings to between 0 and 255
-    for s in range(3):
-        for v in range(1, 5):
-            if parsed[s][v] > 255:
-                parsed[s][v] = 255
-            elif parsed[s][v] < 0:
-                parsed[s][v] = 0
-
-    return parsed
+    # Readings are unsigned so only the top needs capping - capped readings are the int 255
+    return [[255 if v > 255 else v for v in reading] for reading in scaled.tolist()]
 
 
 def _checkRGB(rgb):
@@ -0,0 +1,154 @@
+# numpy is imported where it is used so importing this module stays fast
+from ._colour import COLOURS, CS, readAllSensors, _checkRGB
+
+__all__ = [
+    "registerColour",
+    "colourNames",
+    "nearestColour",
+    "nearestColourArray",
+    "readNearestColours",
+]
+
+# Each rgb channel is quantised to this many bits for the lookup table
+_LUT_BITS = 5
+_LUT_SHIFT = 8 - _LUT_BITS
+
+# Named palette in lookup order - starts with the COLOURS enum
+_palette = {c.name: c.value for c in COLOURS}
+_lut = None
+
+
+def registerColour(name, rgb):
+    """
+    Adds a named colour to the palette used by Colour.nearestColour
+    Registering an existing name replaces its colour
+
+    Args:
+      name (string): name to report when this colour is the nearest
+      rgb (array): colour in the form [r, g, b] with values between 0 and 255 inclusive
+
+    Raises:
+      Exception if the colour is invalid or the palette is full (255 colours)
+
+    Returns:
+      None
+    """
+    global _lut
+    name = str(name)
+    if isinstance(rgb, COLOURS):
+        rgb = rgb.value
+    _checkRGB(rgb)
+    if name not in _palette and len(_palette) >= 255:
+        raise Exception("Colour palette is full")
+    _palette[name] = list(rgb)
+    _lut = None
+
+
+def colourNames():
+    """
+    Returns:
+      Array of the palette colour names in the order used by Colour.nearestColourArray
+    """
+    return list(_palette.keys())
+
+
+def nearestColour(rgb):
+    """
+    Finds the palette colour closest to an rgb colour
+    The palette is the COLOURS enum plus any colours added with Colour.registerColour
+
+    Args:
+      rgb (array): colour in the form [r, g, b] with values between 0 and 255 inclusive
+
+    Returns:
+      Name of the nearest colour eg. "RED".  Use COLOURS[name] to get the enum element
+    """
+    if isinstance(rgb, COLOURS):
+        rgb = rgb.value
+    return colourNames()[int(nearestColourArray(rgb))]
+
+
+def nearestColourArray(rgb):
+    """
+    Finds the closest palette colour for every colour in an array
+    A precomputed lookup table narrows the palette to the few colours that can be nearest
+    so each colour costs about the same regardless of palette size
+
+    Args:
+      rgb (array): numpy array (or nested lists) of any shape with a last dimension of 3
+                  holding red, green, and blue values between 0 and 255 inclusive
+
+    Returns:
+      numpy integer array of the input shape without its last dimension
+        Values are indices into Colour.colourNames()
+    """
+    import numpy
+
+    rgb = numpy.asarray(rgb)
+    if rgb.shape[-1:] != (3,):
+        raise Exception("Last dimension of RGB array must have 3 values")
+    if rgb.dtype != numpy.uint8:
+        rgb = numpy.clip(numpy.rint(rgb), 0, 255).astype(numpy.uint8)
+    palette, table = _getLookupTable()
+    q = rgb >> _LUT_SHIFT
+    candidates = table[q[..., 0], q[..., 1], q[..., 2]]
+    # Exact distance to each candidate - ties go to the earlier palette colour
+    offsets = palette[candidates] - rgb[..., None, :].astype(numpy.int32)
+    best = numpy.sum(offsets * offsets, axis=-1).argmin(axis=-1)
+    return numpy.take_along_axis(candidates, best[..., None], axis=-1)[..., 0]
+
+
+def readNearestColours():
+    """
+    Reads the colour sensors and finds the closest palette colour for each
+
+    Raises:
+      Exception if the colour sensor read fails
+
+    Returns:
+      Array of colour names in the form [left, middle, right]
+    """
+    import numpy
+
+    reading = numpy.asarray(readAllSensors())
+    indices = nearestColourArray(reading[:, CS.RED.value : CS.BLUE.value + 1])
+    names = colourNames()
+    return [names[i] for i in indices]
+
+
+def _getLookupTable():
+    global _lut
+    import numpy
+
+    if _lut is None:
+        palette = numpy.asarray(list(_palette.values()), dtype=numpy.int32)
+        _lut = (palette, _buildLookupTable(palette))
+    return _lut
+
+
+def _buildLookupTable(palette):
+    # For each quantised cell lists the palette colours that could be nearest to
+    # some colour in the cell, padded with its first candidate
+    # A colour can only be nearest if its closest distance to the cell is within
+    # the furthest distance of every other colour
+    import numpy
+
+    size = 1 << _LUT_BITS
+    lows = (numpy.arange(size, dtype=numpy.int32) << _LUT_SHIFT)[:, None]
+    highs = lows + (1 << _LUT_SHIFT) - 1
+    nearest = []
+    furthest = []
+    for channel in range(3):
+        values = palette[None, :, channel]
+        nearest.append(numpy.maximum(numpy.maximum(lows - values, values - highs), 0) ** 2)
+        furthest.append(numpy.maximum(values - lows, highs - values) ** 2)
+    minDistances = nearest[0][:, None, None] + nearest[1][None, :, None] + nearest[2][None, None]
+    maxDistances = (
+        furthest[0][:, None, None] + furthest[1][None, :, None] + furthest[2][None, None]
+    )
+    isCandidate = minDistances <= maxDistances.min(axis=-1)[..., None]
+    count = int(isCandidate.sum(axis=-1).max())
+    # Stable sort keeps candidates in palette order ahead of the rest
+    order = numpy.argsort(~isCandidate, axis=-1, kind="stable")[..., :count]
+    kept = numpy.take_along_axis(isCandidate, order, axis=-1)
+    return numpy.where(kept, order, order[..., :1]).astype(numpy.uint8)
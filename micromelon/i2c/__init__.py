@@ -3,9 +3,14 @@ Functions for communicating with I2C devices connected to the expansion header
 If the rover controller is in uart operation then these functions are not available
 """
 from ._i2c import *
+from ._devices import *
 
 __all__ = [
     "read",
     "write",
     "scan",
+    "readBlock",
+    "writeBlock",
+    "clearShadowRegisters",
+    "I2CDevice",
 ]
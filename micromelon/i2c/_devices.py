@@ -0,0 +1,212 @@
+import asyncio
+import heapq
+import threading
+import time
+from .._robot_comms import (
+    RoverController,
+    MicromelonType as OPTYPE,
+    MicromelonOpCode as OPCODE,
+)
+from .._mm_logging import getLogger
+from .._utils import isNumber
+from ._i2c import read, _checkI2CAvailable, _checkRegister, _readAddress
+
+_rc = RoverController()
+logger = getLogger()
+
+__all__ = [
+    "I2CDevice",
+]
+
+# Cached values are used until they are this many poll periods old
+_USE_BY_PERIODS = 2.5
+
+
+class _PolledRegister:
+    def __init__(self, device, name, register, byteCount, period, decode) -> None:
+        self.device = device
+        self.name = name
+        self.register = register
+        self.byteCount = byteCount
+        self.period = period
+        self.decode = decode
+        self.packetData = [device._readAddress, register, byteCount]
+
+
+class I2CDevice:
+    """
+    An I2C device on the expansion header with registers read in the background
+    Registers are read on the communication thread at their own rates, interleaved
+    with normal traffic, so your program can read the latest values without waiting
+
+    Example:
+      accel = I2CDevice(0x68)
+      accel.addRegister("x", 0x3B, 2, rate=50, decode=lambda b: int.from_bytes(b, "big", signed=True))
+      accel.start()
+      print(accel.read("x"))
+    """
+
+    def __init__(self, address, addressIs7Bit=True) -> None:
+        """
+        Args:
+          address (int): Target I2C device address
+          addressIs7Bit (boolean): if True then the address argument will be treated as 7 bits
+
+        Raises:
+          Exception if the address is too large to be 7 bit and the 7 bit flag is True
+        """
+        self.address = address
+        self.addressIs7Bit = addressIs7Bit
+        self._readAddress = _readAddress(address, addressIs7Bit)
+        self._registers = {}
+        # name -> (value, timestamp) written on the communication thread
+        self._latest = {}
+
+    def addRegister(self, name, register, byteCount=1, rate=10, decode=None):
+        """
+        Declares a register to read in the background once the device is started
+
+        Args:
+          name (string): name to read the value with
+          register (int): Register in the device to read from
+          byteCount (int): Number of bytes to read from the register
+          rate (number): reads per second
+          decode (function): converts the array of bytes read into the value to return.
+                          Defaults to returning the array of bytes
+
+        Raises:
+          Exception if the register is > 255 or the rate is not a positive number
+
+        Returns:
+          This device so calls can be chained
+        """
+        _checkRegister(register)
+        if not isNumber(rate) or rate <= 0:
+            raise Exception("Rate must be a positive number")
+        self._registers[name] = _PolledRegister(
+            self, name, register, byteCount, 1.0 / rate, decode
+        )
+        self._latest.pop(name, None)
+        if _poller.isPolling(self):
+            _poller.add(self)
+        return self
+
+    def start(self):
+        """
+        Starts reading the declared registers in the background
+
+        Raises:
+          Exception if controller is in UART mode
+        """
+        _checkI2CAvailable()
+        _poller.add(self)
+
+    def stop(self):
+        """
+        Stops reading the registers in the background
+        """
+        _poller.remove(self)
+
+    def read(self, name):
+        """
+        Reads the latest value of a register
+        Returns the background value if it is recent, otherwise reads the register directly
+
+        Args:
+          name (string): name given to I2CDevice.addRegister
+
+        Raises:
+          Exception if the name has not been added
+          Exception if the register read fails
+
+        Returns:
+          Decoded value of the register
+        """
+        if name not in self._registers:
+            raise Exception("No I2C register named " + str(name))
+        entry = self._registers[name]
+        latest = self._latest.get(name)
+        if latest and time.time() - latest[1] < entry.period * _USE_BY_PERIODS:
+            return latest[0]
+        value = read(self.address, entry.register, entry.byteCount, self.addressIs7Bit)
+        return self._store(entry, value)
+
+    def readTimestamp(self, name):
+        """
+        Returns:
+          time.time() when the value of the register was last read or None if it never has been
+        """
+        latest = self._latest.get(name)
+        return latest[1] if latest else None
+
+    def _store(self, entry, value):
+        if entry.decode:
+            value = entry.decode(value)
+        self._latest[entry.name] = (value, time.time())
+        return value
+
+
+class _I2CPoller:
+    """
+    Reads the registers of every started device on the communication thread
+    Due reads are kept in a heap ordered by when they are next due
+    The task is restarted with a fresh heap whenever the set of devices changes
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._devices = []
+        self._future = None
+
+    def isPolling(self, device):
+        return device in self._devices
+
+    def add(self, device):
+        with self._lock:
+            if device not in self._devices:
+                self._devices.append(device)
+            self._restart()
+
+    def remove(self, device):
+        with self._lock:
+            if device in self._devices:
+                self._devices.remove(device)
+            self._restart()
+
+    def _restart(self):
+        if self._future:
+            self._future.cancel()
+            self._future = None
+        entries = [e for d in self._devices for e in d._registers.values()]
+        if entries:
+            self._future = _rc.runBackgroundTask(
+                lambda transact: self._poll(transact, entries)
+            )
+
+    async def _poll(self, transact, entries):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        # (due time, order added, entry) - order breaks ties between equal due times
+        heap = [(now, i, e) for i, e in enumerate(entries)]
+        heapq.heapify(heap)
+        while True:
+            due, order, entry = heap[0]
+            now = loop.time()
+            if due > now:
+                await asyncio.sleep(due - now)
+            try:
+                # Shielded so cancelling doesn't cancel the transaction waiting on the robot's ack
+                value = await asyncio.shield(
+                    transact(OPCODE.READ, OPTYPE.I2C_HEADER, entry.packetData)
+                )
+                entry.device._store(entry, value)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug("I2C poll of register " + str(entry.register) + " failed")
+                logger.debug(e)
+            # Skip missed reads rather than bursting to catch up
+            heapq.heapreplace(heap, (max(due + entry.period, loop.time()), order, entry))
+
+
+_poller = _I2CPoller()
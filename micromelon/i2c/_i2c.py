@@ -1,4 +1,8 @@
-from .._robot_comms import RoverController, MicromelonType as OPTYPE
+from .._robot_comms import (
+    RoverController,
+    MicromelonType as OPTYPE,
+    MicromelonOpCode as OPCODE,
+)
 
 from .._utils import isNumber
 from .._binary import numberToByteArray
@@ -9,8 +13,14 @@ __all__ = [
     "read",
     "write",
     "scan",
+    "readBlock",
+    "writeBlock",
+    "clearShadowRegisters",
 ]
 
+# Last bytes written to each (device write address, register) so unchanged writes can be skipped
+_shadowRegisters = {}
+
 
 def read(address, register, byteCount, addressIs7Bit=True):
     """
@@ -32,20 +42,9 @@ def read(address, register, byteCount, addressIs7Bit=True):
     Returns:
       Array of bytes read from target device register
     """
-    if _rc.isConnected() and _rc.isInSerialMode():
-        raise Exception("Expansion header used by UART.  I2C not available")
-    sanitisedAddress = None
-    if addressIs7Bit:
-        if address > 127:
-            raise Exception("I2C address is too large to be 7 bit (>127)")
-        sanitisedAddress = (address << 1) | 1
-        # 1 indicates read
-    else:
-        sanitisedAddress = address | 1
-
-    if register > 0xFF:
-        raise Exception("I2C register >255")
-
+    _checkI2CAvailable()
+    sanitisedAddress = _readAddress(address, addressIs7Bit)
+    _checkRegister(register)
     return _rc.readAttribute(OPTYPE.I2C_HEADER, [sanitisedAddress, register, byteCount])
 
 
@@ -71,29 +70,18 @@ def write(address, register, value, byteCount, addressIs7Bit=True):
     Returns:
       Array of bytes that is the response to the write command
     """
-    if _rc.isConnected() and _rc.isInSerialMode():
-        raise Exception("Expansion header used by UART.  I2C not available")
-    sanitisedAddress = None
-    if addressIs7Bit:
-        if address > 127:
-            raise Exception("I2C address is too large to be 7 bit (>127)")
-        sanitisedAddress = (address << 1) & 0xFE
-        # 0 for LSB indicates write
-    else:
-        sanitisedAddress = address & 0xFE
-
-    if register > 0xFF:
-        raise Exception("I2C register >255")
-
-    bytesToWrite = numberToByteArray(value, byteCount)
-    if byteCount < len(bytesToWrite):
-        raise Exception(
-            "I2C Data to write requires at least {} bytes".format(len(bytesToWrite))
-        )
+    _checkI2CAvailable()
+    sanitisedAddress = _writeAddress(address, addressIs7Bit)
+    _checkRegister(register)
+    bytesToWrite = _valueToBytes(value, byteCount)
 
-    return _rc.writeAttribute(
+    key = (sanitisedAddress, register)
+    _shadowRegisters.pop(key, None)
+    result = _rc.writeAttribute(
         OPTYPE.I2C_HEADER, [sanitisedAddress, register] + bytesToWrite
     )
+    _shadowRegisters[key] = bytesToWrite
+    return result
 
 
 def scan():
@@ -106,6 +94,170 @@ def scan():
     Returns:
       Array of device addresses found.  Empty array if none found
     """
+    _checkI2CAvailable()
+    return _rc.readAttribute(OPTYPE.I2C_HEADER)
+
+
+def readBlock(address, registers, byteCount=1, addressIs7Bit=True):
+    """
+    Reads several registers of the I2C device at the address in one go.
+    All of the reads are sent without waiting for each response so this is
+    much faster than calling I2C.read for each register.
+
+    Args:
+      address (int): Target I2C device address
+      registers (array): Registers in the target device to read from
+      byteCount (int or array): Number of bytes to read from every register
+                              or an array with the number of bytes for each register
+      addressIs7Bit (boolean): if True then the address argument will be treated as 7 bits
+
+    Raises:
+      Exception if controller is in UART mode
+      Exception if the address is too large to be 7 bit and the 7 bit flag is True
+      Exception if any register is > 255
+      Exception if any of the reads fail (raised once all of the reads have finished)
+
+    Returns:
+      Array with an array of bytes read from each register in the same order as registers
+    """
+    _checkI2CAvailable()
+    sanitisedAddress = _readAddress(address, addressIs7Bit)
+    registers = list(registers)
+    if isNumber(byteCount):
+        byteCount = [byteCount] * len(registers)
+    elif len(byteCount) != len(registers):
+        raise Exception("byteCount must be a number or have one entry for each register")
+    for register in registers:
+        _checkRegister(register)
+
+    results = _rc.doBatchTransaction(
+        [
+            (OPCODE.READ, OPTYPE.I2C_HEADER, [sanitisedAddress, register, count])
+            for register, count in zip(registers, byteCount)
+        ]
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    return results
+
+
+def writeBlock(address, values, byteCount=1, addressIs7Bit=True, force=False):
+    """
+    Writes several registers of the I2C device at the address in one go.
+    All of the writes are sent without waiting for each response.
+    Registers that were last written with the same value (by I2C.write or I2C.writeBlock)
+    are skipped unless force is True.
+
+    Args:
+      address (int): Target I2C device address
+      values (dictionary or array): register to value to write eg. {0x20: 0x47, 0x23: 0x08}
+                                  or an array of (register, value) pairs to write in that order
+      byteCount (int): Number of bytes to write to each register
+      addressIs7Bit (boolean): if True then the address argument will be treated as 7 bits
+      force (boolean): if True write every register even if the value hasn't changed
+
+    Raises:
+      Exception if controller is in UART mode
+      Exception if the address is too large to be 7 bit and the 7 bit flag is True
+      Exception if any register is > 255
+      Exception if any value requires more bytes than the byteCount argument allows
+      Exception if any of the writes fail (raised once all of the writes have finished)
+
+    Returns:
+      Array of the registers that were written
+    """
+    _checkI2CAvailable()
+    sanitisedAddress = _writeAddress(address, addressIs7Bit)
+    if isinstance(values, dict):
+        values = values.items()
+
+    writes = []
+    for register, value in values:
+        _checkRegister(register)
+        bytesToWrite = _valueToBytes(value, byteCount)
+        if force or _shadowRegisters.get((sanitisedAddress, register)) != bytesToWrite:
+            writes.append((register, bytesToWrite))
+    if not writes:
+        return []
+
+    for register, _ in writes:
+        # Forget the old value in case the write fails part way
+        _shadowRegisters.pop((sanitisedAddress, register), None)
+    results = _rc.doBatchTransaction(
+        [
+            (OPCODE.WRITE, OPTYPE.I2C_HEADER, [sanitisedAddress, register] + bytesToWrite)
+            for register, bytesToWrite in writes
+        ]
+    )
+    error = None
+    for (register, bytesToWrite), result in zip(writes, results):
+        if isinstance(result, Exception):
+            error = error or result
+        else:
+            _shadowRegisters[(sanitisedAddress, register)] = bytesToWrite
+    if error:
+        raise error
+    return [register for register, _ in writes]
+
+
+def clearShadowRegisters(address=None, addressIs7Bit=True):
+    """
+    Forgets the values last written to I2C device registers so the next
+    I2C.writeBlock writes them again eg. after a device has been reset
+    Shadow registers are cleared automatically when a robot connects
+
+    Args:
+      address (int): Target I2C device address or None to clear every device
+      addressIs7Bit (boolean): if True then the address argument will be treated as 7 bits
+
+    Returns:
+      None
+    """
+    if address is None:
+        _shadowRegisters.clear()
+        return
+    sanitisedAddress = _writeAddress(address, addressIs7Bit)
+    for key in [k for k in _shadowRegisters if k[0] == sanitisedAddress]:
+        del _shadowRegisters[key]
+
+
+def _checkI2CAvailable():
     if _rc.isConnected() and _rc.isInSerialMode():
         raise Exception("Expansion header used by UART.  I2C not available")
-    return _rc.readAttribute(OPTYPE.I2C_HEADER)
+
+
+def _readAddress(address, addressIs7Bit):
+    # 1 for LSB indicates read
+    if addressIs7Bit:
+        if address > 127:
+            raise Exception("I2C address is too large to be 7 bit (>127)")
+        return (address << 1) | 1
+    return address | 1
+
+
+def _writeAddress(address, addressIs7Bit):
+    # 0 for LSB indicates write
+    if addressIs7Bit:
+        if address > 127:
+            raise Exception("I2C address is too large to be 7 bit (>127)")
+        return (address << 1) & 0xFE
+    return address & 0xFE
+
+
+def _checkRegister(register):
+    if register > 0xFF:
+        raise Exception("I2C register >255")
+
+
+def _valueToBytes(value, byteCount):
+    bytesToWrite = numberToByteArray(value, byteCount)
+    if byteCount < len(bytesToWrite):
+        raise Exception(
+            "I2C Data to write requires at least {} bytes".format(len(bytesToWrite))
+        )
+    return bytesToWrite
+
+
+# Devices may have been power cycled while disconnected
+_rc.addPostConnectionCallback(_shadowRegisters.clear)
@@ -10,4 +10,11 @@ __all__ = [
     "readGyroAccum",
     "isFlipped",
     "isRighted",
+    "stream",
+    "readOrientation",
+    "resetOrientationYaw",
+    "calibrate",
+    "readCalibration",
+    "clearCalibration",
+    "waitUntil",
 ]
@@ -1,8 +1,15 @@
+import queue
+import time
+# numpy is imported where it is used so importing this module stays fast
 from .._utils import *
-from .._robot_comms import RoverController, MicromelonType as OPTYPE
+from .._robot_comms import RoverController, MicromelonType as OPTYPE, readSensorFrame
 from .._binary import bytesToIntArray
+from .._mm_logging import getLogger
+from .._user_cache import loadUserCache, saveUserCache
+from ._orientation import OrientationFilter
 
 _rc = RoverController()
+logger = getLogger()
 
 __all__ = [
     "readAccel",
@@ -10,8 +17,34 @@ __all__ = [
     "readGyroAccum",
     "isFlipped",
     "isRighted",
+    "stream",
+    "readOrientation",
+    "resetOrientationYaw",
+    "calibrate",
+    "readCalibration",
+    "clearCalibration",
+    "waitUntil",
 ]
 
+# Completed batches held for a slow consumer before the oldest is dropped
+_MAX_QUEUED_BATCHES = 16
+# Bytes kept from each sensor frame: accel (3 x int16), gyro and gyro accum (3 x int32 each)
+_IMU_FRAME_BYTES = 30
+
+_CALIBRATION_CACHE_NAME = "imu_calibration"
+# Gyro noise (standard deviation in degrees per second) that suggests the robot was moved
+_MAX_STILL_GYRO_NOISE = 2.0
+
+# Updated on the communication thread from every sensor spam packet
+_orientation = OrientationFilter()
+_rc.addSensorFrameListener(_orientation.recordFrame)
+
+# Bias subtracted from readings once calibrated
+_calibration = None
+_calibrationBotID = None
+_accelBias = [0.0, 0.0, 0.0]
+_gyroBias = [0.0, 0.0, 0.0]
+
 
 def _div1000(n):
     return n / 1000
@@ -39,7 +72,7 @@ def readAccel(n=None):
         raise Exception("Argument to IMU.readAccel must be a number between 0 and 2")
     accel = _rc.readAttribute(OPTYPE.ACCL)
     accel = bytesToIntArray(accel, 2, signed=True)
-    accel = list(map(_div1000, accel))
+    accel = [a / 1000 - bias for a, bias in zip(accel, _accelBias)]
     if n == None:
         return accel
     return accel[n]
@@ -67,7 +100,7 @@ def readGyro(n=None):
         raise Exception("Argument to IMU.readGyro must be a number between 0 and 2")
     gyro = _rc.readAttribute(OPTYPE.GYRO)
     gyro = bytesToIntArray(gyro, 4, signed=True)
-    gyro = list(map(_div1000, gyro))
+    gyro = [g / 1000 - bias for g, bias in zip(gyro, _gyroBias)]
     if n == None:
         return gyro
     return gyro[n]
@@ -118,3 +151,287 @@ def isRighted():
       True iff (if and only if) the robot is the right way up. False otherwise
     """
     return readAccel()[2] >= 0
+
+
+def readOrientation(timeout=3.0):
+    """
+    Reads the robot's orientation estimated from the accelerometer and gyroscope
+    The estimate is updated in the background from every sensor spam packet so
+    reading it doesn't communicate with the robot.
+    Sensor spam will be started if it is not already active
+
+    Roll and pitch are kept level using gravity so they don't drift.
+    Yaw is the integrated gyroscope z axis and will drift slowly over time.
+
+    Args:
+      timeout (number): seconds to wait for the first reading if sensor spam was not active
+
+    Raises:
+      TimeoutError if no readings arrive within the timeout
+
+    Returns:
+      Array of [roll, pitch, yaw, timestamp]
+        roll, pitch, and yaw are floats in degrees between -180 and 180
+        timestamp is the time.time() of the reading the estimate was last updated with
+    """
+    _rc.ensureSensorFrames()
+    if not _orientation.firstSampleEvent.wait(timeout):
+        raise TimeoutError("No IMU readings received for orientation")
+    return _orientation.read()
+
+
+def resetOrientationYaw():
+    """
+    Sets the current yaw from IMU.readOrientation as 0 degrees
+
+    Returns:
+      None
+    """
+    _orientation.resetYaw()
+
+
+def stream(batch=32, timeout=None):
+    """
+    Generator of IMU readings taken from every sensor spam packet the robot sends
+    Readings are collected on the communication thread and converted a batch at a time
+    Sensor spam will be started if it is not already active
+
+    Usage:
+      for timestamps, samples in IMU.stream(batch=50):
+          if numpy.abs(samples[:, 2] - 1).max() > 0.5:
+              break
+
+    Args:
+      batch (int): number of readings in each batch
+      timeout (number): seconds to wait for each batch before raising TimeoutError.
+                      Defaults to None (wait forever)
+
+    Raises:
+      Exception if batch is not a positive integer
+      TimeoutError if a batch is not complete within the timeout
+
+    Yields:
+      Tuple of (timestamps, samples)
+        timestamps is a numpy array of shape (batch,) of times from time.time()
+        samples is a numpy array of shape (batch, 9) where each row is
+          [accel x, y, z (Gs), gyro x, y, z (degrees per second), gyro accum x, y, z (degrees)]
+    """
+    if not isinstance(batch, int) or batch < 1:
+        raise Exception("IMU stream batch size must be a positive integer")
+    batcher = _ImuFrameBatcher(batch)
+    _rc.ensureSensorFrames()
+    _rc.addSensorFrameListener(batcher.recordFrame)
+    try:
+        while True:
+            try:
+                timestamps, raw = batcher.batches.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError("IMU stream timed out waiting for sensor readings")
+            yield timestamps, _decodeImuFrames(raw)
+    finally:
+        _rc.removeSensorFrameListener(batcher.recordFrame)
+
+
+def waitUntil(predicate, timeout=None):
+    """
+    Waits until the IMU reading satisfies a condition and returns the matching reading
+    The condition is checked against every reading the robot sends (sensor spam)
+    as it arrives, which reacts faster than a loop of reads and doesn't add traffic.
+    Sensor spam will be started if it is not already active
+
+    Usage:
+      IMU.waitUntil(lambda r: r[2] < 0) # wait for the robot to be flipped
+
+    Args:
+      predicate (function): called with an array of
+                  [accel x, y, z, gyro x, y, z, gyro accum x, y, z]
+                  in the same units as IMU.stream (calibration is applied)
+                  Returns True when the condition is met
+      timeout (number): seconds to wait. Defaults to None (wait forever)
+
+    Raises:
+      TimeoutError if the condition isn't met within the timeout
+
+    Returns:
+      Array of the 9 IMU values that met the condition
+    """
+    return _rc.waitForSensorFrame(_decodeFrame, predicate, timeout)
+
+
+class _ImuFrameBatcher:
+    """
+    Copies the IMU bytes of each sensor frame into a preallocated batch buffer
+    Runs on the communication thread so it does as little as possible per frame
+    """
+
+    def __init__(self, batchSize):
+        self.batches = queue.Queue(_MAX_QUEUED_BATCHES)
+        self._batchSize = batchSize
+        self._newBuffers()
+
+    def _newBuffers(self):
+        import numpy
+
+        self._raw = numpy.empty((self._batchSize, _IMU_FRAME_BYTES), dtype=numpy.uint8)
+        self._timestamps = numpy.empty(self._batchSize)
+        self._count = 0
+
+    def recordFrame(self, data, timestamp):
+        row = self._raw[self._count]
+        row[:18] = readSensorFrame(data, OPTYPE.ACCL) + readSensorFrame(data, OPTYPE.GYRO)
+        row[18:] = readSensorFrame(data, OPTYPE.GYRO_ACCUM)
+        self._timestamps[self._count] = timestamp
+        self._count += 1
+        if self._count < self._batchSize:
+            return
+        if self.batches.full():
+            try:
+                self.batches.get_nowait()
+                logger.debug("IMU stream consumer too slow - dropped a batch")
+            except queue.Empty:
+                pass
+        self.batches.put_nowait((self._timestamps, self._raw))
+        self._newBuffers()
+
+
+def _decodeFrame(data):
+    values = bytesToIntArray(readSensorFrame(data, OPTYPE.ACCL), 2, signed=True)
+    values += bytesToIntArray(readSensorFrame(data, OPTYPE.GYRO), 4, signed=True)
+    values += bytesToIntArray(readSensorFrame(data, OPTYPE.GYRO_ACCUM), 4, signed=True)
+    bias = _accelBias + _gyroBias + [0, 0, 0]
+    return [v / 1000 - b for v, b in zip(values, bias)]
+
+
+def _decodeImuFrames(raw):
+    import numpy
+
+    accel = numpy.ascontiguousarray(raw[:, :6]).view("<i2")
+    gyro = numpy.ascontiguousarray(raw[:, 6:]).view("<i4")
+    samples = numpy.hstack((accel, gyro)) / 1000
+    samples[:, :6] -= _accelBias + _gyroBias
+    return samples
+
+
+def calibrate(seconds=2.0):
+    """
+    Measures the accelerometer and gyroscope bias while the robot sits still and level
+    The bias is then subtracted from readAccel, readGyro, stream, and readOrientation
+    Results are saved for the robot's ID and loaded automatically on later connections
+    Sensor spam will be started if it is not already active
+
+    Args:
+      seconds (number): how long to collect readings for. Defaults to 2
+
+    Raises:
+      Exception if too few readings were received
+
+    Returns:
+      Dictionary of the calibration results with keys
+        accelBias and gyroBias - [x, y, z] values subtracted from readings
+        accelNoise and gyroNoise - [x, y, z] standard deviation of the readings
+        samples - the number of readings used
+    """
+    import numpy
+
+    if not isNumber(seconds) or seconds <= 0:
+        raise Exception("Calibration time must be a positive number of seconds")
+    frames = []
+
+    def recordFrame(data, timestamp):
+        frames.append(
+            readSensorFrame(data, OPTYPE.ACCL)
+            + readSensorFrame(data, OPTYPE.GYRO)
+            + readSensorFrame(data, OPTYPE.GYRO_ACCUM)
+        )
+
+    _rc.ensureSensorFrames()
+    _rc.addSensorFrameListener(recordFrame)
+    try:
+        time.sleep(seconds)
+    finally:
+        _rc.removeSensorFrameListener(recordFrame)
+    if len(frames) < 10:
+        raise Exception("Not enough IMU readings received to calibrate")
+
+    raw = numpy.asarray(frames, dtype=numpy.uint8)
+    accel = numpy.ascontiguousarray(raw[:, :6]).view("<i2") / 1000
+    gyro = numpy.ascontiguousarray(raw[:, 6:18]).view("<i4") / 1000
+    # Robot should be level so the accelerometer reads 1G straight down the z axis
+    calibration = {
+        "accelBias": (accel.mean(axis=0) - [0, 0, 1]).tolist(),
+        "gyroBias": gyro.mean(axis=0).tolist(),
+        "accelNoise": accel.std(axis=0).tolist(),
+        "gyroNoise": gyro.std(axis=0).tolist(),
+        "samples": len(frames),
+    }
+    if max(calibration["gyroNoise"]) > _MAX_STILL_GYRO_NOISE:
+        logger.warning("Robot appears to have moved during IMU calibration")
+    _setCalibration(calibration, _readBotID())
+    if _calibrationBotID is not None:
+        saved = loadUserCache(_CALIBRATION_CACHE_NAME)
+        saved[str(_calibrationBotID)] = calibration
+        saveUserCache(_CALIBRATION_CACHE_NAME, saved)
+    return calibration
+
+
+def readCalibration():
+    """
+    Returns:
+      The dictionary from IMU.calibrate currently being applied or None if not calibrated
+    """
+    return _calibration
+
+
+def clearCalibration():
+    """
+    Stops applying the IMU calibration and forgets the saved calibration for the connected robot
+
+    Returns:
+      None
+    """
+    if _calibrationBotID is not None:
+        saved = loadUserCache(_CALIBRATION_CACHE_NAME)
+        if saved.pop(str(_calibrationBotID), None) is not None:
+            saveUserCache(_CALIBRATION_CACHE_NAME, saved)
+    _setCalibration(None, None)
+
+
+def _setCalibration(calibration, botID):
+    global _calibration, _calibrationBotID, _accelBias, _gyroBias
+    _calibration = calibration
+    _calibrationBotID = botID
+    if calibration:
+        _accelBias = list(calibration["accelBias"])
+        _gyroBias = list(calibration["gyroBias"])
+    else:
+        _accelBias = [0.0, 0.0, 0.0]
+        _gyroBias = [0.0, 0.0, 0.0]
+    _orientation.setBias(_accelBias, _gyroBias)
+
+
+def _readBotID():
+    info = _rc.getRobotInfo()
+    if info and info["botID"] is not None:
+        return info["botID"]
+    try:
+        return bytesToIntArray(_rc.readAttribute(OPTYPE.BOTID), 2, signed=False)[0]
+    except Exception as e:
+        logger.debug("Could not read robot ID for IMU calibration")
+        logger.debug(e)
+        return None
+
+
+def _loadSavedCalibration():
+    saved = loadUserCache(_CALIBRATION_CACHE_NAME)
+    if not saved:
+        # Nothing to look up so don't spend a read on the robot ID
+        _setCalibration(None, None)
+        return
+    botID = _readBotID()
+    calibration = saved.get(str(botID)) if botID is not None else None
+    _setCalibration(calibration, botID)
+    if calibration:
+        logger.info("Loaded IMU calibration for robot " + str(botID))
+
+
+_rc.addPostConnectionCallback(_loadSavedCalibration)
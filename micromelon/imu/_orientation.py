@@ -0,0 +1,86 @@
+import math
+import struct
+import threading
+from .._robot_comms import MicromelonType as OPTYPE, readSensorFrame
+
+# Weight of the integrated gyro against the accelerometer angles for roll and pitch
+_GYRO_WEIGHT = 0.98
+# Gaps between samples longer than this are not integrated (eg. spam stopped and restarted)
+_MAX_SAMPLE_GAP = 0.5  # s
+
+
+def _wrapDegrees(d):
+    return (d + 180) % 360 - 180
+
+
+class OrientationFilter:
+    """
+    Complementary filter that fuses accelerometer and gyroscope readings
+    from each sensor spam packet into roll, pitch, and yaw in degrees
+
+    Roll and pitch are corrected towards the accelerometer's gravity direction
+    Yaw is the integrated gyro z axis and will drift over time
+    """
+
+    def __init__(self):
+        self._state = None  # (roll, pitch, yaw, timestamp) replaced as a whole
+        self._yawOffset = 0
+        self._accelBias = (0, 0, 0)
+        self._gyroBias = (0, 0, 0)
+        self.firstSampleEvent = threading.Event()
+
+    def setBias(self, accelBias, gyroBias):
+        self._accelBias = tuple(accelBias)
+        self._gyroBias = tuple(gyroBias)
+
+    def recordFrame(self, data, timestamp):
+        ax, ay, az, gx, gy, gz = struct.unpack(
+            "<3h3i",
+            bytes(readSensorFrame(data, OPTYPE.ACCL) + readSensorFrame(data, OPTYPE.GYRO)),
+        )
+        ab = self._accelBias
+        gb = self._gyroBias
+        self.update(
+            [ax / 1000 - ab[0], ay / 1000 - ab[1], az / 1000 - ab[2]],
+            [gx / 1000 - gb[0], gy / 1000 - gb[1], gz / 1000 - gb[2]],
+            timestamp,
+        )
+
+    def update(self, accel, gyro, timestamp):
+        accelRoll = math.degrees(math.atan2(accel[1], accel[2]))
+        accelPitch = math.degrees(
+            math.atan2(-accel[0], math.hypot(accel[1], accel[2]))
+        )
+        state = self._state
+        if state is None:
+            self._state = (accelRoll, accelPitch, 0.0, timestamp)
+            self.firstSampleEvent.set()
+            return
+
+        roll, pitch, yaw, lastTimestamp = state
+        dt = timestamp - lastTimestamp
+        if dt <= 0 or dt > _MAX_SAMPLE_GAP:
+            self._state = (accelRoll, accelPitch, yaw, timestamp)
+            return
+
+        roll += gyro[0] * dt
+        pitch += gyro[1] * dt
+        roll += (1 - _GYRO_WEIGHT) * _wrapDegrees(accelRoll - roll)
+        pitch += (1 - _GYRO_WEIGHT) * _wrapDegrees(accelPitch - pitch)
+        yaw += gyro[2] * dt
+        self._state = (
+            _wrapDegrees(roll),
+            _wrapDegrees(pitch),
+            _wrapDegrees(yaw),
+            timestamp,
+        )
+
+    def read(self):
+        state = self._state
+        if state is None:
+            return None
+        return [state[0], state[1], _wrapDegrees(state[2] - self._yawOffset), state[3]]
+
+    def resetYaw(self):
+        state = self._state
+        self._yawOffset = state[2] if state else 0
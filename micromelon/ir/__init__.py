@@ -9,4 +9,6 @@ __all__ = [
     "readAll",
     "readLeft",
     "readRight",
+    "readFiltered",
+    "waitUntil",
 ]
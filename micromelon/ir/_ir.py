@@ -1,4 +1,9 @@
-from .._robot_comms import RoverController, MicromelonType as OPTYPE
+from .._robot_comms import (
+    RoverController,
+    MicromelonType as OPTYPE,
+    FilteredSensor,
+    readSensorFrame,
+)
 from .._binary import bytesToIntArray
 
 _rc = RoverController()
@@ -7,8 +12,13 @@ __all__ = [
     "readAll",
     "readLeft",
     "readRight",
+    "readFiltered",
+    "waitUntil",
 ]
 
+# Created on first use then updated from every sensor spam packet
+_filter: FilteredSensor = None
+
 
 def readAll():
     """
@@ -40,3 +50,64 @@ def readRight():
       Distance in cm as a float from right sensor
     """
     return readAll()[1]
+
+
+def readFiltered(window=5, smoothing=None):
+    """
+    Reads the median of the last window readings of both IR distance sensors
+    to ignore occasional spikes.
+    While sensor spam is active the medians are updated in the background from every
+    reading the robot sends so this doesn't communicate with the robot.
+    Otherwise each call reads the sensors once and adds it to the window.
+    Calling with a different window or smoothing starts the median again.
+
+    Args:
+      window (int): number of readings to take the median of. Defaults to 5
+      smoothing (float): optional factor between 0 and 1 to also smooth the medians
+                      with an exponential moving average. Smaller is smoother
+
+    Raises:
+      Exception on invalid arguments
+
+    Returns:
+      Array of floats [left, right] as filtered distances in cm
+    """
+    global _filter
+    if _filter is None:
+        _filter = FilteredSensor(_decodeFrame, window, smoothing)
+        _rc.addSensorFrameListener(_filter.recordFrame)
+    else:
+        _filter.configure(window, smoothing)
+    # Spam packets keep the filter current - otherwise (or if they stop) read directly
+    if not _rc.isSensorSpamActive() or _filter.isStale():
+        _filter.recordValues(readAll())
+    return list(_filter.read())
+
+
+def _decodeFrame(data):
+    mm = bytesToIntArray(readSensorFrame(data, OPTYPE.TIME_OF_FLIGHT), 2, signed=False)
+    return [mm[0] / 10, mm[1] / 10]
+
+
+def waitUntil(predicate, timeout=None):
+    """
+    Waits until the IR distances satisfies a condition and returns the matching reading
+    The condition is checked against every reading the robot sends (sensor spam)
+    as it arrives, which reacts faster than a loop of reads and doesn't add traffic.
+    Sensor spam will be started if it is not already active
+
+    Usage:
+      IR.waitUntil(lambda lr: lr[0] < 10) # wait for an object within 10cm on the left
+
+    Args:
+      predicate (function): called with an array of [left, right] distances in cm
+                  Returns True when the condition is met
+      timeout (number): seconds to wait. Defaults to None (wait forever)
+
+    Raises:
+      TimeoutError if the condition isn't met within the timeout
+
+    Returns:
+      Array of floats [left, right] that met the condition
+    """
+    return _rc.waitForSensorFrame(_decodeFrame, predicate, timeout)
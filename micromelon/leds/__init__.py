@@ -9,4 +9,7 @@ __all__ = [
     "write",
     "writeAll",
     "off",
+    "animate",
+    "hueSweep",
+    "gradient",
 ]
@@ -1,5 +1,6 @@
-from .._robot_comms import RoverController, MicromelonType as OPTYPE
-from ..colour._colour import _parseColourArg
+# numpy is imported where it is used so importing this module stays fast
+from .._robot_comms import RoverController, MicromelonType as OPTYPE, TimelineEvent
+from ..colour._colour import _parseColourArg, hsvToRgbArray
 
 _rc = RoverController()
 
@@ -7,8 +8,14 @@ __all__ = [
     "write",
     "writeAll",
     "off",
+    "animate",
+    "hueSweep",
+    "gradient",
 ]
 
+# RGBS mask bit for each LED
+_LED_MASK_BITS = [1, 2, 4, 8]
+
 
 def write(id, c):
     """
@@ -83,3 +90,128 @@ def off():
     Turns all LEDs off by setting their colour to black ([0, 0, 0])
     """
     _rc.writeAttribute(OPTYPE.RGBS, [0x0F] + [0] * 12)
+
+
+def animate(frames, fps=20, wait=True):
+    """
+    Plays a precomputed animation on the LEDs at a fixed frame rate
+    Frames are sent from the communication thread so the timing doesn't depend on your program
+    Frames identical to the previous one are skipped and only LEDs that changed are written
+    If the robot can't keep up, late frames are dropped but the last frame is always shown
+
+    Args:
+      frames (array): shape (N, 4, 3) of [r, g, b] for each LED in each frame
+                    or shape (N, 3) to set all LEDs to the same colour in each frame
+                    r, g, and b values must be between 0 and 255 inclusive
+      fps (number): frames per second to play the animation at
+      wait (boolean): if True block until the animation has finished
+
+    Raises:
+      Exception on invalid frames or frame rate
+
+    Returns:
+      Dictionary with keys sent, dropped, and maxLatenessMS if wait is True
+      Otherwise a concurrent.futures.Future that completes with the dictionary.
+        Cancel it to stop the animation early
+    """
+    if not isinstance(fps, (int, float)) or fps <= 0:
+        raise Exception("Frame rate must be a positive number")
+    # Packets only set the LEDs that changed so after a dropped frame all LEDs are set
+    events = [
+        TimelineEvent(i / fps, OPTYPE.RGBS.value, packet, [0x0F] + packet[1:])
+        for i, packet in _buildAnimationPackets(_parseFrames(frames))
+    ]
+    future = _rc.runTimeline(events)
+    if wait:
+        return future.result()
+    return future
+
+
+def hueSweep(count, startHue=0, endHue=360, ledOffset=0):
+    """
+    Builds animation frames that sweep through hues at full saturation and brightness
+    The end hue is not included so a 0 to 360 sweep can be looped smoothly
+
+    Args:
+      count (int): number of frames
+      startHue (number): hue of LED 1 in the first frame
+      endHue (number): hue LED 1 approaches in the last frame
+      ledOffset (number): degrees of hue added for each LED after LED 1 eg. 90 to spread the rainbow
+
+    Returns:
+      numpy array of frames with shape (count, 4, 3) for LEDs.animate
+    """
+    import numpy
+
+    hues = numpy.linspace(startHue, endHue, count, endpoint=False)
+    hues = (hues[:, None] + numpy.arange(4) * ledOffset) % 360
+    hsv = numpy.stack(numpy.broadcast_arrays(hues, 1.0, 1.0), axis=-1)
+    return hsvToRgbArray(hsv)
+
+
+def gradient(c1, c2, count):
+    """
+    Builds animation frames that fade evenly from one colour to another in the rgb space
+    Both the start and end colours are included
+
+    Args:
+      c1 (array): starting colour [r, g, b] for all LEDs or one colour for each of the 4 LEDs
+      c2 (array): ending colour [r, g, b] for all LEDs or one colour for each of the 4 LEDs
+      count (int): number of frames
+
+    Raises:
+      Exception on invalid colours
+
+    Returns:
+      numpy array of frames with shape (count, 4, 3) for LEDs.animate
+    """
+    import numpy
+
+    start = _parseFrameColours(c1)
+    end = _parseFrameColours(c2)
+    ratios = numpy.linspace(0, 1, count)[:, None, None]
+    return numpy.rint(start + (end - start) * ratios).astype(int)
+
+
+def _parseFrameColours(c):
+    import numpy
+
+    colours = numpy.asarray(c, dtype=float)
+    if colours.shape not in ((3,), (4, 3)):
+        raise Exception("Colour must be [r, g, b] or a list of 4 colours")
+    if numpy.any(colours < 0) or numpy.any(colours > 255):
+        raise Exception("Colour values must be between 0 and 255 inclusive")
+    return numpy.broadcast_to(colours, (4, 3))
+
+
+def _parseFrames(frames):
+    import numpy
+
+    try:
+        frames = numpy.asarray(frames)
+    except (TypeError, ValueError):
+        raise Exception("Frames must be an array of colours")
+    if frames.ndim == 2 and frames.shape[-1] == 3:
+        frames = numpy.repeat(frames[:, None, :], 4, axis=1)
+    if frames.ndim != 3 or frames.shape[1:] != (4, 3):
+        raise Exception("Frames must have shape (N, 4, 3) or (N, 3)")
+    if numpy.any(frames < 0) or numpy.any(frames > 255):
+        raise Exception("Colour values must be between 0 and 255 inclusive")
+    return numpy.rint(frames).astype(numpy.uint8)
+
+
+# Returns (frame index, RGBS packet data) for each frame that changes an LED
+def _buildAnimationPackets(frames):
+    import numpy
+
+    if len(frames) == 0:
+        return []
+    changed = numpy.any(frames[1:] != frames[:-1], axis=-1)
+    # Current LED state is unknown so the first frame sets every LED
+    changed = numpy.concatenate((numpy.ones((1, 4), dtype=bool), changed))
+    masks = changed.astype(int) @ _LED_MASK_BITS
+    # The last frame sets every LED so it ends correct whatever was dropped
+    masks[-1] = 0x0F
+    keep = numpy.flatnonzero(masks)
+    packets = numpy.column_stack((masks[keep], frames[keep].reshape(-1, 12)))
+    return list(zip(keep.tolist(), packets.tolist()))
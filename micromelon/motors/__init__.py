@@ -2,6 +2,7 @@
 Collection of functions to control the movement of the robot
 """
 from ._motors import *
+from ._planner import *
 
 __all__ = [
     "write",
@@ -9,4 +10,8 @@ __all__ = [
     "turn",
     "turnDegrees",
     "setDegreesOffset",
+    "MotorPlan",
+    "planArcs",
+    "planWaypoints",
+    "followPlan",
 ]
@@ -0,0 +1,264 @@
+import math
+# numpy is imported where it is used so importing this module stays fast
+from .._robot_comms import RoverController, MicromelonType as OPTYPE
+from .._mm_logging import RangeErrorCategory, warnRangeCategory
+from .._utils import MAX_SPEED, MAX_DISTANCE
+from . import _motors
+from ._motors import _ROBOT_WIDTH, _SLIP_FACTOR
+
+_rc = RoverController()
+
+__all__ = [
+    "MotorPlan",
+    "planArcs",
+    "planWaypoints",
+    "followPlan",
+]
+
+# Packed layout of MOTOR_SET packet data built by _buildMotorPacketData
+_MOTOR_PACKET_FIELDS = [
+    ("lSpeed", "i1"),
+    ("rSpeed", "i1"),
+    ("lDist", "<i2"),
+    ("rDist", "<i2"),
+    ("sync", "u1"),
+]
+
+
+class MotorPlan:
+    """
+    A precomputed route of motor segments
+    Each segment is one MOTOR_SET operation with both motors stopping together
+
+    Attributes:
+      speeds (numpy array): shape (N, 2) of [left, right] speeds in cm/s
+      distances (numpy array): shape (N, 2) of [left, right] distances in cm (always positive)
+      seconds (numpy array): shape (N,) of approximate seconds each segment will take
+      packets (list): N pre-encoded MOTOR_SET packet data arrays ready to write to the robot
+    """
+
+    def __init__(self, speeds, distances, seconds):
+        self.speeds = speeds
+        self.distances = distances
+        self.seconds = seconds
+        self.packets = _buildMotorPacketArray(speeds, distances).tolist()
+
+    def __len__(self):
+        return len(self.packets)
+
+    def totalSeconds(self):
+        """
+        Returns:
+          The approximate number of seconds it will take to drive the whole plan
+        """
+        import numpy
+
+        return float(numpy.sum(self.seconds))
+
+
+def planArcs(degrees, speed=15, radius=0, reverse=False):
+    """
+    Calculates the motor segments for a sequence of turns in one pass
+    Each segment is equivalent to a call to Motors.turnDegrees with the same arguments
+    Arguments can be single numbers or arrays and are broadcast against each other
+    Segments with zero degrees are left out of the plan
+
+    Args:
+      degrees (number or array): Number of degrees to turn for each segment.  Negative degrees is a left turn
+      speed (number or array): Motor speed to base each turn off. Must be between -30 and 30 (cm/s)
+      radius (number or array): Radius (in cm) to make each turn in
+      reverse (boolean or array): If True then the turn will be done in reverse
+
+    Raises:
+      Exception on invalid arguments
+
+    Returns:
+      MotorPlan for the turns
+    """
+    import numpy
+
+    degrees, speed, radius, reverse = _asSegmentArrays(degrees, speed, radius, reverse)
+    if numpy.any(radius < 0):
+        raise Exception("Radius cannot be a negative number")
+
+    keep = degrees != 0
+    degrees, speed, radius, reverse = (
+        degrees[keep],
+        _restrictSpeeds(speed[keep]),
+        radius[keep],
+        reverse[keep],
+    )
+    if numpy.any(speed == 0):
+        raise Exception("Speed cannot be zero when turning degrees")
+
+    speeds, distances, seconds = _calcMotorSpeedsAndTimeArray(
+        speed, radius, degrees, reverse
+    )
+    return MotorPlan(speeds, distances, seconds)
+
+
+def planWaypoints(points, speed=15, startHeading=0):
+    """
+    Calculates the motor segments to drive through a sequence of (x, y) waypoints in cm
+    The robot starts at (0, 0) and for each waypoint turns on the spot to face it
+    then drives straight to it.
+    A heading of 0 is facing along the positive y axis and positive headings are clockwise
+
+    Args:
+      points (array): shape (N, 2) of [x, y] waypoints in cm
+      speed (number): speed to drive and turn at. Must be between 0 and 30 (cm/s)
+      startHeading (number): heading of the robot in degrees at the start of the route
+
+    Raises:
+      Exception on invalid arguments
+
+    Returns:
+      MotorPlan for the route
+    """
+    import numpy
+
+    try:
+        points = numpy.asarray(points, dtype=float).reshape(-1, 2)
+    except (TypeError, ValueError):
+        raise Exception("Waypoints must be an array of [x, y] numbers")
+    if not isinstance(speed, (int, float)) or speed <= 0:
+        raise Exception("Speed must be a positive number")
+    speed = _restrictSpeeds(numpy.asarray([speed], dtype=float))[0]
+
+    steps = numpy.diff(points, axis=0, prepend=[[0.0, 0.0]])
+    lengths = numpy.hypot(steps[:, 0], steps[:, 1])
+    # Hold the previous heading through zero length steps
+    moving = lengths > 0
+    headings = numpy.degrees(numpy.arctan2(steps[:, 0], steps[:, 1]))
+    headings = numpy.where(moving, headings, numpy.nan)
+    headings = numpy.concatenate(([startHeading], headings))
+    lastValid = numpy.maximum.accumulate(
+        numpy.where(numpy.isnan(headings), 0, numpy.arange(len(headings)))
+    )
+    headings = headings[lastValid]
+    turns = (numpy.diff(headings) + 180) % 360 - 180
+    turns = numpy.where(turns == -180, 180, turns)
+
+    turnSpeeds, turnDists, turnSecs = _calcMotorSpeedsAndTimeArray(
+        numpy.full(len(turns), speed),
+        numpy.zeros(len(turns)),
+        numpy.where(turns == 0, 1, turns),  # placeholder degrees for dropped rows
+        numpy.zeros(len(turns), dtype=bool),
+    )
+    lineSpeeds = numpy.full((len(lengths), 2), speed)
+    lineDists = numpy.column_stack((lengths, lengths))
+    lineSecs = lengths / speed
+
+    # Interleave turn then straight segment for each waypoint and drop empty ones
+    speeds = numpy.stack((turnSpeeds, lineSpeeds), axis=1).reshape(-1, 2)
+    distances = numpy.stack((turnDists, lineDists), axis=1).reshape(-1, 2)
+    seconds = numpy.column_stack((turnSecs, lineSecs)).reshape(-1)
+    keep = numpy.column_stack((turns != 0, moving)).reshape(-1)
+    return MotorPlan(speeds[keep], distances[keep], seconds[keep])
+
+
+def followPlan(plan, timeout=120):
+    """
+    Drives each segment of a MotorPlan in order
+    Blocks (waits) until every segment has completed
+
+    Args:
+      plan (MotorPlan): plan returned by Motors.planArcs or Motors.planWaypoints
+      timeout (number): seconds to wait for each segment to complete. Defaults to 120
+
+    Raises:
+      TimeoutError if a segment does not complete in time
+
+    Returns:
+      None
+    """
+    for packet in plan.packets:
+        _rc.doMotorOperation(OPTYPE.MOTOR_SET, packet, timeout=timeout)
+
+
+def _asSegmentArrays(degrees, speed, radius, reverse):
+    import numpy
+
+    try:
+        degrees = numpy.asarray(degrees, dtype=float)
+        speed = numpy.asarray(speed, dtype=float)
+        radius = numpy.asarray(radius, dtype=float)
+    except (TypeError, ValueError):
+        raise Exception("Degrees, speed and radius must be numbers")
+    reverse = numpy.asarray(reverse, dtype=bool)
+    return [numpy.atleast_1d(a) for a in numpy.broadcast_arrays(degrees, speed, radius, reverse)]
+
+
+def _restrictSpeeds(speeds):
+    import numpy
+
+    if numpy.any(numpy.abs(speeds) > MAX_SPEED):
+        warnRangeCategory(
+            "Speed must be between -{0} and {0}".format(MAX_SPEED),
+            RangeErrorCategory.SPEED,
+        )
+    return numpy.clip(speeds, -MAX_SPEED, MAX_SPEED)
+
+
+def _restrictDistances(dists):
+    import numpy
+
+    if numpy.any(numpy.abs(dists) > MAX_DISTANCE):
+        warnRangeCategory(
+            "Distance must be between -{0} and {0}".format(MAX_DISTANCE),
+            RangeErrorCategory.DISTANCE,
+        )
+    return numpy.clip(dists, -MAX_DISTANCE, MAX_DISTANCE) * 10
+
+
+# Array equivalent of _motors._calcMotorSpeedsAndTime for non-zero degrees
+def _calcMotorSpeedsAndTimeArray(speed, radius, degrees, reverse):
+    import numpy
+
+    offset = _motors._degreesCalibrationOffset
+    adjusted = degrees + numpy.where(degrees < 0, -offset, offset)
+    # only apply modified degrees if doesn't cause a sign change
+    applyOffset = ~((degrees < 0) & (adjusted > 0)) & (adjusted != 0)
+    d = numpy.where(applyOffset, adjusted, degrees)
+
+    d = numpy.where(speed < 0, -d, d)
+    speed = numpy.abs(speed)
+
+    inner = radius - (_ROBOT_WIDTH / 2) - _SLIP_FACTOR
+    outer = radius + (_ROBOT_WIDTH / 2) + _SLIP_FACTOR
+    arc = numpy.abs(d) * math.pi / 180
+    lDist = numpy.where(d > 0, d * math.pi / 180 * outer, arc * inner)
+    rDist = numpy.where(d > 0, d * math.pi / 180 * inner, arc * outer)
+
+    maxDist = numpy.maximum(numpy.abs(lDist), numpy.abs(rDist))
+    meanDist = (numpy.minimum(numpy.abs(lDist), numpy.abs(rDist)) + maxDist) / 2
+
+    # Scale so max motor speed will be 30cm/s
+    seconds = meanDist / speed
+    seconds = numpy.where(maxDist / seconds > MAX_SPEED, maxDist / MAX_SPEED, seconds)
+
+    direction = numpy.where(reverse, -1, 1)
+    speeds = numpy.column_stack((lDist / seconds, rDist / seconds)) * direction[:, None]
+    distances = numpy.column_stack((numpy.abs(lDist), numpy.abs(rDist)))
+    return speeds, distances, seconds
+
+
+# Array equivalent of _buildMotorValuesArray followed by _buildMotorPacketData
+def _buildMotorPacketArray(speeds, distances):
+    import numpy
+
+    speeds = _restrictSpeeds(speeds)
+    distances = _restrictDistances(distances)
+    # Direction is carried by the sign of the distance
+    distances = numpy.where(speeds < 0, -distances, distances)
+    speeds = numpy.abs(speeds)
+
+    packetType = numpy.dtype(_MOTOR_PACKET_FIELDS)
+    packed = numpy.zeros(len(speeds), dtype=packetType)
+    scaledSpeeds = numpy.round(speeds / numpy.maximum(MAX_SPEED, speeds) * 127)
+    packed["lSpeed"] = scaledSpeeds[:, 0]
+    packed["rSpeed"] = scaledSpeeds[:, 1]
+    packed["lDist"] = numpy.round(distances[:, 0])
+    packed["rDist"] = numpy.round(distances[:, 1])
+    packed["sync"] = 1
+    return packed.view(numpy.uint8).reshape(-1, packetType.itemsize)
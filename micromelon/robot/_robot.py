@@ -5,7 +5,6 @@ from .._binary import (
     bytesToIntArray,
     intArrayToBytes,
 )
-import numpy
 
 _rc = RoverController()
 
@@ -101,6 +100,9 @@ def getImageCapture(width, height):
     image = _rc.readAttribute(
         OPTYPE.RPI_IMAGE, intArrayToBytes([width, height], 2, False)
     )
+    # Only needed for images so imported here to keep importing this module fast
+    import numpy
+
     image = numpy.reshape(image, (height, width, 3))
     return image
 
@@ -9,4 +9,5 @@ __all__ = [
     "right",
     "setBoth",
     "read",
+    "moveTo",
 ]
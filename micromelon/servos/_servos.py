@@ -1,4 +1,6 @@
-from .._robot_comms import RoverController, MicromelonType as OPTYPE
+import math
+# numpy is imported where it is used so importing this module stays fast
+from .._robot_comms import RoverController, MicromelonType as OPTYPE, TimelineEvent
 
 from .._utils import *
 
@@ -9,8 +11,17 @@ __all__ = [
     "right",
     "setBoth",
     "read",
+    "moveTo",
 ]
 
+# Maps 0 - 1 progress through a move to 0 - 1 progress towards the target
+_EASINGS = {
+    "linear": lambda t: t,
+    "easeIn": lambda t: t * t,
+    "easeOut": lambda t: t * (2 - t),
+    "easeInOut": lambda t: t * t * (3 - 2 * t),
+}
+
 
 def _setServos(s1, s2):
     """
@@ -92,3 +103,76 @@ def read():
     degrees = _rc.readAttribute(OPTYPE.SERVO_MOTORS)
     # unsigned read so offset back to -90 to 90 range
     return [degrees[0] - 90, degrees[1] - 90]
+
+
+def moveTo(s1, s2, duration, easing="linear", rate=50, wait=True):
+    """
+    Smoothly moves the servos from their current positions to new positions over a set time
+    Positions are sent from the communication thread at a fixed rate
+    and only when the rounded position changes.
+    If the robot can't keep up then intermediate positions are skipped so the move still ends on time
+
+    Args:
+      s1, s2 (number): degrees to move the left and right servos to
+                      must be between -90 and 90 and will be rounded.  None leaves that servo as is
+      duration (number): seconds the move should take
+      easing (string or function): "linear", "easeIn", "easeOut", "easeInOut" or a function
+                      mapping progress through the move (0 - 1) to progress towards the target (0 - 1)
+      rate (number): maximum position updates per second
+      wait (boolean): if True block until the move has finished
+
+    Raises:
+      Exception on invalid arguments
+
+    Returns:
+      Dictionary with keys sent, dropped, and maxLatenessMS if wait is True
+      Otherwise a concurrent.futures.Future that completes with the dictionary.
+        Cancel it to stop the move early
+    """
+    import numpy
+
+    targets = [None if s is None else restrictServoDegrees(s) for s in (s1, s2)]
+    duration = restrictTime(duration)
+    if not isNumber(rate) or rate <= 0:
+        raise Exception("Rate must be a positive number")
+    if not callable(easing):
+        if easing not in _EASINGS:
+            raise Exception("Easing must be one of " + ", ".join(_EASINGS.keys()))
+        easing = _EASINGS[easing]
+
+    start = read()
+    steps = max(1, math.ceil(duration * rate))
+    progress = numpy.arange(1, steps + 1) / steps
+    eased = numpy.asarray(easing(progress), dtype=float)
+    events = []
+    for offset, packet in _buildTrajectoryPackets(start, targets, eased, progress * duration):
+        events.append(TimelineEvent(offset, OPTYPE.SERVO_MOTORS.value, packet))
+    future = _rc.runTimeline(events)
+    if wait:
+        return future.result()
+    return future
+
+
+# Returns (offset, SERVO_MOTORS packet data) for each point where a rounded position changes
+def _buildTrajectoryPackets(start, targets, eased, offsets):
+    import numpy
+
+    columns = []
+    startRow = []
+    for begin, target in zip(start, targets):
+        if target is None:
+            # Flag to leave the servo as it is
+            columns.append(numpy.full(len(eased), 0xFF))
+            startRow.append(0xFF)
+        else:
+            positions = numpy.rint(begin + (target - begin) * eased)
+            columns.append(numpy.clip(positions, -90, 90).astype(int) + 90)
+            startRow.append(begin + 90)
+    packets = numpy.column_stack(columns)
+    # Skip points that don't change either servo
+    # The timeline always sends its last event so the target is still reached
+    previous = numpy.vstack(([startRow], packets[:-1]))
+    keep = numpy.any(packets != previous, axis=1)
+    if not keep.any():
+        keep[-1] = True
+    return list(zip(offsets[keep].tolist(), packets[keep].tolist()))
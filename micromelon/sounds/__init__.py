@@ -5,4 +5,4 @@ Also helpful definitions for musical notes to their frequency and aliases for di
 from ._sounds import *
 from ._notes import *
 
-__all__ = ["playNote", "play", "off", "NOTES", "TUNES"]
+__all__ = ["playNote", "play", "off", "sequence", "NOTES", "TUNES"]
@@ -1,7 +1,7 @@
 import math
 import time
 from enum import Enum
-from .._robot_comms import RoverController, MicromelonType as OPTYPE
+from .._robot_comms import RoverController, MicromelonType as OPTYPE, TimelineEvent
 
 from .._utils import *
 
@@ -11,6 +11,7 @@ __all__ = [
     "playNote",
     "play",
     "off",
+    "sequence",
 ]
 
 
@@ -29,19 +30,11 @@ def playNote(freq, secs=None):
     Returns:
       None
     """
-    # Allow use of NOTES enum as frequency arguments
-    if isinstance(freq, Enum):
-        freq = freq.value
-
-    if not isNumber(freq) or freq < 0:
-        raise Exception("Note frequency must be a positive number")
+    littleEndianFreq = _buildFrequencyData(freq)
 
     if secs:
         secs = restrictTime(secs)
 
-    # TODO: Is ceil really the right thing to do here?
-    freq = math.ceil(freq)
-    littleEndianFreq = [round(freq) & 0xFF, (round(freq) >> 8) & 0xFF]
     result = _rc.writeAttribute(OPTYPE.BUZZER_FREQ, littleEndianFreq)
     if secs:
         time.sleep(secs)
@@ -74,3 +67,53 @@ def off():
       None
     """
     return _rc.writeAttribute(OPTYPE.BUZZER_FREQ, [0])
+
+
+def sequence(notes, wait=True):
+    """
+    Plays a sequence of notes from the communication thread
+    Each note starts at a fixed time from the start of the sequence so delays
+    communicating with the robot don't build up and change the rhythm
+    The buzzer is turned off at the end of the sequence
+
+    Args:
+      notes (array): list of (freq, secs) pairs eg. [(NOTES.C4, 0.25), (NOTES.E4, 0.25)]
+                    freq is a positive number or NOTES element (0 for a rest)
+                    secs is how long to play the note for
+      wait (boolean): if True block until the sequence has finished
+
+    Raises:
+      Exception on invalid notes
+
+    Returns:
+      Dictionary with keys sent, dropped, and maxLatenessMS if wait is True
+      Otherwise a concurrent.futures.Future that completes with the dictionary.
+        Cancel it to stop the sequence early and turn the buzzer off
+    """
+    events = []
+    offset = 0
+    for note in notes:
+        try:
+            freq, secs = note
+        except (TypeError, ValueError):
+            raise Exception("Each note must be a (frequency, seconds) pair")
+        events.append(TimelineEvent(offset, OPTYPE.BUZZER_FREQ.value, _buildFrequencyData(freq)))
+        offset += restrictTime(secs)
+    events.append(TimelineEvent(offset, OPTYPE.BUZZER_FREQ.value, [0]))
+    future = _rc.runTimeline(events, cancelWrite=(OPTYPE.BUZZER_FREQ.value, [0]))
+    if wait:
+        return future.result()
+    return future
+
+
+def _buildFrequencyData(freq):
+    # Allow use of NOTES enum as frequency arguments
+    if isinstance(freq, Enum):
+        freq = freq.value
+
+    if not isNumber(freq) or freq < 0:
+        raise Exception("Note frequency must be a positive number")
+
+    # TODO: Is ceil really the right thing to do here?
+    freq = math.ceil(freq)
+    return [round(freq) & 0xFF, (round(freq) >> 8) & 0xFF]
@@ -5,4 +5,6 @@ from ._ultrasonic import *
 
 __all__ = [
     "read",
+    "readFiltered",
+    "waitUntil",
 ]
@@ -1,12 +1,22 @@
-from .._robot_comms import RoverController, MicromelonType as OPTYPE
+from .._robot_comms import (
+    RoverController,
+    MicromelonType as OPTYPE,
+    FilteredSensor,
+    readSensorFrame,
+)
 from .._binary import bytesToIntArray
 
 _rc = RoverController()
 
 __all__ = [
     "read",
+    "readFiltered",
+    "waitUntil",
 ]
 
+# Created on first use then updated from every sensor spam packet
+_filter: FilteredSensor = None
+
 
 def read():
     """
@@ -15,3 +25,62 @@ def read():
     """
     reading = _rc.readAttribute(OPTYPE.ULTRASONIC)
     return bytesToIntArray(reading, 2, signed=False)[0]
+
+
+def readFiltered(window=5, smoothing=None):
+    """
+    Reads the median of the last window ultrasonic readings to ignore occasional spikes
+    While sensor spam is active the median is updated in the background from every
+    reading the robot sends so this doesn't communicate with the robot.
+    Otherwise each call reads the sensor once and adds it to the window.
+    Calling with a different window or smoothing starts the median again.
+
+    Args:
+      window (int): number of readings to take the median of. Defaults to 5
+      smoothing (float): optional factor between 0 and 1 to also smooth the median
+                      with an exponential moving average. Smaller is smoother
+
+    Raises:
+      Exception on invalid arguments
+
+    Returns:
+      The filtered number of cm to the nearest object in the ultrasonic sensor's field of view
+    """
+    global _filter
+    if _filter is None:
+        _filter = FilteredSensor(_decodeFrame, window, smoothing)
+        _rc.addSensorFrameListener(_filter.recordFrame)
+    else:
+        _filter.configure(window, smoothing)
+    # Spam packets keep the filter current - otherwise (or if they stop) read directly
+    if not _rc.isSensorSpamActive() or _filter.isStale():
+        _filter.recordValues([read()])
+    return _filter.read()[0]
+
+
+def _decodeFrame(data):
+    return bytesToIntArray(readSensorFrame(data, OPTYPE.ULTRASONIC), 2, signed=False)
+
+
+def waitUntil(predicate, timeout=None):
+    """
+    Waits until the ultrasonic distance satisfies a condition and returns the matching reading
+    The condition is checked against every reading the robot sends (sensor spam)
+    as it arrives, which reacts faster than a loop of reads and doesn't add traffic.
+    Sensor spam will be started if it is not already active
+
+    Usage:
+      Ultrasonic.waitUntil(lambda cm: cm < 20) # wait for an object closer than 20cm
+
+    Args:
+      predicate (function): called with the distance in cm
+                  Returns True when the condition is met
+      timeout (number): seconds to wait. Defaults to None (wait forever)
+
+    Raises:
+      TimeoutError if the condition isn't met within the timeout
+
+    Returns:
+      The ultrasonic distance in cm that met the condition
+    """
+    return _rc.waitForSensorFrame(lambda data: _decodeFrame(data)[0], predicate, timeout)
@@ -0,0 +1,121 @@
+import random
+import pytest
+from micromelon.colour import _colour, _nearest
+from micromelon.colour._colour import _parseRawColour, hsvToRgb, rgbToHsv, CS
+from micromelon._robot_comms import MicromelonType as OPTYPE, AttributeNotImplementedError
+from micromelon._binary import bytesToIntArray
+
+
+def _referenceParse(rawBytes):
+    # The per value decoder _parseRawColour replaced
+    raw = bytesToIntArray(rawBytes, 2, signed=False)
+    parsed = []
+    if len(raw) == 3:
+        return [[raw[s]] + hsvToRgb(raw[s], 1, 1) + [128] for s in range(3)]
+    for i in range(len(raw)):
+        if len(raw) == 15 and i in (4, 9, 14):
+            continue
+        raw[i] = round((raw[i] / 10240) * 255 * 100) / 100
+    if len(raw) == 12:
+        for start in (8, 4, 0):
+            parsed.append([rgbToHsv(*raw[start : start + 3])[0]] + raw[start : start + 4])
+    else:
+        for start in (10, 5, 0):
+            parsed.append([raw[start + 4]] + raw[start : start + 4])
+    for s in range(3):
+        for v in range(1, 5):
+            if parsed[s][v] > 255:
+                parsed[s][v] = 255
+    return parsed
+
+
+def _randomRaw(count, rng):
+    values = [rng.choice([0, rng.randint(0, 10240), rng.randint(10240, 65535)]) for _ in range(count)]
+    if count == 15:
+        for i in (4, 9, 14):
+            values[i] = rng.randint(0, 360)
+    if count == 3:
+        values = [rng.randint(0, 360) for _ in range(3)]
+    return [b for v in values for b in v.to_bytes(2, "little")]
+
+
+@pytest.mark.parametrize("count", [3, 12, 15])
+def test_parse_matches_reference_decoder(count):
+    rng = random.Random(count)
+    for _ in range(200):
+        raw = _randomRaw(count, rng)
+        expected = _referenceParse(raw)
+        parsed = _parseRawColour(raw)
+        assert parsed == expected
+        # Capped readings stay the int 255 rather than becoming a float
+        assert [type(v) for s in parsed for v in s] == [type(v) for s in expected for v in s]
+        for sensor in range(3):
+            assert _parseRawColour(raw, sensor) == expected[sensor]
+
+
+def test_parse_unknown_length():
+    assert _parseRawColour([0] * 8) is None
+
+
+class _FakeController:
+    """Stands in for the RoverController with scripted responses to attribute reads"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.reads = []
+
+    def readCachedAttribute(self, opType):
+        return None
+
+    def readAttribute(self, opType):
+        self.reads.append(opType)
+        response = self.responses[opType]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_falls_back_to_colour_all_only_when_not_implemented(monkeypatch):
+    monkeypatch.setattr(_colour, "_unsupportedColourAttributes", set())
+    allBytes = [0] * 30
+    fake = _FakeController(
+        {
+            OPTYPE.COLOUR_HUE: AttributeNotImplementedError("not implemented"),
+            OPTYPE.COLOUR_ALL: allBytes,
+        }
+    )
+    monkeypatch.setattr(_colour, "_rc", fake)
+    assert _colour._readColourAttribute(CS.HUE.value) == allBytes
+    assert _colour._readColourAttribute(CS.HUE.value) == allBytes
+    assert fake.reads == [OPTYPE.COLOUR_HUE, OPTYPE.COLOUR_ALL, OPTYPE.COLOUR_ALL]
+
+
+def test_other_read_errors_are_raised(monkeypatch):
+    monkeypatch.setattr(_colour, "_unsupportedColourAttributes", set())
+    fake = _FakeController({OPTYPE.COLOUR_RGBW: Exception("UART failed")})
+    monkeypatch.setattr(_colour, "_rc", fake)
+    with pytest.raises(Exception, match="UART failed"):
+        _colour._readColourAttribute(CS.RED.value)
+    assert OPTYPE.COLOUR_RGBW not in _colour._unsupportedColourAttributes
+
+
+def _bruteForceNearest(rgb, palette):
+    distances = [sum((a - b) ** 2 for a, b in zip(rgb, colour)) for colour in palette]
+    return distances.index(min(distances))
+
+
+def test_nearest_colour_matches_brute_force(monkeypatch):
+    rng = random.Random(29)
+    palette = dict(_nearest._palette)
+    for i in range(20):
+        palette["EXTRA" + str(i)] = [rng.randint(0, 255) for _ in range(3)]
+    monkeypatch.setattr(_nearest, "_palette", palette)
+    monkeypatch.setattr(_nearest, "_lut", None)
+    colours = list(palette.values())
+    pixels = [[rng.randint(0, 255) for _ in range(3)] for _ in range(3000)]
+    # Colours midway between palette entries land near cell edges
+    pixels += [[(a + b) // 2 for a, b in zip(*rng.sample(colours, 2))] for _ in range(500)]
+    expected = [_bruteForceNearest(rgb, colours) for rgb in pixels]
+    assert list(_nearest.nearestColourArray(pixels)) == expected
+    names = _nearest.colourNames()
+    assert [_nearest.nearestColour(rgb) for rgb in pixels[:50]] == [names[i] for i in expected[:50]]
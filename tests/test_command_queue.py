@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+from micromelon._robot_comms._robot_communicator_threaded import (
+    RobotCommunicatorThread,
+    _commandPriority,
+)
+from micromelon._robot_comms._comms_constants import (
+    MicromelonOpCode as OPCODE,
+    MicromelonType as OPTYPE,
+    COMMAND_PRIORITY,
+    CONNECTION_STATUS,
+    RUNNING_STATES,
+)
+from micromelon._robot_comms._timeline import TimelineEvent
+
+
+class CommandRecorder:
+    """Runs commands on a communicator with no transport and records the order they ran in"""
+
+    def __init__(self):
+        self.comms = RobotCommunicatorThread()
+        self.comms.start()
+        self.ran = []
+        self.blockerStarted = threading.Event()
+        self.releaseBlocker = threading.Event()
+        self._threads = []
+
+    def record(self, name):
+        self.ran.append(name)
+        return name
+
+    async def blocker(self):
+        # Holds the command executor the way a transaction waiting for its response does
+        self.blockerStarted.set()
+        while not self.releaseBlocker.is_set():
+            await asyncio.sleep(0.005)
+        return "blocker"
+
+    def runInThread(self, name, priority, f=None):
+        """Queues a command from another thread and returns a list its result is added to"""
+        result = []
+
+        def run():
+            try:
+                result.append(
+                    self.comms.runCommand(
+                        5, f or self.record, name, priority=priority.value
+                    )
+                )
+            except Exception as e:
+                result.append(e)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self._threads.append(thread)
+        return result
+
+    def waitForQueued(self, count):
+        deadline = time.time() + 2
+        while self.comms._commandQueue.qsize() < count:
+            assert time.time() < deadline, "commands were not queued"
+            time.sleep(0.001)
+
+    def startBlocker(self):
+        self.runInThread(None, COMMAND_PRIORITY.SENSOR_READ, lambda name: self.blocker())
+        assert self.blockerStarted.wait(2)
+
+    def finish(self):
+        self.releaseBlocker.set()
+        for thread in self._threads:
+            thread.join(5)
+        self.comms.stop()
+        self.comms.join(5)
+
+
+def test_queued_commands_run_in_priority_order():
+    recorder = CommandRecorder()
+    try:
+        recorder.startBlocker()
+        order = [
+            COMMAND_PRIORITY.BULK,
+            COMMAND_PRIORITY.SENSOR_READ,
+            COMMAND_PRIORITY.ACTUATOR,
+            COMMAND_PRIORITY.MOTION,
+        ]
+        for i, priority in enumerate(order):
+            recorder.runInThread(priority.name, priority)
+            recorder.waitForQueued(i + 1)
+    finally:
+        recorder.finish()
+    assert recorder.ran == ["MOTION", "ACTUATOR", "SENSOR_READ", "BULK"]
+
+
+def test_stop_overtakes_queued_move_and_cancels_only_motion():
+    recorder = CommandRecorder()
+    try:
+        recorder.startBlocker()
+        move = recorder.runInThread("move", COMMAND_PRIORITY.MOTION)
+        recorder.waitForQueued(1)
+        leds = recorder.runInThread("leds", COMMAND_PRIORITY.ACTUATOR)
+        recorder.waitForQueued(2)
+        # Returns while the command in progress is still waiting
+        assert (
+            recorder.comms.runCommand(
+                1,
+                recorder.record,
+                "stop",
+                priority=COMMAND_PRIORITY.EMERGENCY_STOP.value,
+            )
+            == "stop"
+        )
+        assert recorder.ran == ["stop"]
+        assert not recorder.releaseBlocker.is_set()
+    finally:
+        recorder.finish()
+    assert recorder.ran == ["stop", "leds"]
+    assert isinstance(move[0], Exception)
+    assert str(move[0]) == "Cancelled by stop command"
+    assert leds == ["leds"]
+
+
+def test_stop_payloads_are_not_treated_as_emergency_stops():
+    write = OPCODE.WRITE.value
+    assert (
+        _commandPriority(write, OPTYPE.MOTOR_SET.value, [0] * 7)
+        == COMMAND_PRIORITY.MOTION.value
+    )
+    assert (
+        _commandPriority(write, OPTYPE.BUTTON_PRESS.value, [RUNNING_STATES.CLOSED.value])
+        == COMMAND_PRIORITY.ACTUATOR.value
+    )
+    assert (
+        _commandPriority(OPCODE.READ.value, OPTYPE.I2C_HEADER.value, [])
+        == COMMAND_PRIORITY.BULK.value
+    )
+
+
+def test_stop_cancels_timelines_but_not_other_background_tasks():
+    comms = RobotCommunicatorThread()
+    comms.start()
+    comms._connectionStatus = CONNECTION_STATUS.CONNECTED
+
+    async def forever(transact):
+        await asyncio.sleep(60)
+
+    try:
+        # Cancelled straight away so it may not have started running yet
+        timeline = comms.runTimeline([TimelineEvent(60, OPTYPE.RGBS.value, [0x0F])])
+        poller = comms.runBackgroundTask(forever)
+        comms.cancelTimelines()
+        deadline = time.time() + 2
+        while not timeline.done():
+            assert time.time() < deadline, "timeline was not cancelled"
+            time.sleep(0.001)
+        assert timeline.cancelled()
+        assert not poller.done()
+    finally:
+        comms._connectionStatus = CONNECTION_STATUS.NOT_CONNECTED
+        comms.stop()
+        comms.join(5)
+    assert poller.cancelled()
@@ -0,0 +1,65 @@
+import threading
+import pytest
+from micromelon._robot_comms._completion_slot import CompletionSlot
+
+
+def test_result_is_returned_once():
+    slot = CompletionSlot()
+    generation = slot.prepare()
+    slot.complete(generation, "done")
+    assert slot.wait(1) == "done"
+    with pytest.raises(TimeoutError):
+        slot.wait(0.01)
+
+
+def test_result_from_another_thread():
+    slot = CompletionSlot()
+    generation = slot.prepare()
+    timer = threading.Timer(0.05, slot.complete, (generation, 42))
+    timer.start()
+    assert slot.wait(2) == 42
+    timer.join()
+
+
+def test_exception_results_are_raised():
+    slot = CompletionSlot()
+    slot.complete(slot.prepare(), Exception("UART failed"))
+    with pytest.raises(Exception, match="UART failed"):
+        slot.wait(1)
+
+
+def test_late_result_of_timed_out_call_is_dropped():
+    slot = CompletionSlot()
+    stale = slot.prepare()
+    with pytest.raises(TimeoutError, match="Command Timed out"):
+        slot.wait(0.01)
+    current = slot.prepare()
+    slot.complete(stale, "stale")
+    with pytest.raises(TimeoutError):
+        slot.wait(0.01)
+    slot.complete(current, "current")
+    assert slot.wait(1) == "current"
+
+
+def test_completion_after_timeout_does_not_leak_into_next_call():
+    slot = CompletionSlot()
+    stale = slot.prepare()
+    with pytest.raises(TimeoutError):
+        slot.wait(0.01)
+    # Completed after the wait gave up but before the slot is reused
+    slot.complete(stale, "stale")
+    current = slot.prepare()
+    with pytest.raises(TimeoutError):
+        slot.wait(0.01)
+    slot.complete(current, "current")
+    assert slot.wait(1) == "current"
+
+
+def test_repeated_completion_is_ignored():
+    slot = CompletionSlot()
+    generation = slot.prepare()
+    slot.complete(generation, "first")
+    slot.complete(generation, "second")
+    assert slot.wait(1) == "first"
+    slot.complete(slot.prepare(), "next")
+    assert slot.wait(1) == "next"
@@ -0,0 +1,79 @@
+import random
+import statistics
+import pytest
+from micromelon._robot_comms._running_median import RunningMedian
+from micromelon._robot_comms._filtered_sensor import FilteredSensor
+from micromelon.ultrasonic import _ultrasonic
+
+
+@pytest.mark.parametrize("window", [1, 2, 5, 8])
+def test_running_median_matches_sliding_window_median(window):
+    rng = random.Random(window)
+    median = RunningMedian(window)
+    assert median.getMedian() is None
+    values = [rng.randint(0, 20) for _ in range(300)]
+    for i, value in enumerate(values):
+        median.recordValue(value)
+        assert median.getMedian() == statistics.median(values[max(0, i + 1 - window) : i + 1])
+
+
+def test_filter_ignores_spikes_in_each_value():
+    sensorFilter = FilteredSensor(lambda data: data, 3)
+    for values in ([10, 50], [11, 50], [400, 0], [12, 51]):
+        sensorFilter.recordValues(values)
+    assert sensorFilter.read() == [12, 50]
+
+
+def test_filter_smooths_the_median():
+    sensorFilter = FilteredSensor(lambda data: data, 1, smoothing=0.5)
+    sensorFilter.recordValues([10])
+    sensorFilter.recordValues([20])
+    assert sensorFilter.read() == [15]
+
+
+def test_frames_are_decoded():
+    sensorFilter = FilteredSensor(lambda data: [data[0] * 2], 1)
+    sensorFilter.recordFrame([4], 0)
+    assert sensorFilter.read() == [8]
+
+
+def test_configure_discards_values_only_when_settings_change():
+    sensorFilter = FilteredSensor(lambda data: data, 3)
+    sensorFilter.recordValues([10])
+    sensorFilter.configure(3)
+    assert sensorFilter.read() == [10]
+    assert not sensorFilter.isStale()
+    sensorFilter.configure(5)
+    assert sensorFilter.read() is None
+    assert sensorFilter.isStale()
+
+
+@pytest.mark.parametrize("window, smoothing", [(0, None), (2.5, None), (3, 0), (3, 1.5)])
+def test_invalid_settings(window, smoothing):
+    with pytest.raises(Exception):
+        FilteredSensor(lambda data: data, window, smoothing)
+
+
+class _FakeController:
+    """Counts sensor frame listeners and returns a fixed reading"""
+
+    def __init__(self):
+        self.listeners = []
+
+    def addSensorFrameListener(self, callback):
+        self.listeners.append(callback)
+
+    def isSensorSpamActive(self):
+        return False
+
+    def readAttribute(self, opType):
+        return [30, 0]
+
+
+def test_read_filtered_keeps_one_filter_per_sensor(monkeypatch):
+    fake = _FakeController()
+    monkeypatch.setattr(_ultrasonic, "_rc", fake)
+    monkeypatch.setattr(_ultrasonic, "_filter", None)
+    for window in range(1, 20):
+        assert _ultrasonic.readFiltered(window, 0.5) == 30
+    assert len(fake.listeners) == 1
@@ -0,0 +1,10 @@
+import subprocess
+import sys
+import pytest
+
+
+@pytest.mark.parametrize("name", ["Motors", "LEDs", "Servos", "IMU", "Colour"])
+def test_importing_a_module_does_not_import_numpy(name):
+    # Run in a fresh interpreter since other tests import numpy
+    code = "import sys\nfrom micromelon import {}\nassert 'numpy' not in sys.modules".format(name)
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,50 @@
+import pytest
+from micromelon.motors import _motors, _planner
+
+
+def _scalarPacket(degrees, speed, radius, reverse):
+    # The per call path Motors.turnDegrees sends
+    params = _motors._calcMotorSpeedsAndTime(speed, radius, degrees, reverse)
+    motorValues = _motors._buildMotorValuesArray(
+        params["distances"][0],
+        params["speeds"][0],
+        params["distances"][1],
+        params["speeds"][1],
+        True,
+    )
+    return _motors._buildMotorPacketData(motorValues), params["seconds"]
+
+
+_ARCS = [
+    (degrees, speed, radius, reverse)
+    for degrees in (-720, -181, -90, -33.3, -1, 1, 45, 90, 137.5, 360)
+    for speed in (-30, -12.5, -1, 1, 7, 15, 30)
+    for radius in (0, 2.5, 10, 40)
+    for reverse in (False, True)
+]
+
+
+@pytest.mark.parametrize("offset", [0, 3, -5])
+def test_plan_arcs_packets_match_turn_degrees(monkeypatch, offset):
+    monkeypatch.setattr(_motors, "_degreesCalibrationOffset", offset)
+    degrees, speeds, radii, reverses = zip(*_ARCS)
+    plan = _planner.planArcs(degrees, speeds, radii, reverses)
+    assert len(plan) == len(_ARCS)
+    for i, arc in enumerate(_ARCS):
+        packet, seconds = _scalarPacket(*arc)
+        assert plan.packets[i] == packet, arc
+        assert plan.seconds[i] == pytest.approx(seconds)
+
+
+def test_plan_arcs_broadcasts_and_drops_zero_degrees():
+    plan = _planner.planArcs([90, 0, -90], speed=20)
+    assert len(plan) == 2
+    assert plan.packets == [_scalarPacket(90, 20, 0, False)[0], _scalarPacket(-90, 20, 0, False)[0]]
+
+
+@pytest.mark.parametrize(
+    "arguments", [([90], 0, 0, False), ([90], 15, -1, False), (["left"], 15, 0, False)]
+)
+def test_plan_arcs_invalid_arguments(arguments):
+    with pytest.raises(Exception):
+        _planner.planArcs(*arguments)
@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+from micromelon._robot_comms import RoverController, MicromelonType as OPTYPE
+from micromelon._robot_comms._robot_communicator_threaded import RobotCommunicatorThread
+from micromelon._robot_comms._comms_constants import (
+    MicromelonOpCode as OPCODE,
+    COMMAND_PRIORITY,
+    CONNECTION_STATUS,
+)
+
+
+class _FakeTransport:
+    """Completed writes are the ack (as over BLE) - writes fail while failWrites is set"""
+
+    SHOULD_FAKE_PACKET_ACK = True
+
+    def __init__(self):
+        self.failWrites = False
+
+    def writePacketTimed(self, packet):
+        async def write():
+            await asyncio.sleep(0)
+            if self.failWrites:
+                raise OSError("write failed")
+
+        return write()
+
+
+@pytest.fixture
+def comms():
+    comms = RobotCommunicatorThread()
+    comms.start()
+    transport = _FakeTransport()
+    comms._connection = transport
+    comms._uart.transport = transport
+    comms._connectionStatus = CONNECTION_STATUS.CONNECTED
+    yield comms
+    comms._connection = None
+    comms._connectionStatus = CONNECTION_STATUS.NOT_CONNECTED
+    comms.stop()
+    comms.join(5)
+
+
+def test_only_completed_writes_are_restored(comms):
+    comms.writeAttribute(OPTYPE.BUZZER_FREQ, [10, 1], 1)
+    comms._connection.failWrites = True
+    with pytest.raises(OSError):
+        comms.writeAttribute(OPTYPE.BUZZER_FREQ, [20, 2], 1)
+    results = comms.doBatchTransaction([(OPCODE.WRITE, OPTYPE.SERVO_MOTORS, [100, 100])], 1)
+    assert isinstance(results[0], Exception)
+    assert comms.getActuatorRestoreWrites() == [(OPTYPE.BUZZER_FREQ.value, [10, 1])]
+
+
+def test_failed_stop_is_still_restored_as_stopped(comms):
+    comms.writePacket(OPCODE.WRITE, OPTYPE.MOTOR_SET, [30, 30, 0, 0, 0, 0, 0], True, 1)
+    comms._connection.failWrites = True
+    with pytest.raises(OSError):
+        comms.writePacket(
+            OPCODE.WRITE,
+            OPTYPE.MOTOR_SET,
+            [0] * 7,
+            True,
+            1,
+            COMMAND_PRIORITY.EMERGENCY_STOP,
+        )
+    assert comms.getActuatorRestoreWrites() == [(OPTYPE.MOTOR_SET.value, [0] * 7)]
+
+
+class _FakeCommunicator:
+    def __init__(self):
+        self.disconnects = 0
+
+    def isSensorSpamActive(self):
+        return False
+
+    def getSensorSpamInterval(self):
+        return None
+
+    def getActuatorRestoreWrites(self):
+        return []
+
+    def isInSerialMode(self):
+        return False
+
+    def disconnect(self):
+        self.disconnects += 1
+
+
+@pytest.fixture
+def rc(monkeypatch):
+    rc = RoverController()
+    monkeypatch.setattr(rc, "_robotCommunicator", _FakeCommunicator())
+    reconnects = []
+    monkeypatch.setattr(rc, "_lastConnection", (lambda: reconnects.append(True), ()))
+    monkeypatch.setattr(rc, "_roverRunning", False)
+    monkeypatch.setattr(rc, "reconnects", reconnects, raising=False)
+    return rc
+
+
+def test_restore_session_reconnects(rc):
+    state = rc.captureSessionState()
+    assert rc.restoreSession(state)
+    assert rc.reconnects == [True]
+
+
+def test_restore_session_is_abandoned_after_disconnect(rc):
+    state = rc.captureSessionState()
+    rc.disconnect()
+    assert not rc.restoreSession(state)
+    assert rc.reconnects == []
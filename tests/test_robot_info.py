@@ -0,0 +1,90 @@
+import pytest
+from micromelon._robot_comms import RoverController, MicromelonType as OPTYPE
+
+
+class _FakeCommunicator:
+    def isSafetyGuardEnabled(self):
+        return False
+
+    def noteConnectReady(self):
+        return None
+
+
+class _FakeRobot:
+    """Answers the batched reads made after connecting and records which were made"""
+
+    def __init__(self, botID=7):
+        self.botID = botID
+        self.failing = set()
+        self.reads = []
+
+    def readBatch(self, reads):
+        self.reads.append(set(reads))
+        values = {
+            OPTYPE.STATE_OF_CHARGE: [80],
+            OPTYPE.SENSOR_ERRORS: [0, 0],
+            OPTYPE.BOTID: [self.botID, 0],
+            OPTYPE.SIMULATOR_INFO: [0],
+            OPTYPE.HW_VERSION: [1, 2],
+            OPTYPE.FW_VERSION: [3, 4],
+        }
+        return {
+            t: Exception("read failed") if t in self.failing else values[t] for t in reads
+        }
+
+
+_STATIC_READS = {OPTYPE.SIMULATOR_INFO, OPTYPE.HW_VERSION, OPTYPE.FW_VERSION}
+
+
+@pytest.fixture
+def rc(monkeypatch):
+    rc = RoverController()
+    monkeypatch.setattr(rc, "_robotCommunicator", _FakeCommunicator())
+    monkeypatch.setattr(rc, "_postConnectionCallbacks", [])
+    monkeypatch.setattr(rc, "_robotInfoCache", {})
+    monkeypatch.setattr(rc, "_connectionKey", ("ip", "127.0.0.1", 9000))
+    return rc
+
+
+def _connect(rc, monkeypatch, robot):
+    monkeypatch.setattr(rc, "_readBatch", robot.readBatch)
+    rc._postConnectionSetup()
+    return rc.getRobotInfo()
+
+
+def test_reconnecting_to_the_same_robot_skips_static_reads(rc, monkeypatch):
+    robot = _FakeRobot()
+    assert _connect(rc, monkeypatch, robot)["firmwareVersion"] == [3, 4]
+    robot.reads = []
+    assert _connect(rc, monkeypatch, robot)["botID"] == 7
+    assert len(robot.reads) == 1 and not robot.reads[0] & _STATIC_READS
+
+
+def test_different_robot_is_read_again(rc, monkeypatch):
+    _connect(rc, monkeypatch, _FakeRobot(botID=7))
+    robot = _FakeRobot(botID=8)
+    assert _connect(rc, monkeypatch, robot)["botID"] == 8
+    assert robot.reads[-1] == _STATIC_READS
+
+
+def test_cache_is_not_used_when_bot_id_read_fails(rc, monkeypatch):
+    robot = _FakeRobot()
+    robot.failing = {OPTYPE.BOTID}
+    _connect(rc, monkeypatch, robot)
+    # Nothing cached since the ID couldn't be read
+    assert rc._robotInfoCache == {}
+    robot.failing = set()
+    _connect(rc, monkeypatch, robot)
+    robot.failing = {OPTYPE.BOTID}
+    robot.reads = []
+    _connect(rc, monkeypatch, robot)
+    assert robot.reads[-1] == _STATIC_READS
+
+
+def test_info_with_failed_reads_is_not_cached(rc, monkeypatch):
+    robot = _FakeRobot()
+    robot.failing = {OPTYPE.FW_VERSION}
+    assert _connect(rc, monkeypatch, robot)["firmwareVersion"] is None
+    assert rc._robotInfoCache == {}
+    robot.failing = set()
+    assert _connect(rc, monkeypatch, robot)["firmwareVersion"] == [3, 4]
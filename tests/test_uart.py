@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from micromelon._robot_comms.uart import UartController, AttributeNotImplementedError
+from micromelon._robot_comms._comms_constants import (
+    MicromelonOpCode as OPCODE,
+    MicromelonType as OPTYPE,
+)
+
+
+class FakeTransport:
+    """Records written packets - responses are delivered by the test"""
+
+    def __init__(self, fakeAck=False, failWrites=False):
+        self.SHOULD_FAKE_PACKET_ACK = fakeAck
+        self.failWrites = failWrites
+        self.written = []
+
+    def writePacketTimed(self, packet):
+        async def write():
+            await asyncio.sleep(0)
+            if self.failWrites:
+                raise OSError("write failed")
+            self.written.append(packet)
+
+        return write()
+
+
+def _respond(uart, opType, payload):
+    uart.processIncomingPacket([OPCODE.ACK.value, opType, len(payload)] + payload)
+
+
+def test_fake_ack_write_does_not_resolve_pending_read_of_same_type():
+    async def run():
+        transport = FakeTransport(fakeAck=True)
+        uart = UartController(transport)
+        i2c = OPTYPE.I2C_HEADER.value
+        read = asyncio.ensure_future(uart.doUartTransaction(OPCODE.READ.value, i2c, [1, 2, 2]))
+        await asyncio.sleep(0.01)
+        write = await uart.doUartTransaction(OPCODE.WRITE.value, i2c, [0x20, 3, 7])
+        assert write == []
+        assert not read.done()
+        _respond(uart, i2c, [18, 52])
+        assert await read == [18, 52]
+
+    asyncio.run(run())
+
+
+def test_reads_of_same_type_are_matched_in_order():
+    async def run():
+        uart = UartController(FakeTransport())
+        servos = OPTYPE.SERVO_MOTORS.value
+        reads = [
+            asyncio.ensure_future(uart.doUartTransaction(OPCODE.READ.value, servos))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        for i in range(3):
+            _respond(uart, servos, [i, i])
+        assert await asyncio.gather(*reads) == [[0, 0], [1, 1], [2, 2]]
+
+    asyncio.run(run())
+
+
+def test_failed_write_removes_only_its_own_entry_and_releases_window():
+    async def run():
+        transport = FakeTransport()
+        transport.MAX_IN_FLIGHT_TRANSACTIONS = 2
+        uart = UartController(transport)
+        ultrasonic = OPTYPE.ULTRASONIC.value
+        pending = asyncio.ensure_future(uart.doUartTransaction(OPCODE.READ.value, ultrasonic))
+        await asyncio.sleep(0.01)
+        transport.failWrites = True
+        try:
+            await uart.doUartTransaction(OPCODE.READ.value, ultrasonic)
+            assert False, "write failure should raise"
+        except OSError:
+            pass
+        # The window is released by a done callback on the next loop iteration
+        await asyncio.sleep(0)
+        assert uart._inFlightWindow._value == 1
+        _respond(uart, ultrasonic, [100, 0])
+        assert await pending == [100, 0]
+        await asyncio.sleep(0)
+        assert uart._inFlightWindow._value == 2
+
+    asyncio.run(run())
+
+
+def test_not_implemented_response_raises_dedicated_error():
+    async def run():
+        uart = UartController(FakeTransport())
+        hue = OPTYPE.COLOUR_HUE.value
+        read = asyncio.ensure_future(uart.doUartTransaction(OPCODE.READ.value, hue))
+        await asyncio.sleep(0.01)
+        uart.processIncomingPacket([OPCODE.ERROR_NOT_IMPLEMENTED.value, hue, 0])
+        with pytest.raises(AttributeNotImplementedError):
+            await read
+
+    asyncio.run(run())